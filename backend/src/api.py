@@ -1,17 +1,83 @@
 from fastapi import FastAPI, HTTPException, Request, File, UploadFile, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
+import asyncio
 import json
 import os
 import base64
+import threading
+import uuid
 from typing import Optional
+from config.settings import AppConfig
+from transcription.profiles import get_profile
 from transcription.whisper_manager import WhisperManager
+from utils.cancellation import CancellationToken, OperationCancelled
+from utils.metrics import PROMETHEUS_CONTENT_TYPE, pipeline_stage, registry as metrics_registry
+from utils.tracing import configure_tracing, current_request_id
+from websocket.server import create_voice_router
+
+app_config = AppConfig()
+tracer = configure_tracing(app_config.trace_sample_rate, app_config.trace_dir, app_config.trace_format)
+
+# The Whisper model is loaded on first use (or by the warm-up task), never at import
+# Either a local WhisperManager or a SidecarWhisperClient with the same interface
+whisper_manager: Optional[WhisperManager] = None
+_whisper_lock = threading.Lock()
+warmup_task: Optional[asyncio.Task] = None
+
+metrics_registry.gauge(
+    "whisper_models_loaded", "Whisper models held by this process (0 when served by the sidecar)",
+    function=lambda: 1 if isinstance(whisper_manager, WhisperManager) else 0
+)
+
+def get_whisper_manager() -> WhisperManager:
+    """The shared WhisperManager, loading the model on first call"""
+    global whisper_manager
+    with _whisper_lock:
+        if whisper_manager is None:
+            if app_config.transcription_backend == "sidecar":
+                from transcription.sidecar import SidecarWhisperClient
+                whisper_manager = SidecarWhisperClient(app_config.sidecar_socket)
+            else:
+                settings = {
+                    "compute_type": app_config.whisper_compute_type,
+                    "cpu_threads": app_config.whisper_cpu_threads,
+                    "num_workers": app_config.whisper_num_workers
+                }
+                if app_config.whisper_autotune:
+                    from transcription.autotune import tuned_settings
+                    settings.update(tuned_settings(
+                        app_config.whisper_model_size,
+                        app_config.whisper_device,
+                        clip=app_config.whisper_autotune_clip,
+                        profile_dir=app_config.whisper_profile_dir
+                    ))
+                whisper_manager = WhisperManager(
+                    model_size=app_config.whisper_model_size,
+                    device=app_config.whisper_device,
+                    **settings
+                )
+        return whisper_manager
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global warmup_task
+    if app_config.warmup:
+        # Serve liveness probes right away; readiness flips once the model is in memory
+        warmup_task = asyncio.create_task(asyncio.to_thread(get_whisper_manager))
+    yield
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    if hasattr(whisper_manager, "close"):
+        whisper_manager.close()
 
 # Initialize FastAPI app
-app = FastAPI(title="ConversAIge API")
+app = FastAPI(title="ConversAIge API", lifespan=lifespan)
 
-# Initialize WhisperManager
-whisper_manager = WhisperManager(model_size="base")
+# Streaming voice sessions: audio in, transcripts and agent events out
+app.include_router(create_voice_router(get_whisper_manager))
 
 # Add CORS middleware to allow frontend to communicate with the backend
 app.add_middleware(
@@ -22,6 +88,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """One trace per sampled request; every response carries its request ID"""
+    with tracer.start_trace(
+        f"{request.method} {request.url.path}",
+        request_id=request.headers.get("x-request-id"),
+        method=request.method,
+        path=request.url.path
+    ) as trace:
+        response = await call_next(request)
+        if trace is not None:
+            trace.root.set_attribute("status_code", response.status_code)
+        response.headers["X-Request-ID"] = current_request_id()
+        return response
+
 # Request model for chat endpoint
 class ChatRequest(BaseModel):
     message: str
@@ -33,6 +114,36 @@ chat_history = []
 async def root():
     return {"message": "Welcome to the ConversAIge API"}
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the models needed for transcription are loaded"""
+    if whisper_manager is None:
+        status = "loading" if warmup_task is not None and not warmup_task.done() else "not_loaded"
+        if warmup_task is not None and warmup_task.done() and warmup_task.exception() is not None:
+            status = f"failed: {warmup_task.exception()}"
+        return JSONResponse(status_code=503, content={"status": status})
+    return {"status": "ready", "whisper_model": whisper_manager.model_size}
+
+@app.get("/metrics")
+async def metrics():
+    """Every counter, gauge and histogram in the Prometheus text format"""
+    return Response(content=metrics_registry.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    """Aggregated LLM and tool latency histograms from instrumented agent runs"""
+    return metrics_registry.snapshot(prefix="llm_")
+
+@app.get("/metrics/cancellation")
+async def cancellation_metrics():
+    """Work skipped because callers hung up or deadlines passed"""
+    return metrics_registry.snapshot(prefix="cancellation_")
+
 @app.post("/chat")
 async def chat(request: ChatRequest):
     """Handle chat messages from the user"""
@@ -61,25 +172,34 @@ async def agent(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/transcribe")
-async def transcribe(audio: Optional[UploadFile] = File(None)):
-    """Transcribe audio to text using WhisperX"""
+async def transcribe(request: Request, audio: Optional[UploadFile] = File(None), profile: Optional[str] = Form(None)):
+    """Transcribe audio to text using WhisperX; `profile` picks the decode profile (realtime, balanced, archive)"""
+    # Decoding stops at the next segment once the caller disconnects or the deadline passes
+    cancel_token = CancellationToken(timeout=app_config.request_timeout)
+    watcher = asyncio.create_task(cancel_token.watch_disconnect(request))
     try:
         if not audio:
             raise HTTPException(status_code=400, detail="No audio file provided")
+        try:
+            profile = get_profile(profile or app_config.transcribe_profile).name
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
             
         # Log information about the uploaded file
         file_info = f"Received file: {audio.filename}, content_type: {audio.content_type}"
         print(file_info)
         
-        # Save the uploaded file temporarily
-        temp_path = f"temp_{audio.filename}"
+        # Save the uploaded file temporarily; unique per request so concurrent uploads never collide
+        temp_path = f"temp_{uuid.uuid4().hex}_{os.path.basename(audio.filename or 'audio.wav')}"
         try:
-            with open(temp_path, "wb") as buffer:
+            with pipeline_stage("upload_read").time():
                 content = await audio.read()
+            with open(temp_path, "wb") as buffer:
                 buffer.write(content)
             
             # Transcribe the audio using WhisperX
-            transcription = whisper_manager.transcribe(temp_path)
+            manager = await asyncio.to_thread(get_whisper_manager)
+            transcription = await asyncio.to_thread(manager.transcribe, temp_path, cancel_token=cancel_token, profile=profile)
             
             # Clean up the temporary file
             os.remove(temp_path)
@@ -102,9 +222,17 @@ async def transcribe(audio: Optional[UploadFile] = File(None)):
                 os.remove(temp_path)
             raise e
             
+    except HTTPException:
+        raise
+    except OperationCancelled as e:
+        print(f"Transcription cancelled: {str(e)}")
+        # 499: client closed request; 504 when our own deadline ran out
+        raise HTTPException(status_code=504 if e.deadline_exceeded else 499, detail=str(e))
     except Exception as e:
         print(f"Transcription error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        watcher.cancel()
 
 def generate_response(message: str) -> str:
     """Generate a simple response based on the message content"""
@@ -0,0 +1,3 @@
+"""
+Micro-benchmarks for latency-sensitive components
+"""
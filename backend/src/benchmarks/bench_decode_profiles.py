@@ -0,0 +1,74 @@
+"""
+Word error rate and real-time factor of each decode profile on a local corpus
+
+The corpus is a directory of audio files, each with its reference transcript
+in a .txt file of the same name (`make generate-test-audio` creates one).
+Every file is transcribed `--repeats` times per profile after one warm-up run.
+WER is pooled over the corpus; the real-time factor is decode time divided by
+audio duration, so below 1 is faster than real time.
+
+    python -m benchmarks.bench_decode_profiles [--corpus ../test_audio] [--model-size base] [--repeats 3]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import List, Tuple
+from transcription.evaluation import normalize_words, word_error_rate
+from transcription.profiles import PROFILES
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".ogg")
+
+
+def load_corpus(directory: str) -> List[Tuple[str, str]]:
+    """(audio path, reference transcript) for every audio file with a .txt next to it"""
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        stem, extension = os.path.splitext(name)
+        reference = os.path.join(directory, f"{stem}.txt")
+        if extension.lower() in AUDIO_EXTENSIONS and os.path.exists(reference):
+            with open(reference, encoding="utf-8") as f:
+                corpus.append((os.path.join(directory, name), f.read().strip()))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the decode profiles for accuracy and speed")
+    parser.add_argument("--corpus", default="../test_audio", help="Directory of audio files with .txt references")
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--device", default="auto")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if os.path.isdir(args.corpus) else []
+    if not corpus:
+        sys.exit(f"No audio files with .txt references in {args.corpus}; run `make generate-test-audio` first")
+
+    from transcription.whisper_manager import WhisperManager
+    manager = WhisperManager(model_size=args.model_size, device=args.device)
+    print(f"{len(corpus)} files, model '{args.model_size}', {args.repeats} runs per file")
+    print(f"{'profile':<10} {'WER':>7} {'RTF':>7} {'mean ms':>8} {'p95 ms':>8}")
+    for name in PROFILES:
+        manager.transcribe_segments(corpus[0][0], profile=name)
+        errors, words, audio_seconds, latencies = 0.0, 0, 0.0, []
+        for path, reference in corpus:
+            for _ in range(args.repeats):
+                started = time.perf_counter()
+                result = manager.transcribe_segments(path, profile=name)
+                latencies.append(time.perf_counter() - started)
+                audio_seconds += result["duration"]
+                # Temperature fallback samples, so every run is scored
+                hypothesis = " ".join(segment["text"] for segment in result["segments"])
+                length = len(normalize_words(reference))
+                errors += word_error_rate(reference, hypothesis) * length
+                words += length
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        print(
+            f"{name:<10} {errors / max(words, 1):>7.3f} {sum(latencies) / audio_seconds:>7.3f} "
+            f"{sum(latencies) / len(latencies) * 1000:>8.0f} {p95 * 1000:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
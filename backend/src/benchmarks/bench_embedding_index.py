@@ -0,0 +1,78 @@
+import argparse
+import json
+import tempfile
+import time
+from statistics import median
+import numpy as np
+from insurance.embedding_index import EmbeddingIndex, TransformerEncoder, build_embedding_index
+
+class RandomEncoder:
+    """Deterministic stand-in encoder so matrix build/query cost can be measured without a model"""
+    model_name = "random"
+
+    def __init__(self, dimension: int = 384, seed: int = 0):
+        self.dimension = dimension
+        self.rng = np.random.default_rng(seed)
+
+    def encode(self, texts):
+        vectors = self.rng.standard_normal((len(texts), self.dimension)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def synthetic_data(count: int):
+    return {
+        "faqs": [{"question": f"question {i}", "answer": f"answer {i}"} for i in range(count)],
+        "policies": [{"name": f"policy {i}", "details": f"details {i}"} for i in range(count // 10)],
+        "departments": [{"name": f"dept {i}", "specialization": "general"} for i in range(10)],
+    }
+
+def bench_matrix(sizes, queries: int = 200):
+    encoder = RandomEncoder()
+    for count in sizes:
+        data = synthetic_data(count)
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            build_embedding_index(data, tmp, encoder)
+            build_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            index = EmbeddingIndex.load(tmp, encoder=encoder)
+            load_time = time.perf_counter() - start
+
+            vectors = encoder.encode(["q"] * queries)
+            samples = []
+            for vector in vectors:
+                start = time.perf_counter()
+                index.search_vector(vector, k=5)
+                samples.append(time.perf_counter() - start)
+            samples.sort()
+            print(
+                f"{len(index):>7} entries | build {build_time * 1000:8.1f} ms | mmap load {load_time * 1000:6.2f} ms | "
+                f"top-5 p50 {median(samples) * 1e6:8.1f} us p99 {samples[int(queries * 0.99) - 1] * 1e6:8.1f} us"
+            )
+
+def bench_encoder(data_path: str):
+    with open(data_path, "r") as file:
+        data = json.load(file)
+    encoder = TransformerEncoder()
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        build_embedding_index(data, tmp, encoder)
+        print(f"Real index build (incl. model load): {time.perf_counter() - start:.2f}s")
+        index = EmbeddingIndex.load(tmp, encoder=encoder)
+        samples = []
+        for query in ["how do I file a claim", "does my car insurance cover hail", "who handles payouts"] * 10:
+            start = time.perf_counter()
+            index.search(query, k=3)
+            samples.append(time.perf_counter() - start)
+        print(f"Real query (encode + top-k) p50: {median(samples) * 1000:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory-mapped embedding index")
+    parser.add_argument("--with-model", metavar="DATA", help="Also benchmark the real encoder on an institute JSON")
+    args = parser.parse_args()
+    bench_matrix([1_000, 10_000, 100_000])
+    if args.with_model:
+        bench_encoder(args.with_model)
+
+if __name__ == "__main__":
+    main()
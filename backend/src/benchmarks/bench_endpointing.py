@@ -0,0 +1,162 @@
+"""
+Turn latency and false cuts of the endpointers on labelled audio
+
+Callers are built from recorded line noise (temp_audio.wav) with synthetic
+speech mixed in. Each caller has its own speech level, speaking rate and
+habit of pausing inside turns, and the true end of every turn is known.
+Three line conditions are compared: quiet, normal and noisy.
+
+Baselines:
+  fixed_0.3s   main.py: mean amplitude below 0.005 for 0.3 s, 0.5 s minimum, 5 s maximum
+  fixed_1.0s   stop_transcribe.py: 1 s of silence (energy stands in for webrtcvad here)
+
+    python -m benchmarks.bench_endpointing [--callers 12] [--noise temp_audio.wav]
+"""
+import argparse
+import math
+import os
+import random
+import struct
+import wave
+from typing import Dict, List, Tuple
+from transcription.endpointing import AdaptiveEndpointer
+
+SAMPLE_RATE = 16000
+FRAME = 480  # 30 ms, the webrtcvad frame size stop_transcribe.py uses
+LINES = {"quiet": 0.0003, "normal": 0.002, "noisy": 0.01}
+
+
+def load_noise(path: str) -> List[float]:
+    with wave.open(path, "rb") as wf:
+        frames = wf.readframes(wf.getnframes())
+    samples = struct.unpack(f"<{len(frames) // 2}h", frames)
+    peak = math.sqrt(sum(s * s for s in samples[:SAMPLE_RATE]) / SAMPLE_RATE) or 1.0
+    return [s / peak for s in samples]
+
+
+def caller_audio(rng: random.Random, noise: List[float], noise_rms: float, turns: int) -> Tuple[List[float], List[Tuple[float, float]]]:
+    """Samples for one caller plus the true (start, end) of each turn"""
+    level = rng.uniform(0.06, 0.3)
+    habit = rng.uniform(0.15, 0.55)  # typical pause inside a turn
+    samples: List[float] = []
+    labels = []
+
+    def silence(seconds: float) -> None:
+        samples.extend(0.0 for _ in range(int(seconds * SAMPLE_RATE)))
+
+    def phrase(seconds: float) -> None:
+        end = len(samples) + int(seconds * SAMPLE_RATE)
+        while len(samples) < end:
+            syllable = int(rng.uniform(0.12, 0.28) * SAMPLE_RATE)
+            pitch = rng.uniform(100, 260)
+            loudness = level * rng.uniform(0.5, 1.2)
+            for i in range(syllable):
+                samples.append(loudness * math.sin(math.pi * i / syllable) * math.sin(2 * math.pi * pitch * i / SAMPLE_RATE))
+            samples.extend(0.0 for _ in range(int(rng.uniform(0.02, 0.07) * SAMPLE_RATE)))
+
+    silence(rng.uniform(0.5, 1.5))
+    for _ in range(turns):
+        start = len(samples) / SAMPLE_RATE
+        for p in range(rng.randint(1, 4)):
+            if p:
+                silence(max(0.05, rng.gauss(habit, habit / 3)))
+            phrase(rng.uniform(0.4, 2.0))
+        labels.append((start, len(samples) / SAMPLE_RATE))
+        # The agent answers; the caller is silent
+        silence(rng.uniform(2.0, 3.0))
+    offset = rng.randrange(len(noise))
+    mixed = [s + noise_rms * noise[(offset + i) % len(noise)] for i, s in enumerate(samples)]
+    return mixed, labels
+
+
+class FixedEndpointer:
+    """The fixed-threshold loops of main.py and stop_transcribe.py"""
+
+    def __init__(self, threshold: float, silence: float, min_audio: float, max_audio: float):
+        self.threshold, self.silence, self.min_audio, self.max_audio = threshold, silence, min_audio, max_audio
+        self.buffered = 0.0
+        self.quiet = 0.0
+        self.heard = False
+
+    def update(self, frame: List[float]) -> bool:
+        seconds = len(frame) / SAMPLE_RATE
+        loud = sum(abs(x) for x in frame) / len(frame) >= self.threshold
+        if loud:
+            self.heard = True
+            self.quiet = 0.0
+        elif self.heard:
+            self.quiet += seconds
+        if self.heard:
+            self.buffered += seconds
+        if self.heard and ((self.quiet >= self.silence and self.buffered >= self.min_audio) or self.buffered >= self.max_audio):
+            self.buffered, self.quiet, self.heard = 0.0, 0.0, False
+            return True
+        return False
+
+
+def score(ends: List[float], labels: List[Tuple[float, float]]) -> Dict[str, float]:
+    latencies, false_cuts, missed = [], 0, 0
+    for i, (start, end) in enumerate(labels):
+        next_start = labels[i + 1][0] if i + 1 < len(labels) else math.inf
+        false_cuts += sum(1 for t in ends if start < t < end)
+        detected = [t for t in ends if end <= t < next_start]
+        if detected:
+            latencies.append(detected[0] - end)
+        else:
+            missed += 1
+    return {"latencies": latencies, "false_cuts": false_cuts, "missed": missed, "turns": len(labels)}
+
+
+def run(samples: List[float], name: str) -> List[float]:
+    ends = []
+    if name == "adaptive":
+        endpointer = AdaptiveEndpointer(max_turn=30.0)
+    elif name == "fixed_0.3s":
+        endpointer = FixedEndpointer(0.005, 0.3, 0.5, 5.0)
+    else:
+        endpointer = FixedEndpointer(0.005, 1.0, 0.0, 30.0)
+    for offset in range(0, len(samples) - FRAME + 1, FRAME):
+        frame = samples[offset:offset + FRAME]
+        t = (offset + FRAME) / SAMPLE_RATE
+        if name == "adaptive":
+            rms = math.sqrt(sum(x * x for x in frame) / FRAME)
+            event = endpointer.update(rms, FRAME / SAMPLE_RATE)
+            if event is not None and event.kind == "end_of_turn":
+                ends.append(t)
+        elif endpointer.update(frame):
+            ends.append(t)
+    return ends
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare endpointers on labelled caller audio")
+    parser.add_argument("--noise", default="temp_audio.wav", help="Recorded line noise to mix under the speech")
+    parser.add_argument("--callers", type=int, default=12)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    noise = load_noise(args.noise) if os.path.exists(args.noise) else [random.Random(1).gauss(0, 1) for _ in range(SAMPLE_RATE)]
+    print(f"{'line':<8} {'endpointer':<12} {'turns':>6} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'false cuts':>11} {'missed':>7}")
+    for line, noise_rms in LINES.items():
+        rng = random.Random(args.seed)
+        callers = [caller_audio(rng, noise, noise_rms, args.turns) for _ in range(args.callers)]
+        for name in ("fixed_0.3s", "fixed_1.0s", "adaptive"):
+            totals = {"latencies": [], "false_cuts": 0, "missed": 0, "turns": 0}
+            for samples, labels in callers:
+                result = score(run(samples, name), labels)
+                for key in totals:
+                    totals[key] += result[key]
+            latencies = sorted(totals["latencies"])
+            if latencies:
+                mean = sum(latencies) / len(latencies) * 1000
+                p50 = latencies[len(latencies) // 2] * 1000
+                p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000
+                timing = f"{mean:>8.0f} {p50:>8.0f} {p95:>8.0f}"
+            else:
+                timing = f"{'-':>8} {'-':>8} {'-':>8}"
+            print(f"{line:<8} {name:<12} {totals['turns']:>6} {timing} {totals['false_cuts']:>11} {totals['missed']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import itertools
+import random
+import time
+from statistics import median
+from insurance.retrieval import build_faq_index
+
+WORDS = (
+    "car home health life travel pet policy claim premium deductible coverage driver vehicle "
+    "accident theft fire flood storm hail windshield hospital doctor dental payment invoice "
+    "refund cancel renew address document license registration discount family child senior "
+    "online portal phone email office branch appointment agent broker quote contract"
+).split()
+
+# Domain words plus a long tail of rarer terms, drawn with Zipf-like frequencies
+VOCABULARY = WORDS + [f"term{i}" for i in range(20_000)]
+CUM_WEIGHTS = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+def sentence(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=rng.randint(low, high)))
+
+def make_faqs(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        {"question": sentence(rng, 5, 10) + "?", "answer": sentence(rng, 15, 30) + "."}
+        for _ in range(count)
+    ]
+
+def linear_scan(faqs, query):
+    for faq in faqs:
+        if faq["question"].lower() in query.lower():
+            return faq["answer"]
+    return None
+
+def time_queries(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return median(samples), samples[int(len(samples) * 0.99) - 1]
+
+def main():
+    rng = random.Random(1)
+    for count in (1_000, 10_000, 50_000):
+        faqs = make_faqs(count)
+        start = time.perf_counter()
+        index = build_faq_index(faqs)
+        build_time = time.perf_counter() - start
+        queries = [sentence(rng, 4, 12) for _ in range(500)]
+
+        bm25_p50, bm25_p99 = time_queries(lambda q: index.search(q, k=3), queries)
+        scan_p50, scan_p99 = time_queries(lambda q: linear_scan(faqs, q), queries)
+        print(
+            f"{count:>6} FAQs | build {build_time * 1000:8.1f} ms | "
+            f"bm25 p50 {bm25_p50 * 1e6:8.1f} us p99 {bm25_p99 * 1e6:8.1f} us | "
+            f"linear scan p50 {scan_p50 * 1e6:9.1f} us p99 {scan_p99 * 1e6:9.1f} us"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import itertools
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from statistics import median
+from insurance.policy_store import PolicyStore
+
+WORDS = (
+    "covers damage vehicle liability theft fire flood storm hail windshield hospital physician "
+    "emergency dental optical travel luggage delay cancellation pet veterinary home contents "
+    "burglary water pipe roof accident injury disability income rental replacement legal"
+).split()
+# Long tail of clause-specific vocabulary with Zipf-like frequencies
+VOCABULARY = WORDS + [f"clause{i}" for i in range(20_000)]
+CUM_WEIGHTS = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+def make_policies(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"{rng.choice(['Basic', 'Plus', 'Premium', 'Comprehensive'])} Plan {i}",
+            "details": " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=rng.randint(150, 400))) + ".",
+        }
+        for i in range(count)
+    ]
+
+def list_scan(policies, query):
+    """The pre-store lookup: scan every policy dict for its name in the query"""
+    for policy in policies:
+        if policy["name"].lower() in query.lower():
+            return policy
+    return None
+
+def timed(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return median(samples) * 1e6, samples[int(len(samples) * 0.99) - 1] * 1e6
+
+def main():
+    rng = random.Random(1)
+    for count in (1_000, 10_000):
+        tracemalloc.start()
+        policies = make_policies(count)
+        list_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "policies.db")
+            store = PolicyStore(path)
+            start = time.perf_counter()
+            store.sync("bench", "v1", policies)
+            load_time = time.perf_counter() - start
+
+            policies[0]["details"] += " Updated."
+            start = time.perf_counter()
+            store.sync("bench", "v2", policies)
+            store.retire("bench", ["v2"])
+            resync_time = time.perf_counter() - start
+            with store.pool.connection() as conn:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                cache_kib = -conn.execute("PRAGMA cache_size").fetchone()[0]
+            db_bytes = os.path.getsize(path)
+            cache_bytes = cache_kib * 1024 * len(store.pool._pool.queue)
+
+            names = [rng.choice(policies)["name"] for _ in range(300)]
+            queries = [(f"tell me about {name} please",) for name in names]
+            scan = timed(lambda q: list_scan(policies, q), queries)
+            get = timed(lambda n: store.get("bench", "v2", n), [(name,) for name in names])
+            search = timed(
+                lambda q: store.search("bench", "v2", q), [(" ".join(rng.choices(VOCABULARY[len(WORDS):], k=3)),) for _ in range(300)]
+            )
+            store.close()
+
+        print(
+            f"{count:>6} policies | list heap {list_bytes / 1e6:6.1f} MB vs page cache <= {cache_bytes / 1e6:4.1f} MB "
+            f"(db file {db_bytes / 1e6:6.1f} MB) | "
+            f"initial sync {load_time * 1000:7.1f} ms, 1-row resync {resync_time * 1000:6.1f} ms\n"
+            f"{'':>15} list scan p50 {scan[0]:8.1f} us p99 {scan[1]:8.1f} us | "
+            f"store.get p50 {get[0]:6.1f} us p99 {get[1]:6.1f} us | "
+            f"fts search p50 {search[0]:8.1f} us p99 {search[1]:8.1f} us"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import random
+import time
+from insurance.language_utils import LanguageUtils
+
+FILLER = (
+    "the customer asked whether their home would be covered after the storm and how long "
+    "the process takes before the money is paid out to the account"
+).split()
+
+def legacy_translate(utils, text, from_lang, to_lang):
+    """The previous implementation: one str.replace scan per term"""
+    from_terms = utils.insurance_terms[from_lang]
+    to_terms = utils.insurance_terms[to_lang]
+    for term in from_terms:
+        if term in to_terms:
+            text = text.replace(term, to_terms[term])
+    return text
+
+def make_lines(count, seed=0):
+    rng = random.Random(seed)
+    terms = list(LanguageUtils().insurance_terms["en"].values()) + ["policyholder", "Claims", "PREMIUM"]
+    return [
+        " ".join(rng.choice(terms) if rng.random() < 0.15 else rng.choice(FILLER) for _ in range(rng.randint(8, 30)))
+        for _ in range(count)
+    ]
+
+def main():
+    utils = LanguageUtils()
+    for count in (1_000, 10_000, 100_000):
+        lines = make_lines(count)
+        start = time.perf_counter()
+        for line in lines:
+            legacy_translate(utils, line, "en", "de")
+        legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for line in lines:
+            utils.translate_insurance_terms(line, "en", "de")
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        utils.translate_insurance_terms_batch(lines, "en", "de")
+        batch = time.perf_counter() - start
+
+        print(
+            f"{count:>7} lines | replace loop {count / legacy:>10,.0f} lines/s | "
+            f"compiled {count / single:>10,.0f} lines/s | batch {count / batch:>10,.0f} lines/s"
+        )
+
+if __name__ == "__main__":
+    main()
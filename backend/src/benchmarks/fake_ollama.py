@@ -0,0 +1,82 @@
+"""
+Ollama stand-in for load tests
+
+Speaks enough of the Ollama HTTP API (/api/generate, /api/tags) for the
+LangChain Ollama client. Every completion is a ReAct final answer, streamed
+token by token with a configurable time to first token and generation rate.
+A semaphore models the server's parallel slots, so queueing behaves like a
+real Ollama under load without needing a GPU.
+
+    python -m benchmarks.fake_ollama --port 11435 --parallel 4 --tokens-per-second 40
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from aiohttp import web
+
+ANSWER = (
+    "Thought: I now know the final answer\n"
+    "Final Answer: Your comprehensive car insurance covers collision, theft and storm damage. "
+    "Claims can be filed by phone or online and are usually processed within five working days."
+)
+
+
+def create_app(parallel: int, ttft: float, tokens_per_second: float, jitter: float, seed: int = 0) -> web.Application:
+    slots = asyncio.Semaphore(parallel)
+    rng = random.Random(seed)
+    tokens = [piece + " " for piece in ANSWER.split(" ")]
+
+    async def generate(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        model = body.get("model", "fake")
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        queued_at = time.perf_counter()
+        async with slots:
+            started = time.perf_counter()
+            # Prompt evaluation grows with the prompt, like the real thing
+            prompt_tokens = len(body.get("prompt", "")) // 4
+            await asyncio.sleep(ttft * (1 + rng.uniform(-jitter, jitter)) + prompt_tokens / 2000)
+            for token in tokens:
+                chunk = {"model": model, "created_at": "", "response": token, "done": False}
+                await response.write(json.dumps(chunk).encode("utf-8") + b"\n")
+                await asyncio.sleep(1 / tokens_per_second)
+            eval_duration = time.perf_counter() - started
+        final = {
+            "model": model,
+            "created_at": "",
+            "response": "",
+            "done": True,
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": len(tokens),
+            "eval_duration": int(eval_duration * 1e9),
+            "total_duration": int((time.perf_counter() - queued_at) * 1e9),
+        }
+        await response.write(json.dumps(final).encode("utf-8") + b"\n")
+        await response.write_eof()
+        return response
+
+    async def tags(request: web.Request) -> web.Response:
+        return web.json_response({"models": [{"name": "llama3.2"}]})
+
+    app = web.Application()
+    app.router.add_post("/api/generate", generate)
+    app.router.add_get("/api/tags", tags)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ollama stand-in for load tests")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--parallel", type=int, default=4, help="Concurrent generations (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--ttft", type=float, default=0.3, help="Seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--jitter", type=float, default=0.2, help="Relative jitter of the time to first token")
+    args = parser.parse_args()
+    web.run_app(create_app(args.parallel, args.ttft, args.tokens_per_second, args.jitter), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Import-time profile of the API entry point
+
+Runs `python -X importtime -c "import api"` in a fresh interpreter and reports
+the total cold import time and the slowest top-level packages. Pass
+--budget-ms to fail (exit code 1) when the import exceeds a budget, e.g. in CI.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+LINE_PATTERN = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def profile(module: str):
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env
+    )
+    if result.returncode != 0:
+        raise Exception(f"Importing {module} failed: {result.stderr.strip().splitlines()[-1]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            # importtime indents nested imports by two spaces per level
+            entries.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="api")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    entries = profile(args.module)
+    total_ms = sum(cumulative for _, _, cumulative, depth in entries if depth == 0) / 1000
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in entries:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"import {args.module}: {total_ms:.1f} ms across {len(entries)} modules")
+    print(f"{'package':<30} {'self ms':>9}")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<30} {self_us / 1000:>9.1f}")
+    for heavy in ("torch", "faster_whisper", "transformers"):
+        if heavy in by_package:
+            print(f"warning: {heavy} is imported at module load")
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"import time {total_ms:.1f} ms exceeds the budget of {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
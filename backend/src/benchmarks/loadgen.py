@@ -0,0 +1,283 @@
+"""
+End-to-end load generator for the voice pipeline
+
+Simulates concurrent callers. Each caller repeatedly:
+  1. speaks an utterance of synthetic audio, paced in real time, either as a
+     chunked upload to /transcribe (--mode http) or as PCM frames over
+     /ws/voice (--mode ws)
+  2. sends the transcript to /chat and /agent (http mode; in ws mode the
+     session's agent answers on the same socket)
+  3. thinks for a lognormally distributed pause
+
+Only ws mode exercises the LLM: /chat and /agent answer with canned strings
+and never call Ollama, so http mode measures transcription and HTTP
+overhead, not the agent.
+
+Concurrency is ramped up in steps. Each step reports per-stage and
+end-to-end latency percentiles, error rates and throughput. The saturation
+point is the first step where throughput stops growing or the error rate or
+p95 latency breaks its limit.
+
+Against the Ollama stand-in, from backend/ (the agent imports the `src`
+package, so the API is started as src.api with src/ on the path):
+    export PYTHONPATH=src
+    python -m benchmarks.fake_ollama --port 11435 &
+    OLLAMA_BASE_URL=http://localhost:11435 uvicorn src.api:app --port 8000 &
+    python -m benchmarks.loadgen --url http://localhost:8000 --mode ws --steps 1 2 4 8 16 --step-seconds 60
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import random
+import struct
+import time
+import wave
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import aiohttp
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.02
+
+
+@dataclass
+class StepResult:
+    callers: int
+    duration: float
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    turns: int = 0
+
+    @property
+    def throughput(self) -> float:
+        return self.turns / self.duration if self.duration else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        attempts = self.turns + sum(self.errors.values())
+        return sum(self.errors.values()) / attempts if attempts else 0.0
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def synthetic_utterance(seconds: float, rng: random.Random) -> bytes:
+    """Voiced-sounding PCM16: syllable-length tone bursts with noise, separated by short gaps"""
+    samples = []
+    t = 0
+    total = int(seconds * SAMPLE_RATE)
+    while t < total:
+        burst = int(rng.uniform(0.12, 0.3) * SAMPLE_RATE)
+        pitch = rng.uniform(110, 240)
+        for i in range(min(burst, total - t)):
+            envelope = math.sin(math.pi * i / burst)
+            value = 0.3 * envelope * math.sin(2 * math.pi * pitch * (t + i) / SAMPLE_RATE) + rng.gauss(0, 0.01)
+            samples.append(int(max(-1.0, min(1.0, value)) * 32767))
+        t += burst
+        gap = min(int(rng.uniform(0.03, 0.1) * SAMPLE_RATE), total - t)
+        samples.extend(int(rng.gauss(0, 0.002) * 32767) for _ in range(max(gap, 0)))
+        t += gap
+    # Trailing silence so server-side endpointing can close the utterance
+    samples.extend(0 for _ in range(int(0.8 * SAMPLE_RATE)))
+    return struct.pack(f"<{len(samples)}h", *samples)
+
+
+def as_wav(pcm: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(pcm)
+    return buffer.getvalue()
+
+
+async def paced_chunks(data: bytes, bytes_per_second: float):
+    """Yield data at the rate it would be produced by a live microphone"""
+    chunk = max(1, int(bytes_per_second * FRAME_SECONDS))
+    started = time.perf_counter()
+    for offset in range(0, len(data), chunk):
+        yield data[offset:offset + chunk]
+        delay = started + (offset + chunk) / bytes_per_second - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class Caller:
+    def __init__(self, args: argparse.Namespace, session: aiohttp.ClientSession, result: StepResult, seed: int):
+        self.args = args
+        self.session = session
+        self.result = result
+        self.rng = random.Random(seed)
+
+    def think_time(self) -> float:
+        # Lognormal with the requested mean: most pauses are short, a few are long
+        sigma = self.args.think_sigma
+        mu = math.log(self.args.think_mean) - sigma ** 2 / 2
+        return self.rng.lognormvariate(mu, sigma)
+
+    async def timed(self, stage: str, coroutine):
+        started = time.perf_counter()
+        try:
+            value = await coroutine
+        except Exception:
+            self.result.errors[stage] += 1
+            raise
+        self.result.latencies[stage].append(time.perf_counter() - started)
+        return value
+
+    async def http_turn(self, pcm: bytes) -> None:
+        wav = as_wav(pcm)
+        form = aiohttp.FormData()
+        form.add_field(
+            "audio",
+            aiohttp.AsyncIterablePayload(paced_chunks(wav, SAMPLE_RATE * 2)),
+            filename="caller.wav",
+            content_type="audio/wav"
+        )
+        audio_seconds = len(pcm) / 2 / SAMPLE_RATE
+
+        async def transcribe():
+            async with self.session.post(f"{self.args.url}/transcribe", data=form) as response:
+                response.raise_for_status()
+                body = await response.json()
+                return " ".join(segment["text"] for segment in body["segments"]).strip() or "What does my policy cover?"
+
+        started = time.perf_counter()
+        transcript = await self.timed("transcribe", transcribe())
+        # Time after the caller stopped speaking is what the caller perceives
+        self.result.latencies["transcribe_after_speech"].append(time.perf_counter() - started - audio_seconds)
+        for endpoint in ("chat", "agent"):
+            await self.timed(endpoint, self.post_json(f"/{endpoint}", {"message": transcript}))
+        self.result.latencies["end_to_end_after_speech"].append(time.perf_counter() - started - audio_seconds)
+
+    async def post_json(self, path: str, payload: Dict) -> Dict:
+        async with self.session.post(f"{self.args.url}{path}", json=payload) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def ws_turn(self, pcm: bytes) -> None:
+        url = self.args.url.replace("http", "ws", 1) + "/ws/voice"
+        async with self.session.ws_connect(url) as ws:
+            await ws.send_str(json.dumps({"type": "start", "sample_rate": SAMPLE_RATE, "agent": not self.args.no_agent}))
+            started = time.perf_counter()
+            async for chunk in paced_chunks(pcm, SAMPLE_RATE * 2):
+                await ws.send_bytes(chunk)
+            speech_ended = time.perf_counter()
+            await ws.send_str(json.dumps({"type": "end_utterance"}))
+            await ws.send_str(json.dumps({"type": "stop"}))
+            seen_final = seen_token = False
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    break
+                event = json.loads(message.data)
+                elapsed = time.perf_counter() - speech_ended
+                if event["type"] == "final" and not seen_final:
+                    seen_final = True
+                    self.result.latencies["ws_final_after_speech"].append(elapsed)
+                elif event["type"] == "token" and not seen_token:
+                    seen_token = True
+                    self.result.latencies["ws_first_token_after_speech"].append(elapsed)
+                elif event["type"] == "answer":
+                    self.result.latencies["end_to_end_after_speech"].append(elapsed)
+                elif event["type"] == "error":
+                    raise Exception(event["message"])
+            if not seen_final:
+                raise Exception("Session closed without a final transcript")
+            self.result.latencies["ws_session"].append(time.perf_counter() - started)
+
+    async def run(self, until: float) -> None:
+        # Stagger the start so callers do not arrive in lockstep
+        await asyncio.sleep(self.rng.uniform(0, self.args.think_mean))
+        while time.perf_counter() < until:
+            pcm = synthetic_utterance(self.rng.uniform(self.args.min_utterance, self.args.max_utterance), self.rng)
+            try:
+                if self.args.mode == "ws":
+                    await self.timed("ws_turn", self.ws_turn(pcm))
+                else:
+                    await self.http_turn(pcm)
+                self.result.turns += 1
+            except Exception:
+                # Already counted per stage; keep calling like a real user would
+                pass
+            await asyncio.sleep(self.think_time())
+
+
+async def run_step(args: argparse.Namespace, callers: int) -> StepResult:
+    result = StepResult(callers=callers, duration=args.step_seconds)
+    timeout = aiohttp.ClientTimeout(total=args.request_timeout)
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        until = time.perf_counter() + args.step_seconds
+        started = time.perf_counter()
+        await asyncio.gather(*(Caller(args, session, result, seed=callers * 1000 + i).run(until) for i in range(callers)))
+        result.duration = time.perf_counter() - started
+    return result
+
+
+def report(result: StepResult) -> None:
+    print(
+        f"\n{result.callers} callers: {result.turns} turns in {result.duration:.0f} s "
+        f"({result.throughput:.2f} turns/s), error rate {result.error_rate:.1%}"
+    )
+    for stage, errors in sorted(result.errors.items()):
+        print(f"  errors {stage}: {errors}")
+    print(f"  {'stage':<32} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for stage, values in sorted(result.latencies.items()):
+        p50, p95, p99 = (percentile(values, q) for q in (0.5, 0.95, 0.99))
+        print(f"  {stage:<32} {len(values):>6} {p50:>8.3f} {p95:>8.3f} {p99:>8.3f}")
+
+
+def saturation_point(results: List[StepResult], max_error_rate: float, max_p95: float) -> Optional[int]:
+    """Caller count at which adding load stopped helping or started hurting"""
+    for previous, current in zip(results, results[1:]):
+        p95 = percentile(current.latencies.get("end_to_end_after_speech", []), 0.95)
+        if current.error_rate > max_error_rate or (p95 is not None and p95 > max_p95):
+            return current.callers
+        if current.throughput < previous.throughput * 1.1:
+            return current.callers
+    return None
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    results = []
+    for callers in args.steps:
+        result = await run_step(args, callers)
+        report(result)
+        results.append(result)
+    saturated = saturation_point(results, args.max_error_rate, args.max_p95)
+    if saturated is None:
+        print(f"\nNo saturation up to {args.steps[-1]} callers")
+    else:
+        print(f"\nSaturation at {saturated} concurrent callers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument(
+        "--mode", choices=["http", "ws"], default="http",
+        help="ws: full voice turns including the agent; http: transcription only (/chat and /agent are stubs)"
+    )
+    parser.add_argument("--steps", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--step-seconds", type=float, default=60.0)
+    parser.add_argument("--min-utterance", type=float, default=1.5)
+    parser.add_argument("--max-utterance", type=float, default=6.0)
+    parser.add_argument("--think-mean", type=float, default=4.0, help="Mean pause between turns in seconds")
+    parser.add_argument("--think-sigma", type=float, default=0.6)
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--no-agent", action="store_true", help="ws mode: transcribe only")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--max-p95", type=float, default=5.0, help="End-to-end p95 after speech, seconds")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import os
+import tempfile
+from typing import Optional
+from pydantic_settings import BaseSettings
+
+class AppConfig(BaseSettings):
+    """Configuration for the API process"""
+    whisper_model_size: str = "base"
+    whisper_device: str = "auto"
+    # Precision and threading of the local model; no compute type keeps float16 on CUDA and float32 on CPU
+    whisper_compute_type: Optional[str] = None
+    whisper_cpu_threads: int = 0
+    whisper_num_workers: int = 1
+    # Benchmark compute types and thread layouts on first start on a host and use the fastest accurate one;
+    # the result is cached per host and model in whisper_profile_dir
+    whisper_autotune: bool = False
+    whisper_autotune_clip: str = "test_audio/test.wav"
+    whisper_profile_dir: str = os.path.join(os.path.expanduser("~"), ".cache", "concierge", "whisper_profiles")
+    # Decode profile of POST /transcribe when the request names none (realtime, balanced, archive)
+    transcribe_profile: str = "balanced"
+    # Load the models in the background right after startup instead of on first use
+    warmup: bool = False
+    # Seconds a request may run before its transcription and agent work are abandoned
+    request_timeout: float = 120.0
+    # "local" loads a model in every worker; "sidecar" shares one inference process
+    transcription_backend: str = "local"
+    sidecar_socket: str = os.path.join(tempfile.gettempdir(), "concierge_whisper.sock")
+    # Fraction of requests and voice turns traced to trace_dir; 0 turns tracing off
+    trace_sample_rate: float = 0.0
+    trace_dir: str = os.path.join(tempfile.gettempdir(), "concierge_traces")
+    # "chrome" (Perfetto, chrome://tracing) or "otlp" (OTLP/JSON)
+    trace_format: str = "chrome"
+
+    class Config:
+        env_prefix = "CONCIERGE_"
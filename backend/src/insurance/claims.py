@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from utils.metrics import registry as metrics_registry
+from .institutes import DEFAULT_DATA_DIR
+from .policy_store import ConnectionPool
+
+DEFAULT_CLAIMS_DATABASE = str(DEFAULT_DATA_DIR / "claims.db")
+# How long a repeated filing in the same conversation counts as a retry of the first one
+IDEMPOTENCY_WINDOW = 600.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    claim_id TEXT PRIMARY KEY,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    policy_number TEXT,
+    description TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    filing_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_claims_policy ON claims (policy_number, created_at);
+CREATE INDEX IF NOT EXISTS idx_claims_filing ON claims (filing_key, created_at);
+"""
+
+INSERT_CLAIM = """
+INSERT INTO claims (claim_id, idempotency_key, policy_number, description, status, created_at, filing_key)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (idempotency_key) DO NOTHING
+"""
+SELECT_COLUMNS = "SELECT claim_id, idempotency_key, policy_number, description, status, created_at, filing_key FROM claims"
+SELECT_BY_KEY = SELECT_COLUMNS + " WHERE idempotency_key = ?"
+SELECT_RECENT_FILING = SELECT_COLUMNS + " WHERE filing_key = ? AND created_at >= ? ORDER BY created_at DESC LIMIT 1"
+SELECT_BY_ID = SELECT_COLUMNS + " WHERE claim_id = ?"
+SELECT_BY_POLICY = SELECT_COLUMNS + " WHERE policy_number = ? ORDER BY created_at DESC LIMIT ?"
+
+
+@dataclass(frozen=True)
+class Claim:
+    claim_id: str
+    idempotency_key: str
+    policy_number: Optional[str]
+    description: str
+    status: str
+    created_at: float
+    filing_key: Optional[str] = None
+
+
+def filing_key(scope: str, policy_number: Optional[str], description: str) -> str:
+    """
+    Key under which retries of one filing map onto the same claim
+
+    Unlike an idempotency key it does not identify a claim forever: the intake
+    treats a filing as a retry only while a claim with the same key was stored
+    less than its dedupe window ago, measured from that claim.
+
+    Args:
+        scope: The conversation filing the claim, so two callers with the same wording get their own claims
+        policy_number: Policy the claim is filed against (optional)
+        description: The caller's wording; case and whitespace are ignored
+
+    Returns:
+        Hex digest of scope, policy and wording
+    """
+    normalized = " ".join(description.lower().split())
+    key = f"{scope}\x00{policy_number or ''}\x00{normalized}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class ClaimIntake:
+    """
+    Durable claim intake with group commit.
+
+    Submissions are queued and written by a single writer thread. Whatever has
+    queued up while the previous transaction was being fsynced is written in
+    the next one, so a burst of claims (after a hail storm, say) costs one WAL
+    sync per batch instead of one per claim. Submissions that pass the same
+    idempotency key return the originally stored claim, and so do those whose
+    filing key matches a claim stored within the dedupe window; without either
+    every submission is a new claim.
+    """
+
+    def __init__(
+        self,
+        database: str = DEFAULT_CLAIMS_DATABASE,
+        max_batch: int = 256,
+        linger: float = 0.0,
+        reader_pool_size: int = 2,
+        dedupe_window: float = IDEMPOTENCY_WINDOW
+    ):
+        """
+        Open the store and start the writer thread
+
+        Args:
+            database: SQLite database path
+            max_batch: Maximum number of claims committed in one transaction
+            linger: Seconds to wait for more claims before committing a partial batch
+            reader_pool_size: Connections used for status lookups
+            dedupe_window: Seconds after a claim during which a filing with its filing key is a retry
+        """
+        self.database = database
+        self.max_batch = max_batch
+        self.linger = linger
+        self.dedupe_window = dedupe_window
+        self._queue: "queue.Queue[Optional[Tuple[Claim, Future]]]" = queue.Queue()
+        self._writer_conn = sqlite3.connect(database, check_same_thread=False)
+        self._writer_conn.execute("PRAGMA journal_mode=WAL")
+        # FULL: every committed batch is fsynced before its submitters are acknowledged
+        self._writer_conn.execute("PRAGMA synchronous=FULL")
+        self._writer_conn.executescript(SCHEMA)
+        self.readers = ConnectionPool(database, reader_pool_size)
+        self.batches_committed = 0
+        self.claims_committed = 0
+        self.duplicates = 0
+        self._writer = threading.Thread(target=self._write_loop, name="claim-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit_nowait(
+        self,
+        description: str,
+        policy_number: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        filing_key: Optional[str] = None
+    ) -> "Future[Claim]":
+        """Queue a claim; the future resolves once its batch is durably committed"""
+        claim = Claim(
+            claim_id=f"CLM-{uuid.uuid4().hex[:10].upper()}",
+            idempotency_key=idempotency_key or uuid.uuid4().hex,
+            policy_number=policy_number,
+            description=description,
+            status="received",
+            created_at=time.time(),
+            filing_key=filing_key,
+        )
+        future: "Future[Claim]" = Future()
+        self._queue.put((claim, future))
+        return future
+
+    async def submit(
+        self,
+        description: str,
+        policy_number: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        filing_key: Optional[str] = None
+    ) -> Claim:
+        return await asyncio.wrap_future(self.submit_nowait(description, policy_number, idempotency_key, filing_key))
+
+    def submit_sync(
+        self,
+        description: str,
+        policy_number: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        filing_key: Optional[str] = None,
+        timeout: float = 10.0
+    ) -> Claim:
+        return self.submit_nowait(description, policy_number, idempotency_key, filing_key).result(timeout=timeout)
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.max_batch:
+                try:
+                    remaining = deadline - time.monotonic()
+                    next_item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(next_item)
+            try:
+                self._commit(batch)
+            except Exception as e:
+                # One bad batch fails its own submitters, never the writer
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(Exception(f"Failed to store claim: {str(e)}"))
+
+    def _commit(self, batch: List[Tuple[Claim, Future]]) -> None:
+        # Submitters cancelled while queued get nothing written; the rest can no longer be cancelled
+        batch = [(claim, future) for claim, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        conn = self._writer_conn
+        try:
+            with conn:
+                stored = [self._store(conn, claim) for claim, _ in batch]
+        except sqlite3.Error as e:
+            for _, future in batch:
+                future.set_exception(Exception(f"Failed to store claim: {str(e)}"))
+            return
+        self.batches_committed += 1
+        for (claim, future), row in zip(batch, stored):
+            stored_claim = Claim(*row)
+            if stored_claim.claim_id == claim.claim_id:
+                self.claims_committed += 1
+            else:
+                self.duplicates += 1
+            future.set_result(stored_claim)
+
+    def _store(self, conn: sqlite3.Connection, c: Claim) -> Tuple:
+        """Insert one claim inside the batch transaction; returns the row it resolved to"""
+        if c.filing_key is not None:
+            # Claims earlier in this batch are already visible, so retries within one batch collapse too
+            row = conn.execute(SELECT_RECENT_FILING, (c.filing_key, c.created_at - self.dedupe_window)).fetchone()
+            if row is not None:
+                return row
+        conn.execute(INSERT_CLAIM, (
+            c.claim_id, c.idempotency_key, c.policy_number, c.description, c.status, c.created_at, c.filing_key
+        ))
+        return conn.execute(SELECT_BY_KEY, (c.idempotency_key,)).fetchone()
+
+    def get(self, claim_id: str) -> Optional[Claim]:
+        with self.readers.connection() as conn:
+            row = conn.execute(SELECT_BY_ID, (claim_id.upper(),)).fetchone()
+        return Claim(*row) if row else None
+
+    def by_policy(self, policy_number: str, limit: int = 10) -> List[Claim]:
+        with self.readers.connection() as conn:
+            rows = conn.execute(SELECT_BY_POLICY, (policy_number, limit)).fetchall()
+        return [Claim(*row) for row in rows]
+
+    async def status(self, claim_id: str) -> Optional[Claim]:
+        return await asyncio.to_thread(self.get, claim_id)
+
+    def close(self) -> None:
+        """Flush queued claims and stop the writer"""
+        self._queue.put(None)
+        self._writer.join()
+        self._writer_conn.close()
+        self.readers.close()
+
+
+_default_intake: Optional[ClaimIntake] = None
+_default_intake_lock = threading.Lock()
+
+
+def get_claim_intake() -> ClaimIntake:
+    """Process-wide claim intake shared by all agents"""
+    global _default_intake
+    with _default_intake_lock:
+        if _default_intake is None:
+            _default_intake = ClaimIntake(os.environ.get("CLAIMS_DB_PATH", DEFAULT_CLAIMS_DATABASE))
+            intake = _default_intake
+            metrics_registry.gauge(
+                "claims_queue_depth", "Claims waiting for the group-commit writer", function=lambda: intake.queue_depth
+            )
+        return _default_intake
@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+import numpy as np
+from .institutes import data_version as institute_data_version
+
+VECTORS_FILE = "vectors.npy"
+ENTRIES_FILE = "entries.json"
+# Names the version directory readers load; replaced in one rename per build
+CURRENT_FILE = "CURRENT"
+# Version directories kept per index: the current one and the one readers may still be opening
+KEEP_VERSIONS = 2
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class TransformerEncoder:
+    """Local CPU sentence encoder (mean-pooled transformer, L2-normalised)"""
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, batch_size: int = 32, max_length: int = 256):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self._tokenizer = None
+        self._model = None
+
+    def _load(self):
+        # Imported lazily so that loading a prebuilt index for keyword-only use stays cheap
+        from transformers import AutoModel, AutoTokenizer
+
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self._model = AutoModel.from_pretrained(self.model_name)
+        self._model.eval()
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) float32 matrix of unit vectors"""
+        import torch
+
+        if self._model is None:
+            self._load()
+
+        batches = []
+        with torch.inference_mode():
+            for start in range(0, len(texts), self.batch_size):
+                batch = self._tokenizer(
+                    list(texts[start:start + self.batch_size]),
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors="pt"
+                )
+                hidden = self._model(**batch).last_hidden_state
+                mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+                batches.append(pooled.numpy().astype(np.float32))
+
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(batches, axis=0)
+
+
+class IndexEntry(NamedTuple):
+    kind: str
+    text: str
+    item: Dict[str, Any]
+
+
+class EmbeddingHit(NamedTuple):
+    score: float
+    kind: str
+    item: Dict[str, Any]
+
+
+def collect_entries(data: Dict[str, Any]) -> List[IndexEntry]:
+    """Flatten the institute data into embeddable entries, grouped by kind"""
+    entries = []
+    for faq in data.get("faqs", []):
+        if isinstance(faq, dict) and "question" in faq and "answer" in faq:
+            entries.append(IndexEntry("faq", f"{faq['question']} {faq['answer']}", faq))
+    for policy in data.get("policies", []):
+        if isinstance(policy, dict) and "name" in policy:
+            entries.append(IndexEntry("policy", f"{policy['name']}: {policy.get('details', '')}", policy))
+    for dept in data.get("departments", []):
+        if isinstance(dept, dict) and "name" in dept:
+            entries.append(IndexEntry("department", f"{dept['name']} department: {dept.get('specialization', '')}", dept))
+    return entries
+
+
+def current_version_dir(index_dir: str) -> Path:
+    """The version directory the index's CURRENT pointer names"""
+    path = Path(index_dir)
+    return path / (path / CURRENT_FILE).read_text().strip()
+
+
+def build_embedding_index(
+    data: Dict[str, Any],
+    output_dir: str,
+    encoder=None,
+    data_version: Optional[str] = None
+) -> Path:
+    """
+    Embed every FAQ, policy and department entry and write the index to disk
+
+    The vectors are stored as one contiguous float32 .npy matrix so that
+    query-time processes can memory-map it. Each build goes into a directory
+    of its own, and the CURRENT file is then renamed over to name it. Readers
+    resolve CURRENT once and load both files from that directory, so they see
+    either the old index or the new one, never a mix.
+
+    Args:
+        data: Parsed institute JSON
+        output_dir: Directory to write the index into
+        encoder: Object with an `encode(texts) -> np.ndarray` method
+        data_version: Version of the data the index is built from
+            (default: institutes.data_version(data), as the registry computes it)
+
+    Returns:
+        Path of the new version directory
+    """
+    encoder = encoder or TransformerEncoder()
+    data_version = data_version or institute_data_version(data)
+    entries = collect_entries(data)
+    vectors = encoder.encode([entry.text for entry in entries])
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+    out = Path(output_dir)
+    version_dir = out / f"{time.time_ns()}-{data_version[:12]}"
+    version_dir.mkdir(parents=True)
+    with open(version_dir / VECTORS_FILE, "wb") as file:
+        np.save(file, vectors)
+    metadata = {
+        "model": getattr(encoder, "model_name", type(encoder).__name__),
+        "dimension": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+        "data_version": data_version,
+        "entries": [{"kind": entry.kind, "item": entry.item} for entry in entries],
+    }
+    (version_dir / ENTRIES_FILE).write_text(json.dumps(metadata))
+    tmp_current = out / (CURRENT_FILE + ".tmp")
+    tmp_current.write_text(version_dir.name)
+    os.replace(tmp_current, out / CURRENT_FILE)
+
+    # Mapped files of removed versions stay readable to processes that already loaded them
+    versions = sorted(path for path in out.iterdir() if path.is_dir() and path != version_dir)
+    for old in versions[:max(0, len(versions) - (KEEP_VERSIONS - 1))]:
+        shutil.rmtree(old, ignore_errors=True)
+    return version_dir
+
+
+class EmbeddingIndex:
+    """
+    Read-only semantic index over a memory-mapped vector matrix.
+
+    The matrix is opened with `mmap_mode="r"`, so every worker process that
+    loads the same index shares the OS page cache instead of holding its own
+    copy. Entries are stored grouped by kind, which lets kind-filtered
+    queries run on a zero-copy slice of the matrix.
+    """
+
+    def __init__(self, vectors: np.ndarray, metadata: Dict[str, Any], encoder=None, path: Optional[Path] = None):
+        self.vectors = vectors
+        self.metadata = metadata
+        self.path = path
+        self.data_version = metadata.get("data_version")
+        self.entries = metadata["entries"]
+        self.encoder = encoder or TransformerEncoder(metadata.get("model", DEFAULT_EMBEDDING_MODEL))
+        self.ranges: Dict[str, tuple] = {}
+        for row, entry in enumerate(self.entries):
+            start, _ = self.ranges.get(entry["kind"], (row, row))
+            self.ranges[entry["kind"]] = (start, row + 1)
+
+    @classmethod
+    def load(cls, index_dir: str, encoder=None, data_version: Optional[str] = None) -> "EmbeddingIndex":
+        """
+        Load the current version of an index
+
+        Args:
+            index_dir: Directory build_embedding_index wrote to
+            encoder: Query encoder (default: the model the index was built with)
+            data_version: Institute data version the index must have been built from (optional)
+
+        Raises:
+            ValueError: The index was built from other data than `data_version`
+        """
+        path = current_version_dir(index_dir)
+        metadata = json.loads((path / ENTRIES_FILE).read_text())
+        if data_version is not None and metadata.get("data_version") != data_version:
+            raise ValueError(
+                f"Embedding index at {index_dir} was built from data version "
+                f"{str(metadata.get('data_version'))[:8]}, not {data_version[:8]}; rebuild it"
+            )
+        vectors = np.load(path / VECTORS_FILE, mmap_mode="r")
+        return cls(vectors, metadata, encoder=encoder, path=path)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def for_version(self, data_version: str) -> Optional["EmbeddingIndex"]:
+        """This index if it was built from `data_version`, otherwise None"""
+        return self if self.data_version == data_version else None
+
+    def search_vector(self, query: np.ndarray, k: int = 3, kind: Optional[str] = None) -> List[EmbeddingHit]:
+        """Top-k entries by dot product with an already encoded query"""
+        start, end = self.ranges.get(kind, (0, 0)) if kind else (0, len(self.entries))
+        if end <= start:
+            return []
+        scores = self.vectors[start:end] @ np.asarray(query, dtype=np.float32)
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            EmbeddingHit(float(scores[i]), self.entries[start + i]["kind"], self.entries[start + i]["item"])
+            for i in top
+        ]
+
+    def search(self, query: str, k: int = 3, kind: Optional[str] = None) -> List[EmbeddingHit]:
+        """Encode the query and return the top-k most similar entries"""
+        return self.search_vector(self.encoder.encode([query])[0], k=k, kind=kind)
+
+
+class EmbeddingIndexHandle:
+    """
+    Follows an index directory across rebuilds.
+
+    Tools ask for the index matching the institute snapshot they are
+    answering from. After a hot reload the loaded index no longer matches;
+    the handle then loads whatever CURRENT names, and answers None (no
+    semantic matching) until an index for the new data has been built.
+    """
+
+    def __init__(self, index_dir: str, encoder=None):
+        self.index_dir = index_dir
+        self._index = EmbeddingIndex.load(index_dir, encoder=encoder)
+        self._encoder = self._index.encoder
+        self._lock = threading.Lock()
+
+    def for_version(self, data_version: str) -> Optional[EmbeddingIndex]:
+        index = self._index
+        if index.data_version == data_version:
+            return index
+        with self._lock:
+            try:
+                if current_version_dir(self.index_dir) != self._index.path:
+                    self._index = EmbeddingIndex.load(self.index_dir, encoder=self._encoder)
+            except (OSError, ValueError) as e:
+                print(f"Failed to reload embedding index {self.index_dir}: {str(e)}")
+            return self._index.for_version(data_version)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the semantic search index for an institute")
+    parser.add_argument("--data", default="src/data/institute_1.json", help="Institute JSON file")
+    parser.add_argument("--out", default="src/data/index/institute_1", help="Output index directory")
+    parser.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL, help="Embedding model name")
+    args = parser.parse_args()
+
+    with open(args.data, "r") as file:
+        data = json.load(file)
+    start = time.perf_counter()
+    out = build_embedding_index(data, args.out, TransformerEncoder(args.model))
+    print(f"Index with {len(collect_entries(data))} entries written to {out} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
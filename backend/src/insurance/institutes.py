@@ -0,0 +1,256 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from utils.metrics import registry as metrics_registry
+from .matcher import PatternMatcher, build_department_matcher, build_policy_matcher
+from .policy_store import PolicyStore, get_policy_store
+from .retrieval import BM25Index, build_faq_index
+
+DEFAULT_DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+# Parsed JSON plus compiled indexes take a multiple of the raw file size
+MEMORY_OVERHEAD_FACTOR = 8
+
+
+def data_version(data: Dict[str, Any]) -> str:
+    """
+    Version of parsed institute data
+
+    Snapshots and artefacts built from the data (such as the embedding index)
+    are versioned with this, so they agree whichever way the data was read.
+    """
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class InstituteDataset:
+    """
+    Immutable snapshot of one institute's data and its compiled lookup indexes.
+
+    A snapshot is never modified after construction; reloads build a new one
+    and swap the reference, so callers holding a snapshot keep a consistent
+    view for the rest of their request. When a policy store is given, the
+    policy catalogue is stored in it under the snapshot's version, next to
+    the versions that snapshots already in use read.
+    """
+
+    def __init__(
+        self,
+        institute_id: str,
+        data: Dict[str, Any],
+        version: str,
+        size_bytes: int = 0,
+        policy_store: Optional[PolicyStore] = None
+    ):
+        self.institute_id = institute_id
+        self.version = version
+        self.size_bytes = size_bytes * MEMORY_OVERHEAD_FACTOR
+        self.policy_store = policy_store
+        if policy_store is not None:
+            # Policy details live in the store; the snapshot only keeps the names to match on
+            policy_store.sync(institute_id, version, data.get("policies", []))
+            data = dict(data, policies=[
+                {"name": policy["name"]}
+                for policy in data.get("policies", [])
+                if isinstance(policy, dict) and "name" in policy
+            ])
+        self.data = data
+        self.faq_index: BM25Index = build_faq_index(data.get("faqs"))
+        self.department_matcher: PatternMatcher = build_department_matcher(self.departments)
+        self.policy_matcher: PatternMatcher = build_policy_matcher(self.policies)
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any], institute_id: str = "adhoc") -> "InstituteDataset":
+        return cls(institute_id, data, data_version(data), len(json.dumps(data)))
+
+    @classmethod
+    def from_file(cls, path: Path, institute_id: str, policy_store: Optional[PolicyStore] = None) -> "InstituteDataset":
+        raw = path.read_bytes()
+        data = json.loads(raw)
+        return cls(institute_id, data, data_version(data), len(raw), policy_store)
+
+    @property
+    def faqs(self) -> List[Dict[str, Any]]:
+        return self.data.get("faqs", [])
+
+    @property
+    def departments(self) -> List[Dict[str, Any]]:
+        return self.data.get("departments", [])
+
+    @property
+    def policies(self) -> List[Dict[str, Any]]:
+        return self.data.get("policies", [])
+
+
+class InstituteHandle:
+    """Callable that always resolves to the registry's current snapshot of an institute"""
+
+    def __init__(self, registry: "InstituteRegistry", institute_id: str):
+        self.registry = registry
+        self.institute_id = institute_id
+
+    def __call__(self) -> InstituteDataset:
+        return self.registry.get(self.institute_id)
+
+
+class InstituteRegistry:
+    """
+    Lazily loads institute datasets, shares them across agents and hot-reloads
+    them when their JSON files change.
+
+    Datasets are kept in LRU order and evicted once either `max_institutes` or
+    `max_bytes` is exceeded; an evicted dataset is simply reloaded on next use.
+    A background thread polls the files of loaded institutes and, on change,
+    compiles the new snapshot outside the registry lock before swapping it in.
+    """
+
+    def __init__(
+        self,
+        data_dir: Optional[str] = None,
+        max_institutes: int = 256,
+        max_bytes: int = 512 * 1024 * 1024,
+        poll_interval: float = 2.0,
+        policy_store: Optional[PolicyStore] = None
+    ):
+        self.data_dir = Path(data_dir) if data_dir else DEFAULT_DATA_DIR
+        self.policy_store = policy_store
+        self.max_institutes = max_institutes
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        self._datasets: "OrderedDict[str, InstituteDataset]" = OrderedDict()
+        self._stats: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def path_for(self, institute_id: str) -> Path:
+        return self.data_dir / f"institute_{institute_id}.json"
+
+    def handle(self, institute_id: str) -> InstituteHandle:
+        return InstituteHandle(self, str(institute_id))
+
+    def get(self, institute_id: str) -> InstituteDataset:
+        """Return the current snapshot, loading and compiling it on first use"""
+        institute_id = str(institute_id)
+        with self._lock:
+            dataset = self._datasets.get(institute_id)
+            if dataset is not None:
+                self._datasets.move_to_end(institute_id)
+                return dataset
+            load_lock = self._load_locks.setdefault(institute_id, threading.Lock())
+
+        # Only one thread compiles a given institute; others wait for its result
+        with load_lock:
+            with self._lock:
+                dataset = self._datasets.get(institute_id)
+            if dataset is not None:
+                return dataset
+            return self._load(institute_id)
+
+    def reload(self, institute_id: str) -> InstituteDataset:
+        """Force a reload of an institute from disk"""
+        institute_id = str(institute_id)
+        with self._lock:
+            load_lock = self._load_locks.setdefault(institute_id, threading.Lock())
+        with load_lock:
+            return self._load(institute_id)
+
+    def _load(self, institute_id: str) -> InstituteDataset:
+        path = self.path_for(institute_id)
+        if not path.exists():
+            raise FileNotFoundError(f"No data for institute {institute_id}: {path}")
+        stat = path.stat()
+        dataset = InstituteDataset.from_file(path, institute_id, self.policy_store)
+        with self._lock:
+            previous = self._datasets.get(institute_id)
+            self._datasets[institute_id] = dataset
+            self._datasets.move_to_end(institute_id)
+            self._stats[institute_id] = (stat.st_mtime_ns, stat.st_size)
+            self._evict()
+        if self.policy_store is not None:
+            # Requests that picked up the previous snapshot before the swap may still read its policies
+            keep = {dataset.version} | ({previous.version} if previous is not None else set())
+            self.policy_store.retire(institute_id, sorted(keep))
+        return dataset
+
+    def _evict(self) -> None:
+        """Drop least recently used datasets until both caps are met (lock held)"""
+        total = sum(dataset.size_bytes for dataset in self._datasets.values())
+        while len(self._datasets) > 1 and (
+            len(self._datasets) > self.max_institutes or total > self.max_bytes
+        ):
+            institute_id, dataset = self._datasets.popitem(last=False)
+            self._stats.pop(institute_id, None)
+            total -= dataset.size_bytes
+
+    def loaded(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"institute_id": i, "version": d.version, "size_bytes": d.size_bytes}
+                for i, d in self._datasets.items()
+            ]
+
+    def check_for_changes(self) -> List[str]:
+        """Reload every loaded institute whose file changed; returns the reloaded ids"""
+        with self._lock:
+            watched = dict(self._stats)
+        reloaded = []
+        for institute_id, previous in watched.items():
+            try:
+                stat = self.path_for(institute_id).stat()
+            except FileNotFoundError:
+                continue
+            if (stat.st_mtime_ns, stat.st_size) == previous:
+                continue
+            try:
+                dataset = self.reload(institute_id)
+            except Exception as e:
+                # Keep serving the previous snapshot if the new file is unreadable or half-written, or
+                # the policy store is busy; the file's stat is unchanged, so the next poll tries again
+                print(f"Failed to reload institute {institute_id}: {str(e)}")
+                continue
+            reloaded.append(institute_id)
+            print(f"Reloaded institute {institute_id} (version {dataset.version[:8]})")
+        return reloaded
+
+    def start_watching(self) -> None:
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch_loop, name="institute-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.poll_interval + 1)
+            self._watcher = None
+
+    def _watch_loop(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                # One bad cycle must not end hot reloading for the rest of the process
+                print(f"Institute watcher cycle failed: {str(e)}")
+
+
+_default_registry: Optional[InstituteRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_registry() -> InstituteRegistry:
+    """Process-wide registry shared by all agents, watching for file changes"""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = InstituteRegistry(policy_store=get_policy_store())
+            _default_registry.start_watching()
+            registry = _default_registry
+            metrics_registry.gauge(
+                "institutes_loaded", "Institute datasets held in memory", function=lambda: len(registry.loaded())
+            )
+        return _default_registry
@@ -1,8 +1,12 @@
+import asyncio
 from typing import Dict, List, Optional
-from src.llm.chain import LangChainManager
-import json
-from src.llm.config import OllamaConfig
-# from .language_utils import LanguageUtils, Language
+from llm.chain import LangChainManager
+from llm.config import OllamaConfig
+from llm.instrumentation import ReadOnlyToolGuard
+from utils.cancellation import CancellationToken
+from .institutes import InstituteDataset, InstituteRegistry, get_registry
+from .language_utils import LanguageUtils
+from .rendering import ResponseRenderer
 from .tools import (
     create_faq_tool,
     create_department_tool,
@@ -10,37 +14,98 @@ from .tools import (
     create_policy_tool,
     create_claim_tool
 )
+from .tool_cache import ToolResultCache, with_result_cache
+from .runtime import READ_ONLY_TOOLS, create_parallel_lookup_tool, with_timeouts, with_tracing
 
 class InsuranceAgent:
-    def __init__(self, config: Optional[OllamaConfig] = None):
+    def __init__(
+        self,
+        config: Optional[OllamaConfig] = None,
+        institute_id: str = "1",
+        registry: Optional[InstituteRegistry] = None,
+        semantic_index_dir: Optional[str] = None,
+        tool_cache: Optional[ToolResultCache] = None,
+        tool_timeouts: Optional[Dict[str, float]] = None
+    ):
         self.config = config or OllamaConfig(model_name="llama3.2")
-        with open("src/data/institute_1.json", "r") as file:
-            self.data = json.load(file)
-        self.faq_tool = create_faq_tool(self.data["faqs"])
-        self.department_tool = create_department_tool(self.data["departments"])
-        self.calendar_tool = create_calendar_tool()
-        self.policy_tool = create_policy_tool(self.data["policies"])
-        self.claim_tool = create_claim_tool(self.data)
-        self.executer = LangChainManager(config=self.config, tools=[
+        self.registry = registry or get_registry()
+        self.institute = self.registry.handle(institute_id)
+        # Load eagerly so a missing institute fails at construction, not mid-conversation
+        self.institute()
+        self.semantic_index = None
+        if semantic_index_dir is not None:
+            from .embedding_index import EmbeddingIndexHandle
+            self.semantic_index = EmbeddingIndexHandle(semantic_index_dir)
+        # Read-only lookups are memoized per dataset version; claims and calendar are passed through.
+        # Timeouts wrap the cache so a timed-out call is never stored; spans wrap both, so they show cache hits and timeouts.
+        (
             self.faq_tool,
             self.department_tool,
             self.calendar_tool,
             self.policy_tool,
             self.claim_tool
+        ) = [with_tracing(tool) for tool in with_timeouts(with_result_cache([
+            create_faq_tool(self.institute, semantic_index=self.semantic_index),
+            create_department_tool(self.institute, semantic_index=self.semantic_index),
+            create_calendar_tool(self.institute),
+            create_policy_tool(self.institute, semantic_index=self.semantic_index),
+            create_claim_tool(self.institute)
+        ], self.institute, tool_cache), tool_timeouts)]
+        self.lookup_tool = with_tracing(
+            create_parallel_lookup_tool([self.faq_tool, self.department_tool, self.policy_tool])
+        )
+        self.executer = LangChainManager(config=self.config, tools=[
+            self.faq_tool,
+            self.department_tool,
+            self.calendar_tool,
+            self.policy_tool,
+            self.claim_tool,
+            self.lookup_tool
         ])
+        self.language_utils = LanguageUtils()
+        self.renderer = ResponseRenderer(self.executer.llm, self.language_utils)
+
+    @property
+    def dataset(self) -> InstituteDataset:
+        """Current snapshot of this agent's institute data"""
+        return self.institute()
+
+    @property
+    def data(self) -> Dict:
+        return self.dataset.data
         
-    # async def get_multilingual_response(self, question: str, languages: List[str] = None) -> Dict:
-    #     """Get responses in multiple languages for the same question."""
-    #     if languages is None:
-    #         languages = ["en", "de", "fr", "it"]  # Default to major European languages
-            
-    #     responses = {}
-    #     for lang in languages:
-    #         response = await self.answer_insurance_questions(question, language=lang)
-    #         responses[lang] = response["answer"]
-            
-    #     return self.language_utils.format_multilingual_response(responses)
-    
-    # def get_supported_languages(self) -> List[str]:
-    #     """Get list of supported languages."""
-    #     return list(self.language_utils.supported_languages.keys()) 
\ No newline at end of file
+    def run(self, question: str) -> str:
+        """Answer one caller turn from synchronous code such as the microphone loops"""
+        return asyncio.run(self.executer.run_agent(question))
+
+    async def speculate(self, question: str, cancel_token: CancellationToken) -> str:
+        """
+        Answer a partial transcript ahead of the end of the turn
+
+        Nothing is committed: the exchange stays out of the conversation memory,
+        and the run stops before any tool that files a claim or books an
+        appointment. Pass the answer to `commit` if it is used.
+        """
+        return await self.executer.run_agent(
+            question,
+            callbacks=[ReadOnlyToolGuard(READ_ONLY_TOOLS, cancel_token)],
+            cancel_token=cancel_token,
+            commit=False
+        )
+
+    def commit(self, question: str, answer: str) -> None:
+        self.executer.commit_turn(question, answer)
+
+    async def get_multilingual_response(self, question: str, languages: List[str] = None) -> Dict:
+        """Get responses in multiple languages for the same question."""
+        if languages is None:
+            languages = ["en", "de", "fr", "it"]  # Default to major European languages
+
+        # Reason and call tools once, then only render the finished answer per language
+        answer = await self.executer.run_agent(question)
+        responses = await self.renderer.render_all(answer, languages)
+        return self.language_utils.format_multilingual_response(responses)
+
+    def get_supported_languages(self) -> List[str]:
+        """Get list of supported languages."""
+        return list(self.language_utils.supported_languages.keys())
@@ -0,0 +1,223 @@
+import math
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.metrics import pipeline_stage
+from utils.tracing import span
+from .language_utils import Language
+
+# Seed text per language: everyday phrasing plus the vocabulary of calls to an
+# insurance hotline. Profiles are derived from it once per process, so results
+# do not depend on run order or on any random state.
+SEED_TEXTS: Dict[str, str] = {
+    "en": """
+        Hello, I would like to know what my insurance policy covers. I have a question about my claim.
+        Could you please tell me when the appointment is and how much the premium will be this year?
+        My car was damaged in the storm last night and the windshield is broken. The water came through
+        the roof of the house and the kitchen is flooded. Who should I call about the deductible?
+        Thank you very much, that was very helpful. We are going on holiday with the children next week
+        and want to make sure that our luggage and health are covered while we are abroad.
+        Is there anything else I need to do? I think the doctor sent the invoice to you already.
+        Yes, that is right, and the policy number should be on the letter you received from us.
+    """,
+    "de": """
+        Guten Tag, ich möchte wissen, was meine Versicherung abdeckt. Ich habe eine Frage zu meinem Schadensfall.
+        Können Sie mir bitte sagen, wann der Termin ist und wie hoch die Prämie dieses Jahr sein wird?
+        Mein Auto wurde gestern Nacht im Sturm beschädigt und die Windschutzscheibe ist kaputt. Das Wasser kam
+        durch das Dach des Hauses und die Küche steht unter Wasser. Wen soll ich wegen des Selbstbehalts anrufen?
+        Vielen Dank, das war sehr hilfreich. Wir fahren nächste Woche mit den Kindern in den Urlaub und wollen
+        sicher sein, dass unser Gepäck und unsere Gesundheit im Ausland versichert sind.
+        Muss ich sonst noch etwas tun? Ich glaube, der Arzt hat Ihnen die Rechnung schon geschickt.
+        Ja, das stimmt, und die Policennummer sollte auf dem Brief stehen, den Sie von uns bekommen haben.
+    """,
+    "fr": """
+        Bonjour, je voudrais savoir ce que couvre mon contrat d'assurance. J'ai une question sur mon sinistre.
+        Pouvez-vous me dire quand a lieu le rendez-vous et quel sera le montant de la prime cette année?
+        Ma voiture a été endommagée par la tempête hier soir et le pare-brise est cassé. L'eau est passée par
+        le toit de la maison et la cuisine est inondée. Qui dois-je appeler au sujet de la franchise?
+        Merci beaucoup, c'était très utile. Nous partons en vacances avec les enfants la semaine prochaine et
+        nous voulons être sûrs que nos bagages et notre santé sont couverts pendant que nous sommes à l'étranger.
+        Est-ce que je dois faire autre chose? Je pense que le médecin vous a déjà envoyé la facture.
+        Oui, c'est exact, et le numéro de police devrait figurer sur la lettre que vous avez reçue de notre part.
+    """,
+    "it": """
+        Buongiorno, vorrei sapere cosa copre la mia polizza assicurativa. Ho una domanda sul mio sinistro.
+        Potrebbe dirmi quando è l'appuntamento e quanto sarà il premio quest'anno?
+        La mia macchina è stata danneggiata dalla tempesta ieri sera e il parabrezza è rotto. L'acqua è entrata
+        dal tetto della casa e la cucina è allagata. Chi devo chiamare per la franchigia?
+        Grazie mille, è stato molto utile. La settimana prossima andiamo in vacanza con i bambini e vogliamo
+        essere sicuri che i nostri bagagli e la nostra salute siano coperti mentre siamo all'estero.
+        C'è qualcos'altro che devo fare? Penso che il medico le abbia già mandato la fattura.
+        Sì, è giusto, e il numero di polizza dovrebbe essere sulla lettera che ha ricevuto da noi.
+    """,
+    "es": """
+        Hola, me gustaría saber qué cubre mi póliza de seguro. Tengo una pregunta sobre mi siniestro.
+        ¿Podría decirme cuándo es la cita y cuánto será la prima este año?
+        Mi coche quedó dañado por la tormenta anoche y el parabrisas está roto. El agua entró por el tejado
+        de la casa y la cocina está inundada. ¿A quién debo llamar por el deducible?
+        Muchas gracias, ha sido muy útil. La semana que viene nos vamos de vacaciones con los niños y queremos
+        estar seguros de que nuestro equipaje y nuestra salud están cubiertos mientras estamos en el extranjero.
+        ¿Tengo que hacer algo más? Creo que el médico ya les ha enviado la factura.
+        Sí, es correcto, y el número de póliza debería aparecer en la carta que recibió de nosotros.
+    """,
+    "nl": """
+        Hallo, ik wil graag weten wat mijn verzekering dekt. Ik heb een vraag over mijn schadeclaim.
+        Kunt u mij vertellen wanneer de afspraak is en hoe hoog de premie dit jaar zal zijn?
+        Mijn auto is gisteravond door de storm beschadigd en de voorruit is kapot. Het water kwam door het dak
+        van het huis en de keuken staat onder water. Wie moet ik bellen over het eigen risico?
+        Hartelijk dank, dat was erg nuttig. Volgende week gaan we met de kinderen op vakantie en we willen
+        zeker weten dat onze bagage en onze gezondheid in het buitenland verzekerd zijn.
+        Moet ik verder nog iets doen? Ik denk dat de dokter de rekening al naar u heeft gestuurd.
+        Ja, dat klopt, en het polisnummer zou op de brief moeten staan die u van ons hebt ontvangen.
+    """,
+}
+
+# Characters whose simplified and traditional forms differ, common in service calls
+SIMPLIFIED_TRADITIONAL_PAIRS = (
+    "们們 这這 说說 会會 为為 国國 险險 费費 单單 赔賠 风風 责責 时時 个個 发發 来來 对對 问問 过過 请請 "
+    "让讓 还還 关關 务務 额額 买買 车車 医醫 间間 么麼 吗嗎 约約 预預 办辦 号號 该該 电電 话話 没沒 钱錢"
+).split()
+SIMPLIFIED_CHARS = frozenset(pair[0] for pair in SIMPLIFIED_TRADITIONAL_PAIRS)
+TRADITIONAL_CHARS = frozenset(pair[1] for pair in SIMPLIFIED_TRADITIONAL_PAIRS)
+
+# Whisper reports ISO 639-1 codes; Chinese comes back as "zh" without the script
+WHISPER_CODES = {"zh": "zh-CN", "yue": "zh-TW"}
+
+LETTERS = re.compile(r"[^\W\d_]+")
+SUPPORTED = [language.value for language in Language]
+DEFAULT_LANGUAGE = Language.ENGLISH.value
+
+
+def _is_han(char: str) -> bool:
+    return "一" <= char <= "鿿" or "㐀" <= char <= "䶿"
+
+
+def _trigrams(text: str) -> Counter:
+    """Character trigrams of every word, padded with spaces so word starts and ends are features"""
+    counts: Counter = Counter()
+    for word in LETTERS.findall(text.lower()):
+        padded = f" {word} "
+        counts.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return counts
+
+
+class LanguageIdentifier:
+    """
+    Character-trigram naive Bayes over the languages of the Language enum.
+
+    Every trigram maps to one tuple of per-language log probabilities, so
+    scoring a voice turn costs one dict lookup per distinct trigram. Text that
+    is mostly Han characters is split into simplified and traditional Chinese
+    by counting script-specific characters.
+    """
+
+    def __init__(
+        self,
+        seed_texts: Optional[Dict[str, str]] = None,
+        smoothing: float = 0.5,
+        hint_weight: float = 4.0,
+        cache_size: int = 4096
+    ):
+        """
+        Build the profiles
+
+        Args:
+            seed_texts: Training text per language code (defaults to SEED_TEXTS)
+            smoothing: Additive smoothing for trigrams unseen in a language
+            hint_weight: Log-odds bonus for the language reported by Whisper
+            cache_size: Number of recent (text, hint) results kept
+        """
+        seed_texts = seed_texts or SEED_TEXTS
+        self.languages: List[str] = [code for code in SUPPORTED if code in seed_texts]
+        self.hint_weight = hint_weight
+        profiles = [_trigrams(seed_texts[code]) for code in self.languages]
+        vocabulary = set().union(*profiles)
+        denominators = [sum(profile.values()) + smoothing * len(vocabulary) for profile in profiles]
+        self.table: Dict[str, Tuple[float, ...]] = {
+            trigram: tuple(
+                math.log((profile[trigram] + smoothing) / denominator)
+                for profile, denominator in zip(profiles, denominators)
+            )
+            for trigram in vocabulary
+        }
+        self._identify_cached = lru_cache(maxsize=cache_size)(self._identify)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Log-likelihood of the text under each Latin-script language"""
+        totals = [0.0] * len(self.languages)
+        table = self.table
+        for trigram, count in _trigrams(text).items():
+            weights = table.get(trigram)
+            # Trigrams unseen in every language say nothing about the language
+            if weights is None:
+                continue
+            for i, weight in enumerate(weights):
+                totals[i] += count * weight
+        return dict(zip(self.languages, totals))
+
+    def _identify(self, text: str, hint: Optional[str]) -> str:
+        # Only cache misses are timed; hits cost a fraction of a microsecond
+        with pipeline_stage("language_detection").time(), span("language_detection", chars=len(text)):
+            return self._classify(text, hint)
+
+    def _classify(self, text: str, hint: Optional[str]) -> str:
+        han = sum(1 for char in text if _is_han(char))
+        letters = sum(1 for char in text if char.isalpha())
+        if letters == 0:
+            return hint or DEFAULT_LANGUAGE
+        if han * 2 >= letters:
+            simplified = sum(1 for char in text if char in SIMPLIFIED_CHARS)
+            traditional = sum(1 for char in text if char in TRADITIONAL_CHARS)
+            if simplified == traditional:
+                return hint if hint in ("zh-CN", "zh-TW") else "zh-CN"
+            return "zh-CN" if simplified > traditional else "zh-TW"
+
+        scores = self.scores(text)
+        if hint in scores:
+            scores[hint] += self.hint_weight
+        # Ties resolve by enum order, never by hash or dict iteration order of the input
+        return max(self.languages, key=lambda code: scores[code])
+
+    def identify(self, text: str, hint: Optional[str] = None) -> str:
+        """
+        Language code of the text, one of the Language enum values
+
+        Args:
+            text: Text to identify, typically one transcribed voice turn
+            hint: Language reported by Whisper (e.g. "de" or "zh"); decides short or ambiguous input
+
+        Returns:
+            Language code such as "en" or "zh-TW"
+        """
+        return self._identify_cached(text.strip(), normalize_hint(hint))
+
+    def identify_batch(self, texts: Iterable[str], hint: Optional[str] = None) -> List[str]:
+        hint = normalize_hint(hint)
+        identify = self._identify_cached
+        return [identify(text.strip(), hint) for text in texts]
+
+    def cache_info(self):
+        return self._identify_cached.cache_info()
+
+
+def normalize_hint(hint: Optional[str]) -> Optional[str]:
+    """Map a Whisper language code onto a supported code, or None when unsupported"""
+    if not hint:
+        return None
+    hint = WHISPER_CODES.get(hint, hint)
+    return hint if hint in SUPPORTED else None
+
+
+_default_identifier: Optional[LanguageIdentifier] = None
+_default_identifier_lock = threading.Lock()
+
+
+def get_language_identifier() -> LanguageIdentifier:
+    """Process-wide identifier; the profiles are built once"""
+    global _default_identifier
+    with _default_identifier_lock:
+        if _default_identifier is None:
+            _default_identifier = LanguageIdentifier()
+        return _default_identifier
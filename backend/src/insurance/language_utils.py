@@ -1,7 +1,7 @@
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from enum import Enum
 import json
-from langdetect import detect
+import re
 
 class Language(Enum):
     ENGLISH = "en"
@@ -13,6 +13,20 @@ class Language(Enum):
     CHINESE_SIMPLIFIED = "zh-CN"
     CHINESE_TRADITIONAL = "zh-TW"
 
+# A capital initial in these languages marks a noun, not the start of a sentence
+NOUN_CAPITALIZING_LANGUAGES = {"de"}
+
+def _is_han(term: str) -> bool:
+    return any("\u4e00" <= char <= "\u9fff" for char in term)
+
+def _match_case(source: str, translation: str, carry_title: bool = True) -> str:
+    """Carry the casing of the matched text over to its translation"""
+    if len(source) > 1 and source.isupper():
+        return translation.upper()
+    if carry_title and source[:1].isupper():
+        return translation[:1].upper() + translation[1:]
+    return translation
+
 class LanguageUtils:
     def __init__(self):
         self.supported_languages = {
@@ -94,6 +108,7 @@ class LanguageUtils:
                 "endorsement": "批單"
             }
         }
+        self._translation_tables: Dict[Tuple[str, str], Tuple[re.Pattern, Dict[str, str]]] = {}
 
     def get_language_prompt(self, language: str, content: str) -> str:
         """Generate a prompt in the specified language."""
@@ -108,27 +123,65 @@ class LanguageUtils:
         
         return f"{content}\n\n{language_prompts.get(language, language_prompts['en'])}"
 
+    def _translation_table(self, from_lang: str, to_lang: str) -> Tuple[re.Pattern, Dict[str, str]]:
+        """
+        Compiled matcher for one language pair, built on first use.
+
+        All source terms go into one alternation, longest first, so "policy"
+        never wins over a longer term starting with it. Terms written in a
+        script with word separators get word boundaries ("policy" does not match
+        inside "policyholder"); Han terms are matched anywhere.
+        """
+        table = self._translation_tables.get((from_lang, to_lang))
+        if table is None:
+            from_terms = self.insurance_terms[from_lang]
+            to_terms = self.insurance_terms[to_lang]
+            mapping: Dict[str, str] = {}
+            for key, term in from_terms.items():
+                if key in to_terms:
+                    mapping.setdefault(term.casefold(), to_terms[key])
+            ordered = sorted(mapping, key=len, reverse=True)
+            alternatives = []
+            spaced = [re.escape(term) for term in ordered if not _is_han(term)]
+            if spaced:
+                # One boundary check around the whole group keeps the scan cheap
+                alternatives.append(rf"(?<!\w)(?:{'|'.join(spaced)})(?!\w)")
+            alternatives.extend(re.escape(term) for term in ordered if _is_han(term))
+            # An empty alternation would match everywhere
+            pattern = re.compile("|".join(alternatives) or r"(?!)", re.IGNORECASE)
+            table = self._translation_tables[(from_lang, to_lang)] = (pattern, mapping)
+        return table
+
     def translate_insurance_terms(self, text: str, from_lang: str, to_lang: str) -> str:
-        """Translate insurance-specific terms between languages."""
+        """Translate insurance-specific terms between languages in a single pass, preserving case."""
         if from_lang not in self.insurance_terms or to_lang not in self.insurance_terms:
             return text
-            
-        from_terms = self.insurance_terms[from_lang]
-        to_terms = self.insurance_terms[to_lang]
-        
-        translated_text = text
-        for term, translation in from_terms.items():
-            if term in to_terms:
-                translated_text = translated_text.replace(term, to_terms[term])
-                
-        return translated_text
-
-    def detect_language(self, text: str) -> str:
-        """Detect the language of the input text using langdetect."""
-        try:
-            return detect(text)
-        except:
-            return "en"  # Default to English if detection fails
+
+        pattern, mapping = self._translation_table(from_lang, to_lang)
+        carry_title = from_lang not in NOUN_CAPITALIZING_LANGUAGES
+        return pattern.sub(lambda match: _match_case(match.group(0), mapping[match.group(0).casefold()], carry_title), text)
+
+    def translate_insurance_terms_batch(self, texts: Iterable[str], from_lang: str, to_lang: str) -> List[str]:
+        """Translate many texts (transcript lines, FAQ entries) with one compiled table."""
+        if from_lang not in self.insurance_terms or to_lang not in self.insurance_terms:
+            return list(texts)
+
+        pattern, mapping = self._translation_table(from_lang, to_lang)
+        carry_title = from_lang not in NOUN_CAPITALIZING_LANGUAGES
+        substitute = pattern.sub
+        replace = lambda match: _match_case(match.group(0), mapping[match.group(0).casefold()], carry_title)
+        return [substitute(replace, text) for text in texts]
+
+    def detect_language(self, text: str, hint: Optional[str] = None) -> str:
+        """Detect the language of the input text, optionally guided by Whisper's detected language."""
+        # Imported here: language_id builds on the Language enum defined in this module
+        from .language_id import get_language_identifier
+        return get_language_identifier().identify(text, hint=hint)
+
+    def detect_languages(self, texts: Iterable[str], hint: Optional[str] = None) -> List[str]:
+        """Detect the language of many texts at once."""
+        from .language_id import get_language_identifier
+        return get_language_identifier().identify_batch(texts, hint=hint)
 
     def format_multilingual_response(self, responses: Dict[str, str]) -> Dict[str, str]:
         """Format responses in multiple languages."""
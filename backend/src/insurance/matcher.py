@@ -0,0 +1,167 @@
+from collections import deque
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from .retrieval import STOPWORDS, tokenize
+
+# Words that describe almost any catalogue entry and must not drive a match on their own
+GENERIC_WORDS = frozenset("insurance handles handle provides provide offers offer services service department".split())
+
+
+class Match(NamedTuple):
+    start: int
+    end: int
+    pattern: str
+    payload: Any
+    weight: float
+
+
+class RankedMatch(NamedTuple):
+    payload: Any
+    score: float
+    matches: List[Match]
+
+
+class PatternMatcher:
+    """
+    Aho–Corasick automaton over a fixed set of phrases.
+
+    All patterns are found in a single left-to-right pass over the lowercased
+    query, independent of how many patterns were compiled. Matches can be
+    restricted to whole words so that "car" does not fire inside "scar".
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any, float]], word_boundaries: bool = True):
+        """
+        Compile the automaton
+
+        Args:
+            patterns: (phrase, payload, weight) triples; the same phrase may map to
+                several payloads
+            word_boundaries: Only report matches that start and end on word boundaries
+        """
+        self.word_boundaries = word_boundaries
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, Any, float]]] = [[]]
+        self.size = 0
+
+        for phrase, payload, weight in patterns:
+            phrase = phrase.strip().lower()
+            if not phrase:
+                continue
+            state = 0
+            for char in phrase:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append((phrase, payload, weight))
+            self.size += 1
+
+        # Breadth-first construction of failure links; outputs are merged along them
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[Match]:
+        """Every pattern occurrence in text, in order of their end position"""
+        text = text.lower()
+        goto, fail, output = self._goto, self._fail, self._output
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            end = index + 1
+            for phrase, payload, weight in output[state]:
+                start = end - len(phrase)
+                if self.word_boundaries and (
+                    (start > 0 and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum())
+                ):
+                    continue
+                matches.append(Match(start, end, phrase, payload, weight))
+        return matches
+
+    def rank(self, text: str, limit: Optional[int] = None) -> List[RankedMatch]:
+        """
+        Group matches by payload and rank them
+
+        Each distinct phrase contributes weight * length, so longer and more
+        specific phrases (a full policy name) outrank generic keywords.
+        """
+        grouped: Dict[int, RankedMatch] = {}
+        seen = set()
+        for match in self.find_all(text):
+            key = id(match.payload)
+            entry = grouped.get(key)
+            if entry is None:
+                entry = grouped[key] = RankedMatch(match.payload, 0.0, [])
+            entry.matches.append(match)
+            if (key, match.pattern) in seen:
+                continue
+            seen.add((key, match.pattern))
+            grouped[key] = entry._replace(score=entry.score + match.weight * len(match.pattern))
+
+        ranked = sorted(grouped.values(), key=lambda entry: entry.score, reverse=True)
+        return ranked[:limit] if limit is not None else ranked
+
+
+def _distinctive_keywords(texts: List[str]) -> List[List[str]]:
+    """Per text, the words (raw and plural-folded) that appear in no other text"""
+    per_text = []
+    for text in texts:
+        words = set()
+        for raw in text.lower().split():
+            raw = raw.strip(".,;:!?()\"'")
+            if len(raw) < 3 or raw in STOPWORDS or raw in GENERIC_WORDS:
+                continue
+            words.add(raw)
+            words.update(tokenize(raw))
+        per_text.append(words)
+    counts: Dict[str, int] = {}
+    for words in per_text:
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1
+    unique_only = len(per_text) > 1
+    return [sorted(w for w in words if not unique_only or counts[w] == 1) for words in per_text]
+
+
+def build_department_matcher(departments: List[Dict[str, Any]]) -> PatternMatcher:
+    """Match department names, staff names, specializations and their distinctive keywords"""
+    entries = [d for d in departments if isinstance(d, dict) and "name" in d and "specialization" in d]
+    keywords = _distinctive_keywords([d["specialization"] for d in entries])
+    patterns = []
+    for dept, dept_keywords in zip(entries, keywords):
+        patterns.append((dept["name"], dept, 3.0))
+        patterns.append((dept["specialization"], dept, 2.0))
+        for person in dept.get("personnel", []):
+            patterns.append((person, dept, 2.0))
+        for keyword in dept_keywords:
+            patterns.append((keyword, dept, 1.0))
+    return PatternMatcher(patterns)
+
+
+def build_policy_matcher(policies: List[Dict[str, Any]]) -> PatternMatcher:
+    """Match full policy names and the words that distinguish one policy name from the others"""
+    entries = [p for p in policies if isinstance(p, dict) and "name" in p]
+    keywords = _distinctive_keywords([p["name"] for p in entries])
+    patterns = []
+    for policy, policy_keywords in zip(entries, keywords):
+        patterns.append((policy["name"], policy, 3.0))
+        for keyword in policy_keywords:
+            patterns.append((keyword, policy, 1.0))
+    return PatternMatcher(patterns)
@@ -0,0 +1,221 @@
+import hashlib
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence
+from .retrieval import STOPWORDS, TOKEN_PATTERN
+
+DEFAULT_DATABASE = os.path.join(tempfile.gettempdir(), "concierge_policies.db")
+
+# Policy rows are immutable and shared by every data version that contains
+# them; policy_versions lists which rows make up each version
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS policy_contents (
+    id INTEGER PRIMARY KEY,
+    institute_id TEXT NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    details TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    UNIQUE (institute_id, content_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_policy_contents_name ON policy_contents (institute_id, name);
+CREATE TABLE IF NOT EXISTS policy_versions (
+    institute_id TEXT NOT NULL,
+    version TEXT NOT NULL,
+    policy_id INTEGER NOT NULL,
+    PRIMARY KEY (institute_id, version, policy_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_policy_versions_policy ON policy_versions (policy_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS policy_contents_fts USING fts5(
+    name, details, content='policy_contents', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS policy_contents_ai AFTER INSERT ON policy_contents BEGIN
+    INSERT INTO policy_contents_fts(rowid, name, details) VALUES (new.id, new.name, new.details);
+END;
+CREATE TRIGGER IF NOT EXISTS policy_contents_ad AFTER DELETE ON policy_contents BEGIN
+    INSERT INTO policy_contents_fts(policy_contents_fts, rowid, name, details) VALUES ('delete', old.id, old.name, old.details);
+END;
+"""
+
+# Statements are kept as module constants so sqlite3's per-connection statement
+# cache always hits and every query runs as an already prepared statement
+SELECT_HASHES = "SELECT content_hash, id FROM policy_contents WHERE institute_id = ?"
+INSERT_POLICY = "INSERT INTO policy_contents (institute_id, name, details, content_hash) VALUES (?, ?, ?, ?)"
+LINK_POLICY = "INSERT OR IGNORE INTO policy_versions (institute_id, version, policy_id) VALUES (?, ?, ?)"
+IN_VERSION = """
+EXISTS (SELECT 1 FROM policy_versions v WHERE v.institute_id = p.institute_id AND v.version = ? AND v.policy_id = p.id)
+"""
+SELECT_BY_NAME = "SELECT p.name, p.details FROM policy_contents p WHERE p.institute_id = ? AND p.name = ? AND" + IN_VERSION
+SEARCH_POLICIES = """
+SELECT p.name, p.details, bm25(policy_contents_fts, 4.0, 1.0) AS rank
+FROM policy_contents_fts JOIN policy_contents p ON p.id = policy_contents_fts.rowid
+WHERE policy_contents_fts MATCH ? AND p.institute_id = ? AND""" + IN_VERSION + """
+ORDER BY rank LIMIT ?
+"""
+COUNT_VERSION = "SELECT COUNT(*) FROM policy_versions WHERE institute_id = ? AND version = ?"
+UNLINK_VERSIONS = "DELETE FROM policy_versions WHERE institute_id = ? AND version NOT IN ({})"
+DELETE_UNLINKED = """
+DELETE FROM policy_contents
+WHERE institute_id = ? AND NOT EXISTS (SELECT 1 FROM policy_versions v WHERE v.policy_id = policy_contents.id)
+"""
+
+
+class PolicyHit(NamedTuple):
+    name: str
+    details: str
+    score: float
+
+
+def _content_hash(policy: Dict[str, Any]) -> str:
+    return hashlib.sha1(f"{policy['name']}\x00{policy['details']}".encode("utf-8")).hexdigest()
+
+
+def _fts_query(text: str) -> str:
+    """OR together the quoted query words so user input can never break FTS5 syntax"""
+    words = {word for word in TOKEN_PATTERN.findall(text.lower()) if len(word) > 2 and word not in STOPWORDS}
+    return " OR ".join(f'"{word}"' for word in sorted(words))
+
+
+@contextmanager
+def _immediate(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    Run a write transaction that holds the database write lock from its first statement
+
+    Connections in every process wait on busy_timeout for the lock instead of
+    deciding what to write from a read that another writer has since made stale.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared by all agents in the process"""
+
+    def __init__(self, database: str, size: int = 4):
+        self.database = database
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(size):
+            self._pool.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.database, check_same_thread=False, cached_statements=64)
+        # Set first so switching to WAL also waits for other processes opening the database
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+class PolicyStore:
+    """
+    Policy catalogue backed by SQLite with an FTS5 full-text index.
+
+    Every institute data version has its own catalogue. Readers pass the
+    version of the snapshot they hold, so a reload that stores a new version
+    never changes what requests on the old snapshot see. Rows are shared
+    between versions: syncing a new version only writes the policies whose
+    name/details hash changed, so reloading a catalogue with thousands of
+    variants costs as much as the edit rather than the catalogue.
+    """
+
+    def __init__(self, database: str = DEFAULT_DATABASE, pool_size: int = 4):
+        self.pool = ConnectionPool(database, pool_size)
+        self._write_lock = threading.Lock()
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def sync(self, institute_id: str, version: str, policies: Sequence[Dict[str, Any]]) -> int:
+        """
+        Store the catalogue of one data version of an institute
+
+        Other versions are left as they are; `retire` removes them once no
+        snapshot reads them any more.
+
+        Returns:
+            Number of policy rows written (policies no stored version had)
+        """
+        wanted = {
+            policy["name"].lower(): policy
+            for policy in policies
+            if isinstance(policy, dict) and "name" in policy and "details" in policy
+        }
+        with self._write_lock, self.pool.connection() as conn, _immediate(conn):
+            # The hashes are read under the write lock so another process can neither insert
+            # the same row nor retire one we are about to link before we commit
+            stored = dict(conn.execute(SELECT_HASHES, (institute_id,)))
+            written = 0
+            for policy in wanted.values():
+                digest = _content_hash(policy)
+                if digest not in stored:
+                    cursor = conn.execute(INSERT_POLICY, (institute_id, policy["name"], policy["details"], digest))
+                    stored[digest] = cursor.lastrowid
+                    written += 1
+                conn.execute(LINK_POLICY, (institute_id, version, stored[digest]))
+        return written
+
+    def retire(self, institute_id: str, keep: Sequence[str]) -> int:
+        """
+        Drop every version of an institute except `keep`, and the policy rows no kept version uses
+
+        Returns:
+            Number of policy rows deleted
+        """
+        keep = list(keep)
+        with self._write_lock, self.pool.connection() as conn, _immediate(conn):
+            conn.execute(UNLINK_VERSIONS.format(", ".join("?" * len(keep))), (institute_id, *keep))
+            return conn.execute(DELETE_UNLINKED, (institute_id,)).rowcount
+
+    def get(self, institute_id: str, version: str, name: str) -> Optional[Dict[str, str]]:
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_BY_NAME, (institute_id, name, version)).fetchone()
+        return {"name": row[0], "details": row[1]} if row else None
+
+    def search(self, institute_id: str, version: str, query: str, k: int = 3) -> List[PolicyHit]:
+        """Full-text search over policy names (weighted) and details, best first"""
+        match = _fts_query(query)
+        if not match:
+            return []
+        with self.pool.connection() as conn:
+            rows = conn.execute(SEARCH_POLICIES, (match, institute_id, version, k)).fetchall()
+        # bm25() is lower-is-better; flip it so callers see higher-is-better scores
+        return [PolicyHit(name, details, -rank) for name, details, rank in rows]
+
+    def count(self, institute_id: str, version: str) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute(COUNT_VERSION, (institute_id, version)).fetchone()[0]
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+_default_store: Optional[PolicyStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_policy_store() -> PolicyStore:
+    """Process-wide policy store; all agents share its connection pool"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = PolicyStore(os.environ.get("POLICY_STORE_PATH", DEFAULT_DATABASE))
+        return _default_store
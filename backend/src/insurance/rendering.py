@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from .language_utils import LanguageUtils
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "de": "German",
+    "fr": "French",
+    "it": "Italian",
+    "es": "Spanish",
+    "nl": "Dutch",
+    "zh-CN": "Simplified Chinese",
+    "zh-TW": "Traditional Chinese",
+}
+
+TRANSLATION_PROMPT = """Translate the following answer from an insurance company's assistant into {language}.
+Keep names, numbers, dates, policy numbers and booking or claim IDs unchanged.{glossary}
+Reply with the translation only.
+
+{answer}"""
+
+
+class ResponseRenderer:
+    """
+    Renders one finished answer into other languages.
+
+    Rendering is a single plain LLM call per language (no agent loop, no
+    tools), the calls for different languages run concurrently, and results
+    are cached per (answer, language). Concurrent requests for the same
+    rendering share one call. Term-table fallbacks after a failed call are
+    returned but not cached, so the next request tries the LLM again.
+    """
+
+    def __init__(self, llm, language_utils: Optional[LanguageUtils] = None, cache_size: int = 1024):
+        self.llm = llm
+        self.language_utils = language_utils or LanguageUtils()
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._pending: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    def _glossary(self, source: str, target: str) -> str:
+        """Insurance terms the translation should use, from the LanguageUtils tables"""
+        terms = self.language_utils.insurance_terms
+        if source not in terms or target not in terms:
+            return ""
+        pairs = [f"{terms[source][key]} -> {terms[target][key]}" for key in terms[source] if key in terms[target]]
+        return "\nUse these insurance terms: " + "; ".join(pairs) + "."
+
+    async def _translate(self, answer: str, source: str, target: str) -> Tuple[str, bool]:
+        """The rendering, and whether it is a full translation worth caching"""
+        prompt = TRANSLATION_PROMPT.format(
+            language=LANGUAGE_NAMES.get(target, target),
+            glossary=self._glossary(source, target),
+            answer=answer
+        )
+        try:
+            translated = await self.llm.ainvoke(self.language_utils.get_language_prompt(target, prompt))
+            return translated.strip(), True
+        except Exception as e:
+            # Degrade to the term tables rather than failing the whole multilingual response
+            print(f"Translation to {target} failed, using term translation: {str(e)}")
+            return self.language_utils.translate_insurance_terms(answer, source, target), False
+
+    async def render(self, answer: str, language: str, source: Optional[str] = None) -> str:
+        source = source or self.language_utils.detect_language(answer)
+        if language == source:
+            return answer
+        key = (hashlib.sha1(answer.encode("utf-8")).hexdigest(), language)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.ensure_future(self._translate(answer, source, language))
+            # The creating request stores the result once, even if it is cancelled before the task ends
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # A waiter that is cancelled (caller hung up) must not cancel the call the others share
+        rendered, _ = await asyncio.shield(task)
+        return rendered
+
+    def _finish(self, key: Tuple[str, str], task: asyncio.Task) -> None:
+        self._pending.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        rendered, complete = task.result()
+        if complete:
+            self._cache[key] = rendered
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def render_all(self, answer: str, languages: Iterable[str]) -> Dict[str, str]:
+        """Render the answer into every language concurrently"""
+        languages = list(dict.fromkeys(languages))
+        source = self.language_utils.detect_language(answer)
+        rendered = await asyncio.gather(*(self.render(answer, language, source) for language in languages))
+        return dict(zip(languages, rendered))
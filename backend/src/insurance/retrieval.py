@@ -0,0 +1,158 @@
+import heapq
+import math
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can could do does for from have how i if in is it its
+me my of on or our please should so than that the their them then there these they
+this to was we were what when where which who will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on word characters, drop stopwords and fold simple plurals"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class SearchHit(NamedTuple):
+    doc_id: int
+    score: float
+    document: Dict[str, Any]
+
+
+class BM25Index:
+    """
+    Inverted index with BM25 ranking, compiled once from a list of documents.
+
+    Per-posting BM25 weights are precomputed at build time, so a query is just a
+    sum over the postings of its terms. Posting lists of very common terms
+    (document frequency above `common_df_ratio`) are never walked in full: they
+    only re-score candidates found through rarer terms, or seed a bounded number
+    of candidates from their highest-impact postings. This keeps queries
+    sub-millisecond on catalogues with tens of thousands of entries.
+    """
+
+    def __init__(
+        self,
+        documents: Sequence[Dict[str, Any]],
+        fields: Dict[str, float],
+        k1: float = 1.2,
+        b: float = 0.75,
+        common_df_ratio: float = 0.01,
+        candidate_limit: int = 256
+    ):
+        """
+        Build the index
+
+        Args:
+            documents: Documents to index (e.g. FAQ entries)
+            fields: Mapping of field name to weight; a weight of 2 counts each
+                token of that field twice
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalisation
+            common_df_ratio: Fraction of documents above which a term is only
+                used to re-rank candidates instead of generating them
+            candidate_limit: Maximum number of candidates seeded from common terms
+        """
+        self.documents = list(documents)
+        self.fields = fields
+        self.k1 = k1
+        self.b = b
+        self.candidate_limit = candidate_limit
+
+        term_freqs: List[Dict[str, float]] = []
+        doc_lengths: List[float] = []
+        for document in self.documents:
+            frequencies: Dict[str, float] = {}
+            length = 0.0
+            for field, weight in fields.items():
+                value = document.get(field) if isinstance(document, dict) else None
+                if not isinstance(value, str):
+                    continue
+                for token in tokenize(value):
+                    frequencies[token] = frequencies.get(token, 0.0) + weight
+                    length += weight
+            term_freqs.append(frequencies)
+            doc_lengths.append(length)
+
+        count = len(self.documents)
+        average_length = (sum(doc_lengths) / count) if count else 0.0
+        document_frequency: Dict[str, int] = {}
+        for frequencies in term_freqs:
+            for term in frequencies:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+
+        self.idf: Dict[str, float] = {
+            term: math.log(1 + (count - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+        self.postings: Dict[str, Dict[int, float]] = {term: {} for term in document_frequency}
+        for doc_id, (frequencies, length) in enumerate(zip(term_freqs, doc_lengths)):
+            norm = k1 * (1 - b + b * length / average_length) if average_length else k1
+            for term, tf in frequencies.items():
+                self.postings[term][doc_id] = self.idf[term] * tf * (k1 + 1) / (tf + norm)
+
+        self.common_df = max(64, int(count * common_df_ratio))
+        # Impact-ordered heads of the common terms' posting lists
+        self.impact_heads: Dict[str, List[int]] = {
+            term: heapq.nlargest(candidate_limit, postings, key=postings.__getitem__)
+            for term, postings in self.postings.items()
+            if len(postings) > self.common_df
+        }
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(self, query: str, k: int = 3, min_score: float = 0.0) -> List[SearchHit]:
+        """Return the top-k documents for the query, best first"""
+        terms = [term for term in set(tokenize(query)) if term in self.postings]
+        if not terms:
+            return []
+        rare = [term for term in terms if len(self.postings[term]) <= self.common_df]
+        common = [term for term in terms if len(self.postings[term]) > self.common_df]
+
+        scores: Dict[int, float] = {}
+        for term in rare:
+            for doc_id, weight in self.postings[term].items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+
+        if len(scores) < self.candidate_limit:
+            common.sort(key=lambda term: self.idf[term], reverse=True)
+            for term in common:
+                for doc_id in self.impact_heads[term]:
+                    if len(scores) >= self.candidate_limit:
+                        break
+                    scores.setdefault(doc_id, 0.0)
+
+        for term in common:
+            postings = self.postings[term]
+            for doc_id in scores:
+                weight = postings.get(doc_id)
+                if weight is not None:
+                    scores[doc_id] += weight
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [
+            SearchHit(doc_id, score, self.documents[doc_id])
+            for doc_id, score in best
+            if score >= min_score
+        ]
+
+
+def build_faq_index(faqs: Optional[Iterable[Dict[str, Any]]]) -> BM25Index:
+    """Index FAQ entries over their questions (weighted) and answers"""
+    entries = [
+        faq for faq in (faqs or [])
+        if isinstance(faq, dict) and "question" in faq and "answer" in faq
+    ]
+    return BM25Index(entries, fields={"question": 2.0, "answer": 1.0})
@@ -0,0 +1,155 @@
+import asyncio
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+from langchain.tools import Tool
+from utils.tracing import span
+from .tool_cache import CACHEABLE_TOOLS
+
+# Seconds a single tool call may take before the agent gets a timeout observation
+DEFAULT_TOOL_TIMEOUTS: Dict[str, float] = {
+    "faq_tool": 5.0,
+    "department_tool": 5.0,
+    "policy_tool": 5.0,
+    "calendar_tool": 10.0,
+    "claim_tool": 15.0,
+}
+DEFAULT_TIMEOUT = 10.0
+
+# Tools a speculative agent run may call: lookups only, never claims or bookings
+READ_ONLY_TOOLS = frozenset(CACHEABLE_TOOLS | {"parallel_lookup_tool"})
+
+# Side-effecting calls in flight, including those finishing in the background after a timeout
+_pending: "set[asyncio.Task]" = set()
+
+LOOKUP_SEPARATOR = re.compile(r"\s*(?:\n|\||;)\s*")
+
+
+def timeout_reply(name: str, seconds: float) -> str:
+    return f"The {name} did not respond within {seconds:g} seconds. Please try again in a moment."
+
+
+def pending_reply(name: str, seconds: float) -> str:
+    return (
+        f"The {name} is still processing this request after {seconds:g} seconds and will finish on its own. "
+        "Do not submit it again; check its status in a moment."
+    )
+
+
+def with_timeout(tool: Tool, seconds: float, shield: bool = False) -> Tool:
+    """
+    Bound the async path of a tool; a timeout becomes an observation instead of an error
+
+    Lookups are cancelled at the timeout. Tools with side effects (`shield`)
+    keep running, since a filing or booking may already be committed: the
+    agent is told it is still in progress rather than to retry it.
+    """
+    coroutine = tool.coroutine or (lambda query: asyncio.to_thread(tool.func, query))
+
+    async def run(query: str) -> str:
+        if not shield:
+            try:
+                return await asyncio.wait_for(coroutine(query), timeout=seconds)
+            except asyncio.TimeoutError:
+                return timeout_reply(tool.name, seconds)
+        # Held until done, so the call survives both the timeout and a cancelled agent run
+        task = asyncio.ensure_future(coroutine(query))
+        _pending.add(task)
+        task.add_done_callback(_pending.discard)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=seconds)
+        except asyncio.TimeoutError:
+            return pending_reply(tool.name, seconds)
+
+    return Tool.from_function(
+        name=tool.name,
+        func=tool.func,
+        coroutine=run,
+        description=tool.description
+    )
+
+
+def with_timeouts(tools: Iterable[Tool], timeouts: Optional[Dict[str, float]] = None) -> List[Tool]:
+    timeouts = {**DEFAULT_TOOL_TIMEOUTS, **(timeouts or {})}
+    return [
+        with_timeout(tool, timeouts.get(tool.name, DEFAULT_TIMEOUT), shield=tool.name not in READ_ONLY_TOOLS)
+        for tool in tools
+    ]
+
+
+def with_tracing(tool: Tool) -> Tool:
+    """Record a span per call in the current trace; no-op for requests that are not sampled"""
+    coroutine = tool.coroutine or (lambda query: asyncio.to_thread(tool.func, query))
+    name = f"tool.{tool.name}"
+
+    def run_sync(query: str) -> str:
+        with span(name, input=query):
+            return tool.func(query)
+
+    async def run(query: str) -> str:
+        with span(name, input=query):
+            return await coroutine(query)
+
+    return Tool.from_function(
+        name=tool.name,
+        func=run_sync,
+        coroutine=run,
+        description=tool.description
+    )
+
+
+def parse_lookups(text: str) -> List[Tuple[str, str]]:
+    """Split "policy_tool: Car Insurance | department_tool: claims" into (tool, query) pairs"""
+    lookups = []
+    for part in LOOKUP_SEPARATOR.split(text.strip().strip("\"'")):
+        name, sep, query = part.partition(":")
+        if sep and query.strip():
+            lookups.append((name.strip().lower(), query.strip()))
+    return lookups
+
+
+async def run_concurrently(tools: Dict[str, Tool], lookups: List[Tuple[str, str]]) -> List[str]:
+    """Run independent tool calls at the same time; results keep the order of `lookups`"""
+    async def call(name: str, query: str) -> str:
+        tool = tools.get(name)
+        if tool is None:
+            return f"Unknown tool {name}. Available: {', '.join(sorted(tools))}."
+        if tool.coroutine is not None:
+            return await tool.coroutine(query)
+        return await asyncio.to_thread(tool.func, query)
+
+    return list(await asyncio.gather(*(call(name, query) for name, query in lookups)))
+
+
+def create_parallel_lookup_tool(tools: Iterable[Tool]) -> Tool:
+    """
+    One agent action that fans out to several read-only tools.
+
+    The ReAct agent issues one action per LLM step, so independent lookups
+    (policy details and the department to contact, say) would otherwise each
+    cost a round trip and run back to back. Only side-effect free tools are
+    reachable here; claims and bookings still go through their own tools.
+    """
+    lookup_tools = {tool.name: tool for tool in tools if tool.name in CACHEABLE_TOOLS}
+
+    def format_results(lookups: List[Tuple[str, str]], results: List[str]) -> str:
+        if not lookups:
+            return "Please give one or more lookups as 'tool_name: query', separated by '|'."
+        return "\n".join(f"[{name}: {query}]\n{result}" for (name, query), result in zip(lookups, results))
+
+    async def lookup(text: str) -> str:
+        lookups = parse_lookups(text)
+        return format_results(lookups, await run_concurrently(lookup_tools, lookups))
+
+    def lookup_sync(text: str) -> str:
+        lookups = parse_lookups(text)
+        return format_results(lookups, asyncio.run(run_concurrently(lookup_tools, lookups)))
+
+    return Tool.from_function(
+        name="parallel_lookup_tool",
+        func=lookup_sync,
+        coroutine=lookup,
+        description=(
+            "Runs several independent lookups at once. Input: 'tool_name: query' pairs separated by '|', "
+            f"e.g. 'policy_tool: Car Insurance | department_tool: claims'. Tools: {', '.join(sorted(lookup_tools))}."
+        )
+    )
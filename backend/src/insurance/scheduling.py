@@ -0,0 +1,311 @@
+"""
+Appointment booking for calendar_tool
+
+Bookings live in process memory only. Every API worker process has its own
+engine, so running several workers lets two callers book the same slot, and
+a restart forgets every booking ID handed out. Run a single worker or move
+the bookings to a shared store before relying on them across processes.
+"""
+import bisect
+import re
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Weekday (Monday=0) -> (opening hour, closing hour), matching the institute's published hours
+DEFAULT_OPENING_HOURS: Dict[int, Tuple[int, int]] = {0: (9, 18), 1: (9, 18), 2: (9, 18), 3: (9, 18), 4: (9, 18), 5: (10, 14)}
+
+
+class SlotUnavailableError(Exception):
+    """Raised when a requested slot overlaps an existing booking or lies outside opening hours"""
+
+
+@dataclass(frozen=True)
+class Appointment:
+    booking_id: str
+    staff: str
+    start: datetime
+    end: datetime
+    customer: Optional[str] = None
+
+
+class StaffCalendar:
+    """
+    Bookings of one staff member, kept sorted by start time.
+
+    Bookings never overlap, so sorted starts imply sorted ends and a conflict
+    check only has to look at the neighbours of the bisection point. Search is
+    O(log n); inserts shift a contiguous array, which stays cheap for
+    thousands of appointments per day.
+    """
+
+    def __init__(self, staff: str):
+        self.staff = staff
+        self.lock = threading.RLock()
+        self._starts: List[datetime] = []
+        self._appointments: List[Appointment] = []
+
+    def __len__(self) -> int:
+        return len(self._appointments)
+
+    def conflict(self, start: datetime, end: datetime, ignore: Optional[str] = None) -> Optional[Appointment]:
+        """The booking overlapping [start, end), if any"""
+        index = bisect.bisect_left(self._starts, end)
+        # Only the last booking starting before `end` can overlap; skip the ignored one
+        while index > 0:
+            index -= 1
+            candidate = self._appointments[index]
+            if candidate.booking_id == ignore:
+                continue
+            return candidate if candidate.end > start else None
+        return None
+
+    def add(self, appointment: Appointment) -> None:
+        index = bisect.bisect_left(self._starts, appointment.start)
+        self._starts.insert(index, appointment.start)
+        self._appointments.insert(index, appointment)
+
+    def remove(self, appointment: Appointment) -> None:
+        index = bisect.bisect_left(self._starts, appointment.start)
+        while index < len(self._appointments) and self._starts[index] == appointment.start:
+            if self._appointments[index].booking_id == appointment.booking_id:
+                break
+            index += 1
+        else:
+            raise KeyError(f"{appointment.booking_id} is not in the calendar of {self.staff}")
+        del self._starts[index]
+        del self._appointments[index]
+
+    def next_gap(self, after: datetime, duration: timedelta) -> datetime:
+        """Earliest start >= after where `duration` fits between bookings (ignores opening hours)"""
+        candidate = after
+        index = bisect.bisect_left(self._starts, candidate)
+        if index > 0 and self._appointments[index - 1].end > candidate:
+            candidate = self._appointments[index - 1].end
+        while index < len(self._appointments) and self._appointments[index].start < candidate + duration:
+            candidate = max(candidate, self._appointments[index].end)
+            index += 1
+        return candidate
+
+    def between(self, start: datetime, end: datetime) -> List[Appointment]:
+        lo = bisect.bisect_left(self._starts, start)
+        hi = bisect.bisect_left(self._starts, end)
+        return self._appointments[lo:hi]
+
+
+class BookingEngine:
+    """Appointment scheduling across the personnel of an institute's departments"""
+
+    def __init__(
+        self,
+        staff: Iterable[str] = (),
+        opening_hours: Optional[Dict[int, Tuple[int, int]]] = None,
+        slot_minutes: int = 30
+    ):
+        self.opening_hours = opening_hours or DEFAULT_OPENING_HOURS
+        self.slot = timedelta(minutes=slot_minutes)
+        self.calendars: Dict[str, StaffCalendar] = {}
+        self.bookings: Dict[str, Appointment] = {}
+        self._lock = threading.Lock()
+        self.ensure_staff(staff)
+
+    def ensure_staff(self, staff: Iterable[str]) -> None:
+        """Add calendars for new staff members; existing calendars and bookings are kept"""
+        with self._lock:
+            for name in staff:
+                self.calendars.setdefault(name, StaffCalendar(name))
+
+    def _calendar(self, staff: str) -> StaffCalendar:
+        calendar = self.calendars.get(staff)
+        if calendar is None:
+            raise KeyError(f"Unknown staff member: {staff}")
+        return calendar
+
+    def _day_bounds(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """Opening and closing time of a day, or None when closed"""
+        hours = self.opening_hours.get(day.weekday())
+        if hours is None:
+            return None
+        midnight = datetime.combine(day, time())
+        return midnight + timedelta(hours=hours[0]), midnight + timedelta(hours=hours[1])
+
+    def _within_opening_hours(self, start: datetime, end: datetime) -> bool:
+        bounds = self._day_bounds(start.date())
+        return bounds is not None and bounds[0] <= start and end <= bounds[1]
+
+    def _align(self, moment: datetime) -> datetime:
+        """Round up to the next slot boundary"""
+        slot_seconds = int(self.slot.total_seconds())
+        midnight = datetime.combine(moment.date(), time())
+        offset = (moment - midnight).total_seconds()
+        return midnight + timedelta(seconds=-(-offset // slot_seconds) * slot_seconds)
+
+    def book(self, staff: str, start: datetime, duration: Optional[timedelta] = None, customer: Optional[str] = None) -> Appointment:
+        duration = duration or self.slot
+        end = start + duration
+        if not self._within_opening_hours(start, end):
+            raise SlotUnavailableError(f"{start:%A %H:%M} is outside opening hours")
+        calendar = self._calendar(staff)
+        with calendar.lock:
+            clash = calendar.conflict(start, end)
+            if clash is not None:
+                raise SlotUnavailableError(f"{staff} is already booked from {clash.start:%H:%M} to {clash.end:%H:%M}")
+            appointment = Appointment(f"APT-{uuid.uuid4().hex[:8].upper()}", staff, start, end, customer)
+            calendar.add(appointment)
+        with self._lock:
+            self.bookings[appointment.booking_id] = appointment
+        return appointment
+
+    def next_free_slot(self, staff: str, after: datetime, duration: Optional[timedelta] = None, horizon_days: int = 60) -> Optional[datetime]:
+        """Earliest slot-aligned start within opening hours where staff is free"""
+        duration = duration or self.slot
+        calendar = self._calendar(staff)
+        candidate = self._align(after)
+        limit = after + timedelta(days=horizon_days)
+        with calendar.lock:
+            while candidate < limit:
+                bounds = self._day_bounds(candidate.date())
+                if bounds is None:
+                    candidate = datetime.combine(candidate.date() + timedelta(days=1), time())
+                    continue
+                opening, closing = bounds
+                candidate = max(candidate, opening)
+                candidate = self._align(calendar.next_gap(candidate, duration))
+                if candidate + duration <= closing and calendar.conflict(candidate, candidate + duration) is None:
+                    return candidate
+                if candidate + duration > closing:
+                    candidate = datetime.combine(candidate.date() + timedelta(days=1), time())
+        return None
+
+    def book_next_available(
+        self,
+        staff_options: Iterable[str],
+        after: datetime,
+        duration: Optional[timedelta] = None,
+        customer: Optional[str] = None
+    ) -> Appointment:
+        """Book the earliest free slot among the given staff members"""
+        duration = duration or self.slot
+        staff_options = list(staff_options)
+        for _ in range(3):
+            options = [(self.next_free_slot(staff, after, duration), staff) for staff in staff_options]
+            options = sorted((slot, staff) for slot, staff in options if slot is not None)
+            if not options:
+                break
+            slot, staff = options[0]
+            try:
+                return self.book(staff, slot, duration, customer)
+            except SlotUnavailableError:
+                # Lost a race with a concurrent booking; search again
+                continue
+        raise SlotUnavailableError("No free slot is available in the coming weeks")
+
+    def reschedule(self, booking_id: str, new_start: datetime) -> Appointment:
+        """Move a booking atomically; the old slot is kept if the new one is taken"""
+        with self._lock:
+            current = self.bookings.get(booking_id)
+        if current is None:
+            raise KeyError(f"Unknown booking: {booking_id}")
+        new_end = new_start + (current.end - current.start)
+        if not self._within_opening_hours(new_start, new_end):
+            raise SlotUnavailableError(f"{new_start:%A %H:%M} is outside opening hours")
+        calendar = self._calendar(current.staff)
+        with calendar.lock:
+            # Every change to a booking holds its calendar's lock, so re-read it: a concurrent
+            # cancel or reschedule may have replaced the copy read above
+            with self._lock:
+                current = self.bookings.get(booking_id)
+            if current is None:
+                raise KeyError(f"Unknown booking: {booking_id}")
+            clash = calendar.conflict(new_start, new_end, ignore=booking_id)
+            if clash is not None:
+                raise SlotUnavailableError(f"{current.staff} is already booked from {clash.start:%H:%M} to {clash.end:%H:%M}")
+            moved = Appointment(booking_id, current.staff, new_start, new_end, current.customer)
+            calendar.remove(current)
+            calendar.add(moved)
+            with self._lock:
+                self.bookings[booking_id] = moved
+        return moved
+
+    def cancel(self, booking_id: str) -> Appointment:
+        with self._lock:
+            appointment = self.bookings.get(booking_id)
+        if appointment is None:
+            raise KeyError(f"Unknown booking: {booking_id}")
+        calendar = self._calendar(appointment.staff)
+        with calendar.lock:
+            with self._lock:
+                appointment = self.bookings.pop(booking_id, None)
+            if appointment is None:
+                raise KeyError(f"Unknown booking: {booking_id}")
+            calendar.remove(appointment)
+        return appointment
+
+
+BOOKING_ID_PATTERN = re.compile(r"\bAPT-[0-9A-F]{8}\b", re.IGNORECASE)
+ISO_DATE_PATTERN = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+TIME_PATTERN = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\b", re.IGNORECASE)
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def parse_when(text: str, now: datetime) -> Optional[datetime]:
+    """
+    Extract a requested appointment time from free text
+
+    Understands ISO dates, "today", "tomorrow" and weekday names, combined with
+    times such as "14:00", "2pm" or "9:30 am". Returns None when no time is given.
+
+    Raises:
+        ValueError: An ISO date that does not exist, such as 2026-02-30
+    """
+    lowered = text.lower()
+    day: Optional[date] = None
+    iso = ISO_DATE_PATTERN.search(lowered)
+    if iso:
+        try:
+            day = date(int(iso.group(1)), int(iso.group(2)), int(iso.group(3)))
+        except ValueError:
+            raise ValueError(f"{iso.group(0)} is not a valid date")
+        lowered = lowered[:iso.start()] + lowered[iso.end():]
+    elif "tomorrow" in lowered:
+        day = now.date() + timedelta(days=1)
+    elif "today" in lowered:
+        day = now.date()
+    else:
+        for index, name in enumerate(WEEKDAYS):
+            if name in lowered:
+                day = now.date() + timedelta(days=(index - now.weekday()) % 7 or 7)
+                break
+
+    clock: Optional[time] = None
+    for match in TIME_PATTERN.finditer(lowered):
+        hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+        if match.group(2) is None and meridiem is None:
+            continue
+        if meridiem:
+            hour = hour % 12 + (12 if meridiem.lower() == "pm" else 0)
+        if hour < 24 and minute < 60:
+            clock = time(hour, minute)
+            break
+
+    if clock is None:
+        return None
+    moment = datetime.combine(day or now.date(), clock)
+    if day is None and moment <= now:
+        moment += timedelta(days=1)
+    return moment
+
+
+_engines: Dict[str, BookingEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_booking_engine(institute_id: str) -> BookingEngine:
+    """Process-wide booking engine per institute, shared by all agents"""
+    with _engines_lock:
+        engine = _engines.get(institute_id)
+        if engine is None:
+            engine = _engines[institute_id] = BookingEngine()
+        return engine
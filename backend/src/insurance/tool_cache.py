@@ -0,0 +1,119 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from langchain.tools import Tool
+from utils.metrics import registry as metrics_registry
+from .institutes import InstituteDataset
+
+# Tools whose results depend only on their input and the institute data
+CACHEABLE_TOOLS = frozenset({"faq_tool", "department_tool", "policy_tool"})
+
+_MISSING = object()
+
+
+def normalize_tool_input(text: str) -> str:
+    """Canonical cache key for a tool input: case, spacing, quotes and end punctuation are ignored"""
+    return " ".join(text.lower().split()).strip("\"'`").strip(" .?!")
+
+
+class ToolResultCache:
+    """
+    Bounded LRU of tool results.
+
+    Every entry remembers the dataset version it was computed from; a lookup
+    under a different version is a miss and drops the stale entry, so a hot
+    reload of the institute data invalidates results without a flush.
+    """
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return _MISSING
+
+    def put(self, key: Hashable, version: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def cached_tool(tool: Tool, current: Callable[[], InstituteDataset], cache: ToolResultCache) -> Tool:
+    """Wrap a read-only tool so repeated inputs are answered from the cache"""
+    func = tool.func
+    coroutine = tool.coroutine
+
+    def lookup(query: str) -> Tuple[Hashable, str, Any]:
+        dataset = current()
+        key = (tool.name, dataset.institute_id, normalize_tool_input(query))
+        return key, dataset.version, cache.get(key, dataset.version)
+
+    def run(query: str) -> str:
+        key, version, result = lookup(query)
+        if result is _MISSING:
+            result = func(query)
+            cache.put(key, version, result)
+        return result
+
+    async def arun(query: str) -> str:
+        key, version, result = lookup(query)
+        if result is _MISSING:
+            result = await coroutine(query) if coroutine else await asyncio.to_thread(func, query)
+            cache.put(key, version, result)
+        return result
+
+    return Tool.from_function(
+        name=tool.name,
+        func=run,
+        coroutine=arun,
+        description=tool.description
+    )
+
+
+def with_result_cache(
+    tools: Iterable[Tool],
+    current: Callable[[], InstituteDataset],
+    cache: Optional[ToolResultCache] = None
+) -> List[Tool]:
+    """Cache the read-only tools; side-effecting ones (claims, calendar) are passed through"""
+    cache = cache or get_tool_cache()
+    return [cached_tool(tool, current, cache) if tool.name in CACHEABLE_TOOLS else tool for tool in tools]
+
+
+_default_cache: Optional[ToolResultCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolResultCache:
+    """Process-wide tool cache, so sessions share results"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ToolResultCache()
+            cache = _default_cache
+            metrics_registry.gauge(
+                "tool_cache_entries", "Tool results held in the shared cache", function=lambda: len(cache._entries)
+            )
+        return _default_cache
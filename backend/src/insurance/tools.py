@@ -1,85 +1,304 @@
 from langchain.tools import Tool
-from typing import Dict, Any
+import asyncio
+import re
+import uuid
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional, Union
+from .claims import ClaimIntake, filing_key, get_claim_intake
+from .institutes import InstituteDataset
+from .scheduling import BOOKING_ID_PATTERN, BookingEngine, SlotUnavailableError, get_booking_engine, parse_when
+
+CLAIM_ID_PATTERN = re.compile(r"\bCLM-[0-9A-F]{10}\b", re.IGNORECASE)
+POLICY_NUMBER_PATTERN = re.compile(r"\b(?!CLM-)([A-Z]{1,4}-?\d{4,12})\b", re.IGNORECASE)
+
+# Tools accept raw institute data, a compiled snapshot, or a callable (e.g. an
+# InstituteHandle) that returns the current snapshot on every call
+DataSource = Union[Dict[str, Any], InstituteDataset, Callable[[], InstituteDataset]]
+
+def _dataset_provider(source: DataSource) -> Callable[[], InstituteDataset]:
+    if isinstance(source, InstituteDataset):
+        return lambda: source
+    if callable(source):
+        return source
+    dataset = InstituteDataset.from_data(source if isinstance(source, dict) else {})
+    return lambda: dataset
+
+def _in_thread(func: Callable[[str], str]) -> Callable:
+    """Async variant of a blocking lookup (index search, SQLite), run off the event loop"""
+    async def run(query: str) -> str:
+        return await asyncio.to_thread(func, query)
+    return run
+
+def _semantic_match(semantic_index, dataset: InstituteDataset, query: str, kind: str, min_similarity: float):
+    """Best embedding match of one kind, if the index was built from this snapshot's data and is close enough"""
+    if semantic_index is None:
+        return None
+    index = semantic_index.for_version(dataset.version)
+    if index is None:
+        return None
+    hits = index.search(query, k=1, kind=kind)
+    return hits[0].item if hits and hits[0].score >= min_similarity else None
+
+def create_faq_tool(
+    data: DataSource,
+    top_k: int = 3,
+    min_score: float = 1.0,
+    semantic_index=None,
+    min_similarity: float = 0.5
+) -> Tool:
+    current = _dataset_provider(data)
 
-def create_faq_tool(data: Dict[str, Any]) -> Tool:
     def answer_faq(query: str) -> str:
-        if not isinstance(data, dict) or "faqs" not in data:
+        dataset = current()
+        faq_index = dataset.faq_index
+        if not len(faq_index):
             return "I apologize, but I cannot access the FAQ database at the moment."
-            
-        for faq in data["faqs"]:
-            if isinstance(faq, dict) and "question" in faq and "answer" in faq:
-                if faq["question"].lower() in query.lower():
-                    return faq["answer"]
+
+        hits = faq_index.search(query, k=top_k, min_score=min_score)
+        if hits:
+            # Best match first; the runners-up let the agent answer questions that span two FAQs
+            return "\n".join(
+                f"{hit.document['question']} {hit.document['answer']} (relevance {hit.score:.2f})" for hit in hits
+            )
+        faq = _semantic_match(semantic_index, dataset, query, "faq", min_similarity)
+        if faq is not None:
+            return faq["answer"]
         return "I couldn't find a specific answer to your question. Would you like me to connect you with a human agent?"
 
     return Tool.from_function(
         name="faq_tool",
         func=answer_faq,
+        coroutine=_in_thread(answer_faq),
         description="Answers frequently asked questions about the insurance company."
     )
 
-def create_department_tool(data: Dict[str, Any]) -> Tool:
+def create_department_tool(
+    data: DataSource,
+    max_results: int = 3,
+    semantic_index=None,
+    min_similarity: float = 0.5
+) -> Tool:
+    current = _dataset_provider(data)
+
+    def describe(dept: Dict[str, Any]) -> str:
+        people = ", ".join(dept.get("personnel", []))
+        return f"{dept['name']} department specializes in {dept['specialization']}. Available personnel: {people}."
+
     def find_department(query: str) -> str:
-        if not isinstance(data, dict) or "departments" not in data:
+        dataset = current()
+        if not dataset.departments:
             return "I apologize, but I cannot access the department database at the moment."
-            
-        for dept in data["departments"]:
-            if isinstance(dept, dict) and "name" in dept and "specialization" in dept:
-                if dept["name"].lower() in query.lower() or dept["specialization"].lower() in query.lower():
-                    people = ", ".join(dept.get("personnel", []))
-                    return f"{dept['name']} department specializes in {dept['specialization']}. Available personnel: {people}."
+
+        ranked = dataset.department_matcher.rank(query, limit=max_results)
+        if ranked:
+            return "\n".join(describe(entry.payload) for entry in ranked)
+        # No department named in the query: match on what it is about instead ("who handles payouts")
+        dept = _semantic_match(semantic_index, dataset, query, "department", min_similarity)
+        if dept is not None:
+            return describe(dept)
         return "I couldn't find information about that department. Would you like me to connect you with a human agent?"
 
     return Tool.from_function(
         name="department_tool",
         func=find_department,
+        coroutine=_in_thread(find_department),
         description="Finds information about departments and staff availability."
     )
 
-def create_calendar_tool() -> Tool:
+def create_calendar_tool(data: Optional[DataSource] = None, engine: Optional[BookingEngine] = None) -> Tool:
+    current = _dataset_provider(data or {})
+
     def manage_calendar(query: str) -> str:
-        if "book" in query.lower():
-            return "Appointment successfully booked. You will receive a confirmation email shortly."
-        elif "reschedule" in query.lower():
-            return "Your appointment has been rescheduled. Please check your calendar for the updated time."
+        dataset = current()
+        calendar = engine or get_booking_engine(dataset.institute_id)
+        staff_by_name = {
+            person: dept
+            for dept in dataset.departments if isinstance(dept, dict)
+            for person in dept.get("personnel", [])
+        }
+        calendar.ensure_staff(staff_by_name)
+        lowered = query.lower()
+        now = datetime.now().replace(second=0, microsecond=0)
+        try:
+            when = parse_when(query, now)
+        except ValueError as e:
+            return f"I couldn't use that date: {str(e)}. Please give the date as YYYY-MM-DD, for example {now:%Y-%m-%d}."
+
+        if "reschedule" in lowered:
+            booking = BOOKING_ID_PATTERN.search(query)
+            if not booking or when is None:
+                return "To reschedule, please give me your booking ID (APT-...) and the new date and time."
+            try:
+                moved = calendar.reschedule(booking.group(0).upper(), when)
+            except KeyError:
+                return f"I couldn't find a booking with the ID {booking.group(0).upper()}."
+            except SlotUnavailableError as e:
+                return f"I couldn't move your appointment: {str(e)}."
+            return f"Your appointment {moved.booking_id} with {moved.staff} has been moved to {moved.start:%A %d %B at %H:%M}."
+        elif "cancel" in lowered:
+            booking = BOOKING_ID_PATTERN.search(query)
+            if not booking:
+                return "To cancel, please give me your booking ID (APT-...)."
+            try:
+                cancelled = calendar.cancel(booking.group(0).upper())
+            except KeyError:
+                return f"I couldn't find a booking with the ID {booking.group(0).upper()}."
+            return f"Your appointment {cancelled.booking_id} on {cancelled.start:%A %d %B at %H:%M} has been cancelled."
+        elif "book" in lowered:
+            requested = [person for person in staff_by_name if person.lower() in lowered]
+            if not requested:
+                departments = [entry.payload for entry in dataset.department_matcher.rank(query, limit=1)]
+                requested = [p for dept in departments for p in dept.get("personnel", [])] or list(staff_by_name)
+            if not requested:
+                return "There are no staff members available for appointments at the moment."
+            try:
+                if when is not None and len(requested) == 1:
+                    appointment = calendar.book(requested[0], when)
+                else:
+                    appointment = calendar.book_next_available(requested, when or now)
+            except SlotUnavailableError as e:
+                alternative = calendar.next_free_slot(requested[0], when or now)
+                suggestion = f" The next free slot with {requested[0]} is {alternative:%A %d %B at %H:%M}." if alternative else ""
+                return f"That time is not available: {str(e)}.{suggestion}"
+            return (
+                f"Appointment successfully booked with {appointment.staff} on {appointment.start:%A %d %B at %H:%M}. "
+                f"Your booking ID is {appointment.booking_id}. You will receive a confirmation email shortly."
+            )
         else:
-            return "I can help you book or reschedule appointments. Would you like to do either of those?"
+            return "I can help you book, reschedule or cancel appointments. Would you like to do any of those?"
 
     return Tool.from_function(
         name="calendar_tool",
         func=manage_calendar,
-        description="Handles booking or rescheduling calendar appointments."
+        coroutine=_in_thread(manage_calendar),
+        description="Handles booking, rescheduling or cancelling calendar appointments with staff. Include the staff member, date and time, or booking ID when known."
     )
 
-def create_policy_tool(data: Dict[str, Any]) -> Tool:
+def create_policy_tool(
+    data: DataSource,
+    max_results: int = 3,
+    semantic_index=None,
+    min_similarity: float = 0.5
+) -> Tool:
+    current = _dataset_provider(data)
+
     def get_policy_info(query: str) -> str:
-        if not isinstance(data, dict) or "policies" not in data:
+        dataset = current()
+        if not dataset.policies:
             return "I apologize, but I cannot access the policy database at the moment."
-            
-        for policy in data["policies"]:
-            if isinstance(policy, dict) and "name" in policy and "details" in policy:
-                if policy["name"].lower() in query.lower():
-                    return f"{policy['name']}: {policy['details']}"
+
+        ranked = dataset.policy_matcher.rank(query, limit=max_results)
+        store = dataset.policy_store
+        if ranked:
+            lines = []
+            for entry in ranked:
+                policy = store.get(dataset.institute_id, dataset.version, entry.payload["name"]) if store else entry.payload
+                # Only a snapshot two reloads behind the current one can have lost its rows
+                if policy and "details" in policy:
+                    lines.append(f"{policy['name']}: {policy['details']}")
+            if lines:
+                return "\n".join(lines)
+        if store is not None:
+            hits = store.search(dataset.institute_id, dataset.version, query, k=max_results)
+            if hits:
+                return "\n".join(f"{hit.name}: {hit.details}" for hit in hits)
+        policy = _semantic_match(semantic_index, dataset, query, "policy", min_similarity)
+        if policy is not None:
+            return f"{policy['name']}: {policy.get('details', '')}"
         return "I couldn't find information about that policy. Would you like me to connect you with a human agent?"
 
     return Tool.from_function(
         name="policy_tool",
         func=get_policy_info,
+        coroutine=_in_thread(get_policy_info),
         description="Provides detailed information about a particular insurance policy."
     )
 
-def create_claim_tool(data: Dict[str, Any]) -> Tool:
+def _claim_status_reply(claim_id: str, claim) -> str:
+    if claim is None:
+        return f"I couldn't find a claim with the ID {claim_id.upper()}."
+    return f"Claim {claim.claim_id} is currently {claim.status}."
+
+def _policy_claims_reply(policy_number: str, found) -> str:
+    if not found:
+        return f"There are no claims on record for policy {policy_number}."
+    return "; ".join(f"Claim {c.claim_id} is currently {c.status}" for c in found) + "."
+
+def _filed_reply(claim) -> str:
+    return f"Your claim has been filed successfully under claim ID {claim.claim_id}. You will receive a confirmation email shortly."
+
+def _not_filed_reply(error: Exception) -> str:
+    return f"I'm sorry, your claim could not be recorded right now ({str(error)}). Please try again shortly."
+
+CLAIM_ID_MISSING = "Please provide your claim ID or policy number so I can look up the status of your claim."
+CLAIM_HELP = "I can help you file a new claim or check the status of an existing claim. What would you like to do?"
+
+def create_claim_tool(
+    data: DataSource,
+    intake: Optional[ClaimIntake] = None,
+    conversation_id: Optional[str] = None
+) -> Tool:
+    # One tool per agent, i.e. per conversation: only this caller's repeated filings are retries
+    conversation_id = conversation_id or uuid.uuid4().hex
+
+    def parse(query: str):
+        policy_match = POLICY_NUMBER_PATTERN.search(query)
+        claim_match = CLAIM_ID_PATTERN.search(query)
+        return (
+            policy_match.group(1).upper() if policy_match else None,
+            claim_match.group(0) if claim_match else None
+        )
+
     def process_claim(query: str) -> str:
-        if "file" in query.lower():
-            return "Your claim has been filed successfully. You will receive a confirmation email shortly."
-        elif "status" in query.lower():
-            return "Your claim is currently under review. You will be notified once a decision has been made."
+        claims = intake or get_claim_intake()
+        policy_number, claim_id = parse(query)
+
+        if "status" in query.lower():
+            if claim_id:
+                return _claim_status_reply(claim_id, claims.get(claim_id))
+            if policy_number:
+                return _policy_claims_reply(policy_number, claims.by_policy(policy_number))
+            return CLAIM_ID_MISSING
+        elif "file" in query.lower():
+            try:
+                claim = claims.submit_sync(
+                    description=query,
+                    policy_number=policy_number,
+                    filing_key=filing_key(conversation_id, policy_number, query)
+                )
+            except Exception as e:
+                return _not_filed_reply(e)
+            return _filed_reply(claim)
+        else:
+            return CLAIM_HELP
+
+    async def aprocess_claim(query: str) -> str:
+        """Waits on the group commit without holding a thread"""
+        claims = intake or get_claim_intake()
+        policy_number, claim_id = parse(query)
+
+        if "status" in query.lower():
+            if claim_id:
+                return _claim_status_reply(claim_id, await claims.status(claim_id))
+            if policy_number:
+                return _policy_claims_reply(policy_number, await asyncio.to_thread(claims.by_policy, policy_number))
+            return CLAIM_ID_MISSING
+        elif "file" in query.lower():
+            try:
+                claim = await claims.submit(
+                    description=query,
+                    policy_number=policy_number,
+                    filing_key=filing_key(conversation_id, policy_number, query)
+                )
+            except Exception as e:
+                return _not_filed_reply(e)
+            return _filed_reply(claim)
         else:
-            return "I can help you file a new claim or check the status of an existing claim. What would you like to do?"
+            return CLAIM_HELP
 
     return Tool.from_function(
         name="claim_tool",
         func=process_claim,
-        description="Handles filing or checking the status of insurance claims."
+        coroutine=aprocess_claim,
+        description="Handles filing or checking the status of insurance claims. Include the policy number or claim ID when known."
     )
-
@@ -3,18 +3,49 @@ from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.agents import AgentExecutor, initialize_agent, AgentType
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from typing import List, Optional
+from typing import Any, Awaitable, Dict, List, Optional
+import asyncio
 import aiohttp
 from .config import OllamaConfig
 from .tools import get_default_tools
+from .instrumentation import AgentInstrumentationHandler, AgentRunStats, CancellationHandler, TracingHandler
+from utils.cancellation import DEADLINE_EXCEEDED, CancellationToken, OperationCancelled, record_savings
+from utils.tracing import current_trace, span
 from langchain.memory import ConversationBufferWindowMemory
 
+async def _until_cancelled(run: Awaitable[Dict[str, Any]], token: CancellationToken) -> Dict[str, Any]:
+    """
+    Await an agent run, abandoning it as soon as the token is cancelled or its deadline passes
+
+    Cancelling the task closes the in-flight Ollama request, which frees the
+    model slot instead of generating to the end.
+    """
+    task = asyncio.ensure_future(run)
+    loop = asyncio.get_running_loop()
+    # Session tokens outlive many runs; each run unregisters its callback when it ends
+    remove_callback = token.add_callback(lambda: loop.call_soon_threadsafe(task.cancel))
+    try:
+        await asyncio.wait({task}, timeout=token.remaining())
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        remove_callback()
+    if not task.done():
+        token.cancel(DEADLINE_EXCEEDED)
+        task.cancel()
+        raise OperationCancelled(token.reason)
+    if task.cancelled():
+        raise OperationCancelled(token.reason)
+    return task.result()
+
 class LangChainManager:
     def __init__(self, config: Optional[OllamaConfig] = None, buffer_size: int = 5, tools: Optional[List] = None):
         self.config = config or OllamaConfig()
         self.llm = self._setup_llm()
         self.conversation_buffer = ConversationBufferWindowMemory(k=buffer_size, return_messages=True)
         self.agent = self._setup_agent(tools)
+        self.last_run_stats: Optional[AgentRunStats] = None
     
     def _setup_llm(self) -> Ollama:
         """Initialize the Ollama LLM with configuration"""
@@ -35,24 +66,55 @@ class LangChainManager:
             tools=tools,
             llm=self.llm,
             agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-            memory=self.conversation_buffer,
+            # Memory is written by commit_turn, so speculative runs leave no trace in it
             verbose=True,
             handle_parsing_errors=True,
             max_iterations=3
         )
     
-    async def run_agent(self, input_text: str) -> str:
-        """Run the agent with the given input text"""
+    async def run_agent(
+        self,
+        input_text: str,
+        callbacks: Optional[List] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        commit: bool = True
+    ) -> str:
+        """
+        Run the agent with the given input text, forwarding run events to any extra callbacks
+
+        With commit=False the exchange is not added to the conversation memory;
+        call `commit_turn` once the answer is actually used.
+        """
         if not input_text.strip():
             raise ValueError("Input text cannot be empty")
             
+        instrumentation = AgentInstrumentationHandler()
+        handlers = [instrumentation, *(callbacks or [])]
+        if cancel_token is not None:
+            handlers.append(CancellationHandler(cancel_token))
+        if current_trace() is not None:
+            handlers.append(TracingHandler())
         try:
-            result = await self.agent.ainvoke({
-                "input": input_text
-            })
+            with span("agent.run", input_chars=len(input_text)) as current:
+                run = self.agent.ainvoke({"input": input_text}, config={"callbacks": handlers})
+                result = await (_until_cancelled(run, cancel_token) if cancel_token is not None else run)
+                if current is not None:
+                    current.set_attribute("iterations", instrumentation.stats.iterations)
+            if commit:
+                self.commit_turn(input_text, result["output"])
             return result["output"]
+        except OperationCancelled:
+            skipped = max(0, self.agent.max_iterations - instrumentation.stats.iterations)
+            record_savings("agent", cancel_token, iterations=skipped)
+            raise
         except Exception as e:
             raise Exception(f"Error running agent: {str(e)}")
+        finally:
+            self.last_run_stats = instrumentation.finish()
+
+    def commit_turn(self, input_text: str, output: str) -> None:
+        """Record a finished exchange in the conversation memory"""
+        self.conversation_buffer.save_context({"input": input_text}, {"output": output})
 
     async def get_available_models(self) -> List[str]:
         """Get list of available Ollama models"""
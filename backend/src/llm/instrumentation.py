@@ -0,0 +1,318 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+from langchain.callbacks.base import AsyncCallbackHandler
+from langchain.schema import AgentAction, LLMResult
+from utils.cancellation import CancellationToken
+from utils.metrics import (
+    COUNT_BUCKETS,
+    LATENCY_BUCKETS,
+    RATE_BUCKETS,
+    TOKEN_BUCKETS,
+    MetricsRegistry,
+    registry as default_registry
+)
+from utils.tracing import Span, start_span
+from .speculation import SIDE_EFFECT
+
+# Name of the pseudo-tool the AgentExecutor uses to feed parsing errors back to the LLM
+PARSING_ERROR_TOOL = "_Exception"
+
+
+@dataclass
+class LLMCallStats:
+    """Timings for a single LLM call inside an agent run"""
+    started_at: float
+    first_token_at: Optional[float] = None
+    ended_at: Optional[float] = None
+    streamed_tokens: int = 0
+    prompt_tokens: Optional[int] = None
+    generated_tokens: Optional[int] = None
+    tokens_per_second: Optional[float] = None
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+
+@dataclass
+class ToolCallStats:
+    """Timing for a single tool invocation"""
+    name: str
+    started_at: float
+    ended_at: Optional[float] = None
+    error: bool = False
+
+    @property
+    def latency(self) -> Optional[float]:
+        if self.ended_at is None:
+            return None
+        return self.ended_at - self.started_at
+
+
+@dataclass
+class AgentRunStats:
+    """Everything recorded for one agent run"""
+    started_at: float = field(default_factory=time.perf_counter)
+    ended_at: Optional[float] = None
+    llm_calls: List[LLMCallStats] = field(default_factory=list)
+    tool_calls: List[ToolCallStats] = field(default_factory=list)
+    iterations: int = 0
+    parsing_errors: int = 0
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.ended_at is None:
+            return None
+        return self.ended_at - self.started_at
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Time from the start of the run until the first generated token"""
+        for call in self.llm_calls:
+            if call.first_token_at is not None:
+                return call.first_token_at - self.started_at
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "duration": self.duration,
+            "time_to_first_token": self.time_to_first_token,
+            "iterations": self.iterations,
+            "parsing_errors": self.parsing_errors,
+            "llm_calls": [
+                {
+                    "time_to_first_token": call.time_to_first_token,
+                    "prompt_tokens": call.prompt_tokens,
+                    "generated_tokens": call.generated_tokens,
+                    "tokens_per_second": call.tokens_per_second,
+                }
+                for call in self.llm_calls
+            ],
+            "tool_calls": [
+                {"name": call.name, "latency": call.latency, "error": call.error}
+                for call in self.tool_calls
+            ],
+        }
+
+
+class AgentInstrumentationHandler(AsyncCallbackHandler):
+    """
+    Callback handler that records latency and token statistics for one agent run.
+
+    A fresh handler is created per run and passed through the run config; the
+    results are published to the metrics registry when `finish` is called.
+    """
+
+    def __init__(self, metrics: Optional[MetricsRegistry] = None):
+        self.metrics = metrics or default_registry
+        self.stats = AgentRunStats()
+        self._llm_calls: Dict[UUID, LLMCallStats] = {}
+        self._tool_calls: Dict[UUID, ToolCallStats] = {}
+
+    async def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        call = LLMCallStats(started_at=time.perf_counter())
+        self._llm_calls[run_id] = call
+        self.stats.llm_calls.append(call)
+
+    async def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        call = self._llm_calls.get(run_id)
+        if call is None:
+            return
+        if call.first_token_at is None:
+            call.first_token_at = time.perf_counter()
+        call.streamed_tokens += 1
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        call = self._llm_calls.pop(run_id, None)
+        if call is None:
+            return
+        call.ended_at = time.perf_counter()
+
+        # Ollama reports exact token counts and durations (ns) on the final chunk
+        info: Dict[str, Any] = {}
+        if response.generations and response.generations[0]:
+            info = response.generations[0][0].generation_info or {}
+        call.prompt_tokens = info.get("prompt_eval_count")
+        call.generated_tokens = info.get("eval_count", call.streamed_tokens or None)
+
+        eval_duration = info.get("eval_duration")
+        if call.generated_tokens and eval_duration:
+            call.tokens_per_second = call.generated_tokens / (eval_duration / 1e9)
+        elif call.streamed_tokens > 1 and call.first_token_at is not None:
+            elapsed = call.ended_at - call.first_token_at
+            if elapsed > 0:
+                call.tokens_per_second = (call.streamed_tokens - 1) / elapsed
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        call = self._llm_calls.pop(run_id, None)
+        if call is not None:
+            call.ended_at = time.perf_counter()
+
+    async def on_agent_action(self, action: AgentAction, *, run_id: UUID, **kwargs: Any) -> None:
+        self.stats.iterations += 1
+        if action.tool == PARSING_ERROR_TOOL:
+            self.stats.parsing_errors += 1
+
+    async def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        name = serialized.get("name", "unknown")
+        if name == PARSING_ERROR_TOOL:
+            return
+        call = ToolCallStats(name=name, started_at=time.perf_counter())
+        self._tool_calls[run_id] = call
+        self.stats.tool_calls.append(call)
+
+    async def on_tool_end(self, output: str, *, run_id: UUID, **kwargs: Any) -> None:
+        call = self._tool_calls.pop(run_id, None)
+        if call is not None:
+            call.ended_at = time.perf_counter()
+
+    async def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        call = self._tool_calls.pop(run_id, None)
+        if call is not None:
+            call.ended_at = time.perf_counter()
+            call.error = True
+
+    def finish(self) -> AgentRunStats:
+        """Close the run and publish its statistics to the metrics registry"""
+        stats = self.stats
+        stats.ended_at = time.perf_counter()
+        metrics = self.metrics
+
+        metrics.histogram(
+            "llm_agent_run_seconds", "Wall time of a complete agent run"
+        ).observe(stats.duration)
+        metrics.histogram(
+            "llm_agent_iterations", "ReAct iterations per agent run", COUNT_BUCKETS
+        ).observe(stats.iterations)
+        metrics.histogram(
+            "llm_agent_parsing_errors", "Output parsing retries per agent run", COUNT_BUCKETS
+        ).observe(stats.parsing_errors)
+        if stats.time_to_first_token is not None:
+            metrics.histogram(
+                "llm_agent_time_to_first_token_seconds", "Time from run start to the first generated token"
+            ).observe(stats.time_to_first_token)
+
+        for call in stats.llm_calls:
+            if call.ended_at is not None:
+                metrics.histogram(
+                    "llm_generation_seconds", "Wall time of each LLM call, prompt evaluation included"
+                ).observe(call.ended_at - call.started_at)
+            if call.time_to_first_token is not None:
+                metrics.histogram(
+                    "llm_time_to_first_token_seconds", "Time to first token per LLM call"
+                ).observe(call.time_to_first_token)
+            if call.tokens_per_second is not None:
+                metrics.histogram(
+                    "llm_generation_tokens_per_second", "Generation throughput per LLM call", RATE_BUCKETS
+                ).observe(call.tokens_per_second)
+            if call.prompt_tokens is not None:
+                metrics.histogram(
+                    "llm_prompt_eval_tokens", "Prompt tokens evaluated per LLM call", TOKEN_BUCKETS
+                ).observe(call.prompt_tokens)
+            if call.generated_tokens is not None:
+                metrics.histogram(
+                    "llm_generated_tokens", "Tokens generated per LLM call", TOKEN_BUCKETS
+                ).observe(call.generated_tokens)
+
+        for call in stats.tool_calls:
+            if call.latency is not None:
+                metrics.histogram(
+                    "llm_tool_latency_seconds", "Latency of each tool invocation", LATENCY_BUCKETS,
+                    labels={"tool": call.name}
+                ).observe(call.latency)
+
+        return stats
+
+
+class CancellationHandler(AsyncCallbackHandler):
+    """
+    Stops an agent run at the next LLM token, agent step or tool call once its token is cancelled.
+
+    `raise_error` makes LangChain propagate the OperationCancelled raised here
+    instead of logging and swallowing it.
+    """
+
+    raise_error = True
+
+    def __init__(self, token: CancellationToken):
+        self.token = token
+
+    async def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any) -> None:
+        self.token.raise_if_cancelled()
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.token.raise_if_cancelled()
+
+    async def on_agent_action(self, action: AgentAction, **kwargs: Any) -> None:
+        self.token.raise_if_cancelled()
+
+    async def on_tool_start(self, serialized: Dict[str, Any], input_str: str, **kwargs: Any) -> None:
+        self.token.raise_if_cancelled()
+
+
+class ReadOnlyToolGuard(AsyncCallbackHandler):
+    """
+    Stops a speculative agent run before it calls a tool that changes state.
+
+    The run's token is cancelled with the reason SIDE_EFFECT, so the caller can
+    tell a blocked speculation from an abandoned one and rerun the turn for real.
+    """
+
+    raise_error = True
+
+    def __init__(self, read_only_tools: Iterable[str], token: CancellationToken):
+        # The pseudo-tools LangChain uses for parse errors and unknown tool names only return a message
+        self.allowed = set(read_only_tools) | {PARSING_ERROR_TOOL, "invalid_tool"}
+        self.token = token
+
+    async def on_tool_start(self, serialized: Dict[str, Any], input_str: str, **kwargs: Any) -> None:
+        if serialized.get("name") not in self.allowed:
+            self.token.cancel(SIDE_EFFECT)
+        self.token.raise_if_cancelled()
+
+
+class TracingHandler(AsyncCallbackHandler):
+    """
+    Records a span for every LLM call of an agent run in the current trace.
+
+    LLM calls start and end in separate callbacks, so their spans are opened
+    and finished explicitly instead of wrapping a with-block.
+    """
+
+    def __init__(self):
+        self._spans: Dict[UUID, Span] = {}
+
+    async def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        span = start_span("llm.generate", prompt_chars=sum(len(prompt) for prompt in prompts))
+        if span is not None:
+            self._spans[run_id] = span
+
+    async def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.get(run_id)
+        if span is not None and "time_to_first_token_ms" not in span.attributes:
+            span.set_attribute("time_to_first_token_ms", (span.trace.now_ns() - span.start_ns) / 1e6)
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        if response.generations and response.generations[0]:
+            info = response.generations[0][0].generation_info or {}
+            span.set_attribute("prompt_tokens", info.get("prompt_eval_count"))
+            span.set_attribute("generated_tokens", info.get("eval_count"))
+        span.finish()
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.finish(error)
+
+    async def on_agent_action(self, action: AgentAction, *, run_id: UUID, **kwargs: Any) -> None:
+        # Zero-length marker so the chosen tool shows up on the timeline between LLM calls
+        span = start_span("agent.action", tool=action.tool)
+        if span is not None:
+            span.finish()
@@ -0,0 +1,192 @@
+"""
+Speculative agent turns
+
+A caller's question is usually settled before the end of speech is
+detected: the last words are spoken, then the endpointer waits out the
+silence. A SpeculativeTurn starts the agent on the partial transcript as
+soon as it is stable, so the LLM calls and tool lookups overlap with that
+wait. When later audio changes the transcript materially, the speculative
+run is cancelled and restarted on the new text. At the end of the turn its
+answer is used only if the final transcript still matches what it answered.
+
+Speculative runs must be side-effect free: the caller passes a `speculate`
+coroutine that does not write conversation memory and stops before any tool
+that changes state. Whoever resolves the turn commits the answer.
+"""
+import asyncio
+import difflib
+import re
+import time
+from typing import Awaitable, Callable, List, Optional
+from utils.cancellation import CancellationToken, OperationCancelled
+from utils.metrics import LATENCY_BUCKETS, registry
+
+WORDS = re.compile(r"\w+")
+# Hesitations Whisper transcribes inconsistently; they never change the question
+FILLER_WORDS = frozenset({"um", "uh", "er", "erm", "hm", "hmm", "mhm", "äh", "ähm", "euh", "eh"})
+# Cancellation reason of a speculative run that reached a tool with side effects
+SIDE_EFFECT = "side effect"
+
+
+def normalize_words(text: str) -> List[str]:
+    return [word for word in WORDS.findall(text.lower()) if word not in FILLER_WORDS]
+
+
+def changed_materially(old: str, new: str, tolerance: float = 0.1) -> bool:
+    """
+    Whether two transcripts of the same utterance ask different things
+
+    Case, punctuation and filler words are ignored. Beyond that, the share of
+    words inserted, deleted or replaced must stay within `tolerance`, so one
+    word differing in a long sentence is tolerated and in a short one is not.
+    """
+    a, b = normalize_words(old), normalize_words(new)
+    if a == b:
+        return False
+    if not a or not b:
+        return True
+    changed = 0
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(a=a, b=b, autojunk=False).get_opcodes():
+        if tag != "equal":
+            changed += max(i2 - i1, j2 - j1)
+    return changed / max(len(a), len(b)) > tolerance
+
+
+def _count(outcome: str) -> None:
+    registry.counter(
+        "agent_speculation_total", "Speculative agent runs by how they ended", {"outcome": outcome}
+    ).inc()
+
+
+class SpeculativeTurn:
+    """Speculation state for one caller turn; create a new one per turn"""
+
+    def __init__(
+        self,
+        speculate: Callable[[str, CancellationToken], Awaitable[str]],
+        stable_partials: int = 2,
+        tolerance: float = 0.1,
+        parent_token: Optional[CancellationToken] = None
+    ):
+        """
+        Args:
+            speculate: Runs the agent on a transcript without side effects; must honour the token
+            stable_partials: Consecutive matching partials before a transcript counts as stable
+            tolerance: Share of changed words still considered the same transcript
+            parent_token: Session token; cancelling it cancels the speculation too
+        """
+        self.speculate = speculate
+        self.stable_partials = stable_partials
+        self.tolerance = tolerance
+        self.parent_token = parent_token
+        self.text: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self.token: Optional[CancellationToken] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.restarts = 0
+        self._last_partial: Optional[str] = None
+        self._repeats = 0
+
+    def update(self, partial: str, stable: bool = False) -> bool:
+        """
+        Feed the latest partial transcript; must be called on the event loop
+
+        Args:
+            partial: Transcript of all audio of the turn so far
+            stable: The speaker has paused, so no further audio can change this transcript yet
+
+        Returns:
+            True when a speculative run was started on this transcript
+        """
+        if not normalize_words(partial):
+            return False
+        if self._last_partial is not None and not changed_materially(self._last_partial, partial, self.tolerance):
+            self._repeats += 1
+        else:
+            self._repeats = 1
+        self._last_partial = partial
+
+        # A stale run is dropped right away to free the model, even before the new text settles
+        if self.task is not None and changed_materially(self.text, partial, self.tolerance):
+            self._discard("transcript changed")
+            self.restarts += 1
+        if self.task is None and (stable or self._repeats >= self.stable_partials):
+            self._start(partial)
+            return True
+        return False
+
+    def _start(self, text: str) -> None:
+        token = CancellationToken()
+        remove_callback = None
+        if self.parent_token is not None:
+            parent = self.parent_token
+            remove_callback = parent.add_callback(lambda: token.cancel(parent.reason))
+        self.text = text
+        self.token = token
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self.task = asyncio.ensure_future(self.speculate(text, token))
+        self.task.add_done_callback(self._mark_finished)
+        if remove_callback is not None:
+            # The session token outlives every speculation; drop the link once this run is over
+            self.task.add_done_callback(lambda _: remove_callback())
+        _count("started")
+
+    def _mark_finished(self, task: asyncio.Task) -> None:
+        self.finished_at = time.perf_counter()
+        # Retrieve the outcome so abandoned runs do not log "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def _discard(self, reason: str) -> None:
+        if self.task is None:
+            return
+        self.token.cancel(reason)
+        self.task.cancel()
+        self.task = None
+        _count("discarded")
+
+    def cancel(self, reason: str = "turn abandoned") -> None:
+        """Drop any running speculation, e.g. when the session closes"""
+        self._discard(reason)
+
+    async def resolve(self, final: str) -> Optional[str]:
+        """
+        End of turn: the speculative answer if it answered this transcript, otherwise None
+
+        On None the caller runs the agent on `final` as usual. Either way the
+        caller commits the result (conversation memory, side effects).
+        """
+        if self.task is None:
+            return None
+        if changed_materially(self.text, final, self.tolerance):
+            self._discard("final transcript changed")
+            return None
+        resolved_at = time.perf_counter()
+        task = self.task
+        try:
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            self._discard("turn abandoned")
+            raise
+        self.task = None
+        if task.cancelled():
+            _count("discarded")
+            return None
+        error = task.exception()
+        if isinstance(error, OperationCancelled):
+            # "blocked": stopped at a tool with side effects; those only run for the committed turn
+            _count("blocked" if self.token.reason == SIDE_EFFECT else "discarded")
+            return None
+        if error is not None:
+            _count("failed")
+            return None
+        answer = task.result()
+        _count("reused")
+        registry.histogram(
+            "agent_speculation_hidden_seconds",
+            "Agent time that overlapped with end-of-speech detection on reused speculative runs",
+            LATENCY_BUCKETS
+        ).observe(min(resolved_at, self.finished_at or resolved_at) - self.started_at)
+        return answer
@@ -1,27 +1,39 @@
-import sounddevice as sd
 import numpy as np
 import wave
 import io
 import time
+from typing import Optional
 from llm.chain import LangChainManager
+from transcription.endpointing import AdaptiveEndpointer, frame_rms
 from transcription.whisper_manager import WhisperManager
 
-# Initialize managers
-llm_manager = LangChainManager()
-whisper_manager = WhisperManager(model_size="base")
+# Managers are created on first use, so importing this module stays cheap
+_llm_manager: Optional[LangChainManager] = None
+_whisper_manager: Optional[WhisperManager] = None
+
+def get_llm_manager() -> LangChainManager:
+    global _llm_manager
+    if _llm_manager is None:
+        _llm_manager = LangChainManager()
+    return _llm_manager
+
+def get_whisper_manager() -> WhisperManager:
+    global _whisper_manager
+    if _whisper_manager is None:
+        _whisper_manager = WhisperManager(model_size="base")
+    return _whisper_manager
 
 # Audio recording settings
 SAMPLE_RATE = 16000
 CHANNELS = 1
-SILENCE_THRESHOLD = 0.005  # Lower threshold to detect silence more easily
-SILENCE_DURATION = 0.3  # Shorter silence duration for more frequent transcription
+SILENCE_DURATION = 0.3  # Silence that ends a phrase; adapts to the speaker's pauses and the line noise
 MIN_AUDIO_LENGTH = 0.5  # Shorter minimum audio length
 MAX_AUDIO_LENGTH = 5.0  # Maximum audio length before forcing transcription
 
 def chat(message: str):
     """Send a message to the LLM and get a response"""
     try:
-        response = llm_manager.generate_response(message)
+        response = get_llm_manager().generate_response(message)
         return {"response": response}
     except Exception as e:
         return {"error": str(e)}
@@ -29,7 +41,7 @@ def chat(message: str):
 def agent(message: str):
     """Send a message to the agent and get a response"""
     try:
-        response = llm_manager.run_agent(message)
+        response = get_llm_manager().run_agent(message)
         return {"response": response}
     except Exception as e:
         return {"error": str(e)}
@@ -37,7 +49,7 @@ def agent(message: str):
 def transcribe_audio(audio_data: bytes):
     """Transcribe an audio file"""
     try:
-        result = whisper_manager.transcribe_audio_chunk(audio_data)
+        result = get_whisper_manager().transcribe_audio_chunk(audio_data)
         return result
     except Exception as e:
         return {"error": str(e)}
@@ -46,7 +58,13 @@ def process_audio_stream(audio_queue, callback):
     """Process audio data and detect silence"""
     print("Starting audio processing")
     audio_buffer = []
-    silence_counter = 0
+    endpointer = AdaptiveEndpointer(
+        base_hangover=SILENCE_DURATION,
+        min_hangover=SILENCE_DURATION,
+        max_hangover=SILENCE_DURATION * 2,
+        min_speech=MIN_AUDIO_LENGTH,
+        max_turn=MAX_AUDIO_LENGTH
+    )
     recording = True
     last_process_time = time.time()
     
@@ -54,19 +72,15 @@ def process_audio_stream(audio_queue, callback):
         try:
             print("Waiting for audio data...", end='\r')
             data = audio_queue.get()
-            audio_buffer.extend(data.flatten())
             current_time = time.time()
             
-            # Check for silence or max length
-            if np.abs(data).mean() < SILENCE_THRESHOLD:
-                silence_counter += len(data) / SAMPLE_RATE
-            else:
-                silence_counter = 0
+            # Track the noise floor and detect the end of the phrase or max length
+            event = endpointer.update(frame_rms(data.flatten()), len(data) / SAMPLE_RATE)
+            if endpointer.in_turn or (event is not None and event.kind == "end_of_turn"):
+                audio_buffer.extend(data.flatten())
             
-            # Process audio if silence detected or max length reached
-            audio_length = len(audio_buffer) / SAMPLE_RATE
-            if ((silence_counter >= SILENCE_DURATION and audio_length >= MIN_AUDIO_LENGTH) or 
-                audio_length >= MAX_AUDIO_LENGTH):
+            # Process audio if the phrase ended
+            if event is not None and event.kind == "end_of_turn" and audio_buffer:
                 print("\nProcessing audio...")
                 # Convert buffer to WAV format
                 buffer = io.BytesIO()
@@ -74,17 +88,16 @@ def process_audio_stream(audio_queue, callback):
                     wf.setnchannels(CHANNELS)
                     wf.setsampwidth(2)  # 16-bit audio
                     wf.setframerate(SAMPLE_RATE)
-                    wf.writeframes(np.array(audio_buffer).tobytes())
+                    wf.writeframes((np.clip(np.array(audio_buffer), -1.0, 1.0) * 32767).astype(np.int16).tobytes())
                 
                 # Transcribe the audio
-                result = whisper_manager.transcribe_audio_chunk(buffer.getvalue())
+                result = get_whisper_manager().transcribe_audio_chunk(buffer.getvalue())
                 if result and "segments" in result:
                     for segment in result["segments"]:
                         print(f"\nTranscription: {segment['text']}")
                 
-                # Reset buffer and silence counter
+                # Reset buffer
                 audio_buffer = []
-                silence_counter = 0
                 last_process_time = current_time
                 
         except KeyboardInterrupt:
@@ -105,6 +118,8 @@ def audio_callback(indata, frames, time, status, audio_queue):
         print(f"\nError in audio callback: {str(e)}")
 
 if __name__ == "__main__":
+    import sounddevice as sd
+
     print("Starting audio listening and transcription...")
     print("Speak into your microphone. Press Ctrl+C to stop.")
     
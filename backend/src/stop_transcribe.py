@@ -1,5 +1,7 @@
+import asyncio
 import os
 import tempfile
+import threading
 import time
 import sounddevice as sd
 from scipy.io.wavfile import write
@@ -7,17 +9,22 @@ import numpy as np
 import webrtcvad
 from transcription.whisper_manager import WhisperManager
 from src.insurance.insurance_agent import InsuranceAgent
+from llm.speculation import SpeculativeTurn
+from transcription.endpointing import AdaptiveEndpointer, frame_rms
 
 class WhisperTranscriber:
-    def __init__(self, model_name="base", sample_rate=16000, chunk_duration=0.5, vad_mode=1, silence_limit=1.0):
+    def __init__(self, model_name="base", sample_rate=16000, chunk_duration=0.5, vad_mode=1, silence_limit=1.0, speculative=False):
         self.model_name = model_name
         self.sample_rate = sample_rate
         self.chunk_duration = chunk_duration  # seconds
-        self.silence_limit = silence_limit  # seconds of silence to consider end of speech
+        self.silence_limit = silence_limit  # longest silence to consider end of speech; adapts below it to the speaker's pauses
+        # Start the agent at the first pause and keep its answer if the final transcript matches
+        self.speculative = speculative
         self.model = None
         self.is_running = False
         self.vad = webrtcvad.Vad(vad_mode)
         self.insurance_agent = InsuranceAgent()
+        self.loop = None
 
     def initialize(self):
         print(f"Loading Whisper model '{self.model_name}'...")
@@ -49,43 +56,82 @@ class WhisperTranscriber:
         os.remove(filepath)
         return result
 
+    def _start_loop(self):
+        # Speculative runs live on an event loop in a background thread; recording stays on this one
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    async def _speculate_on(self, turn, audio_buffer):
+        """Transcribe the speech so far off the recording thread and start the agent on it"""
+        text = await asyncio.to_thread(self.transcribe_chunk, audio_buffer)
+        if text:
+            turn.update(text, stable=True)
+
+    async def _answer(self, turn, text):
+        answer = await turn.resolve(text)
+        if answer is None:
+            return await self.insurance_agent.executer.run_agent(text)
+        self.insurance_agent.commit(text, answer)
+        return answer
+
     def transcribe(self, callback=None):
         if not self.model:
             self.initialize()
+        if self.speculative and self.loop is None:
+            self._start_loop()
 
         self.is_running = True
         print("Start speaking (Ctrl+C to stop)...")
 
         audio_buffer = []
-        silence_counter = 0
+        endpointer = AdaptiveEndpointer(base_hangover=min(0.9, self.silence_limit), max_hangover=self.silence_limit, min_speech=0.0)
+        turn = SpeculativeTurn(self.insurance_agent.speculate)
+        pending = None
 
         try:
             while self.is_running:
                 frame = self.record_audio_frame()
-                if self.is_speech(frame):
+                voiced = self.is_speech(frame)
+                if voiced:
                     audio_buffer.append(frame)
-                    silence_counter = 0
-                else:
-                    if audio_buffer:
-                        silence_counter += self.chunk_duration
-                        if silence_counter >= self.silence_limit:
-                            combined = np.concatenate(audio_buffer)
-                            text = self.transcribe_chunk(combined)
-                            if text:
-                                print("Recognized:", text)
-                                if callback:
-                                    callback(text)
-                                self.insurance_agent.run(text)
-                            audio_buffer = []
-                            silence_counter = 0
+                event = endpointer.update(frame_rms(frame), self.chunk_duration, voiced=voiced)
+                if event is None or not audio_buffer:
+                    continue
+                if event.kind == "pause" and self.speculative and (pending is None or pending.done()):
+                    # The words so far will not change unless speech resumes
+                    pending = asyncio.run_coroutine_threadsafe(
+                        self._speculate_on(turn, np.concatenate(audio_buffer)), self.loop
+                    )
+                elif event.kind == "end_of_turn":
+                    combined = np.concatenate(audio_buffer)
+                    text = self.transcribe_chunk(combined)
+                    if pending is not None:
+                        # Let the pause transcription land first, so no speculation starts after the turn
+                        pending.result()
+                    if text:
+                        print("Recognized:", text)
+                        if callback:
+                            callback(text)
+                        if self.speculative:
+                            answer = asyncio.run_coroutine_threadsafe(self._answer(turn, text), self.loop).result()
+                        else:
+                            answer = self.insurance_agent.run(text)
+                        print("Agent:", answer)
+                    elif self.speculative:
+                        self.loop.call_soon_threadsafe(turn.cancel)
+                    audio_buffer = []
+                    turn = SpeculativeTurn(self.insurance_agent.speculate)
+                    pending = None
         except KeyboardInterrupt:
             print("\nStopping...")
         finally:
             self.is_running = False
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(turn.cancel)
 
 
 def main():
-    transcriber = WhisperTranscriber(model_name="small", chunk_duration=0.03, silence_limit=1.0)
+    transcriber = WhisperTranscriber(model_name="small", chunk_duration=0.03, silence_limit=1.0, speculative=True)
     transcriber.transcribe()
 
 if __name__ == "__main__":
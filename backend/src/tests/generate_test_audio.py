@@ -21,6 +21,8 @@ def generate_test_audio():
     # Save the audio file
     output_path = test_dir / "test.wav"
     tts.save(str(output_path))
+    # Reference transcript, for the decode profile benchmark
+    (test_dir / "test.txt").write_text(" ".join(text.split()) + "\n")
     
     print(f"Test audio file generated at: {output_path}")
     print("You can now run the integration tests.")
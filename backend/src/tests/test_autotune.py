@@ -0,0 +1,72 @@
+import json
+import os
+import pytest
+from transcription import autotune
+from transcription.autotune import calibrate, choose, thread_layouts, tuned_settings, Trial
+from transcription.evaluation import word_error_rate
+
+REFERENCE = "hello this is a test of the claims line"
+
+
+def test_word_error_rate():
+    assert word_error_rate(REFERENCE, "Hello, this is a test of the claims line.") == 0.0
+    # One substitution and one deletion out of nine words
+    assert word_error_rate(REFERENCE, "hello this is the test of claims line") == pytest.approx(2 / 9)
+    assert word_error_rate("", "") == 0.0
+    assert word_error_rate("", "hallucinated") == 1.0
+
+
+def test_thread_layouts_split_the_cpus():
+    assert thread_layouts(8) == [(8, 1), (4, 2), (2, 4)]
+    assert thread_layouts(2) == [(2, 1), (1, 2)]
+    assert thread_layouts(1) == [(1, 1)]
+
+
+class FakeTrials:
+    """int8 is fastest but garbles the clip; int8_float32 is accurate and faster than float32"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, model_size, compute_type, cpu_threads, num_workers, pcm, repeats):
+        self.calls.append((compute_type, cpu_threads, num_workers))
+        speed = {"int8": 4.0, "int8_float32": 2.0, "float32": 1.0}[compute_type]
+        text = "hello this is a test of the clam slime" if compute_type == "int8" else REFERENCE
+        latency = 1.0 / speed * (1 + 0.5 * (num_workers - 1))
+        return latency, 10 * speed * num_workers / (1 + 0.5 * (num_workers - 1)), text
+
+
+def test_calibration_picks_the_fastest_accurate_setup():
+    trials = FakeTrials()
+    profile = calibrate("base", b"", layouts=[(4, 1), (2, 2)], run_trial=trials, log=lambda line: None)
+    # The float32 reference is measured first, every candidate on every layout
+    assert trials.calls[0] == ("float32", 4, 1)
+    assert len(trials.calls) == 6
+    assert profile["reference"] == REFERENCE
+    assert profile["settings"] == {"compute_type": "int8_float32", "cpu_threads": 4, "num_workers": 1}
+    best = choose([Trial(**trial) for trial in profile["trials"]], max_wer=0.05, objective="throughput")
+    assert best.settings == {"compute_type": "int8_float32", "cpu_threads": 2, "num_workers": 2}
+    # A looser accuracy budget admits int8
+    assert choose([Trial(**trial) for trial in profile["trials"]], max_wer=0.5).compute_type == "int8"
+
+
+def test_profile_is_cached_per_host_and_model(tmp_path, monkeypatch):
+    trials = FakeTrials()
+    clip = tmp_path / "clip.wav"
+    clip.write_bytes(b"")
+    monkeypatch.setattr(autotune, "read_clip", lambda path: b"")
+    monkeypatch.setattr(autotune, "_run_trial", trials)
+
+    first = tuned_settings("base", "cpu", clip=str(clip), profile_dir=str(tmp_path / "profiles"))
+    measured = len(trials.calls)
+    again = tuned_settings("base", "cpu", clip=str(clip), profile_dir=str(tmp_path / "profiles"))
+    batch = tuned_settings("base", "cpu", clip=str(clip), profile_dir=str(tmp_path / "profiles"), objective="throughput")
+    assert first == again and len(trials.calls) == measured
+    assert batch["num_workers"] >= first["num_workers"]
+    [path] = [name for name in os.listdir(tmp_path / "profiles") if name.endswith(".json")]
+    assert path == f"base-{autotune.host_fingerprint()}.json"
+    with open(tmp_path / "profiles" / path) as f:
+        assert json.load(f)["settings"] == first
+
+    # Another model is calibrated separately; a missing clip falls back to the defaults
+    assert tuned_settings("small", "cpu", clip=str(tmp_path / "missing.wav"), profile_dir=str(tmp_path / "profiles")) == {}
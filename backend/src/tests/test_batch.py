@@ -0,0 +1,111 @@
+import json
+import os
+import pytest
+from transcription.batch import list_inputs, run_batch
+
+
+def fake_transcribe(path, language):
+    if path.endswith("broken.wav"):
+        raise ValueError("not a RIFF file")
+    name = os.path.basename(path)
+    return {
+        "segments": [{"start": 0.0, "end": 1.5, "text": f"hello {name}"}, {"start": 1.5, "end": 3.0, "text": "bye"}],
+        "language": language or "en",
+        "duration": 3600.0
+    }
+
+
+def crashing_transcribe(path, language):
+    if path.endswith("crash.wav"):
+        os._exit(1)
+    return fake_transcribe(path, language)
+
+
+def archive(tmp_path, names):
+    directory = tmp_path / "archive"
+    (directory / "day").mkdir(parents=True)
+    for name in names:
+        (directory / "day" / name).write_bytes(b"")
+    (directory / "notes.txt").write_text("not audio")
+    return directory
+
+
+def test_inputs_from_directory_or_manifest(tmp_path):
+    directory = archive(tmp_path, ["b.wav", "a.MP3"])
+    assert list_inputs(str(directory)) == [str(directory / "day" / "a.MP3"), str(directory / "day" / "b.wav")]
+    manifest = directory / "files.txt"
+    manifest.write_text('# nightly\nday/b.wav\n{"path": "day/a.MP3"}\n')
+    assert list_inputs(str(manifest)) == [str(directory / "day" / "b.wav"), str(directory / "day" / "a.MP3")]
+
+
+def test_segments_checkpoint_and_throughput(tmp_path):
+    paths = list_inputs(str(archive(tmp_path, ["1.wav", "2.wav", "broken.wav"])))
+    output, checkpoint = str(tmp_path / "out.jsonl"), str(tmp_path / "out.checkpoint.jsonl")
+    report = run_batch(paths, output, checkpoint, workers=2, transcribe=fake_transcribe, language="de", log=lambda line: None)
+
+    assert (report.files, report.failed, report.skipped) == (2, 1, 0)
+    assert report.audio_seconds == 7200.0
+    assert report.audio_hours_per_hour == 7200.0 / report.wall_seconds
+    with open(output) as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == 4
+    assert {"file": paths[0], "language": "de", "start": 0.0, "end": 1.5, "text": "hello 1.wav"} in lines
+    with open(checkpoint) as f:
+        statuses = {entry["path"]: entry["status"] for entry in map(json.loads, f)}
+    assert statuses == {paths[0]: "done", paths[1]: "done", paths[2]: "failed"}
+
+
+def test_resume_skips_done_files_and_drops_partial_output(tmp_path):
+    paths = list_inputs(str(archive(tmp_path, ["1.wav", "2.wav", "3.wav"])))
+    output, checkpoint = str(tmp_path / "out.jsonl"), str(tmp_path / "out.checkpoint.jsonl")
+    run_batch(paths[:1], output, checkpoint, workers=1, transcribe=fake_transcribe, log=lambda line: None)
+    # Interrupted while writing the second file: its segment is on disk, its checkpoint entry is not
+    with open(output, "a") as f:
+        f.write(json.dumps({"file": paths[1], "text": "hello"}) + "\n")
+    with open(checkpoint, "a") as f:
+        f.write('{"path": "')
+
+    report = run_batch(paths, output, checkpoint, workers=2, transcribe=fake_transcribe, log=lambda line: None)
+    assert (report.files, report.skipped) == (2, 1)
+    with open(output) as f:
+        files = [json.loads(line)["file"] for line in f]
+    assert sorted(files) == sorted(path for path in paths for _ in range(2))
+    with open(checkpoint) as f:
+        assert [json.loads(line)["status"] for line in f] == ["done"] * 3
+
+
+def test_failed_files_are_retried(tmp_path):
+    paths = list_inputs(str(archive(tmp_path, ["broken.wav"])))
+    output, checkpoint = str(tmp_path / "out.jsonl"), str(tmp_path / "out.checkpoint.jsonl")
+    for _ in range(2):
+        report = run_batch(paths, output, checkpoint, workers=1, transcribe=fake_transcribe, log=lambda line: None)
+        assert (report.failed, report.skipped) == (1, 0)
+    with pytest.raises(FileNotFoundError):
+        list_inputs(str(tmp_path / "missing.txt"))
+
+
+def test_partial_output_is_dropped_when_no_file_finished(tmp_path):
+    paths = list_inputs(str(archive(tmp_path, ["1.wav"])))
+    output, checkpoint = str(tmp_path / "out.jsonl"), str(tmp_path / "out.checkpoint.jsonl")
+    # Interrupted during the first file: an empty checkpoint and some of its segments
+    open(checkpoint, "w").close()
+    with open(output, "w") as f:
+        f.write(json.dumps({"file": paths[0], "text": "hello"}) + "\n")
+
+    run_batch(paths, output, checkpoint, workers=1, transcribe=fake_transcribe, log=lambda line: None)
+    with open(output) as f:
+        assert [json.loads(line)["text"] for line in f] == ["hello 1.wav", "bye"]
+
+
+def test_dead_worker_fails_files_in_flight_and_the_run_goes_on(tmp_path):
+    paths = list_inputs(str(archive(tmp_path, ["1.wav", "2.wav", "3.wav", "4.wav", "crash.wav"])))
+    output, checkpoint = str(tmp_path / "out.jsonl"), str(tmp_path / "out.checkpoint.jsonl")
+    report = run_batch(paths, output, checkpoint, workers=1, transcribe=crashing_transcribe, log=lambda line: None)
+    assert report.files + report.failed == 5 and report.failed >= 1
+    with open(checkpoint) as f:
+        entries = {entry["path"]: entry for entry in map(json.loads, f)}
+    assert entries[paths[-1]] == {"path": paths[-1], "status": "failed", "error": "worker process died"}
+
+    # The rerun retries exactly the files lost with the pool
+    retried = run_batch(paths, output, checkpoint, workers=1, transcribe=fake_transcribe, log=lambda line: None)
+    assert (retried.files, retried.skipped) == (report.failed, report.files)
@@ -0,0 +1,61 @@
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from transcription.whisper_manager import WhisperManager
+from utils.cancellation import CancellationToken, OperationCancelled
+from utils.metrics import registry
+
+def test_deadline_cancels_the_token():
+    token = CancellationToken(timeout=0.01)
+    assert not token.cancelled
+    time.sleep(0.02)
+    with pytest.raises(OperationCancelled, match="deadline exceeded"):
+        token.raise_if_cancelled()
+
+def test_callbacks_run_once_even_when_added_late():
+    token = CancellationToken()
+    calls = []
+    token.add_callback(lambda: calls.append("early"))
+    threading.Thread(target=token.cancel, args=("client disconnected",)).start()
+    time.sleep(0.01)
+    token.cancel("again")
+    token.add_callback(lambda: calls.append("late"))
+    assert calls == ["early", "late"]
+    assert token.reason == "client disconnected"
+
+def test_removed_callbacks_do_not_pile_up_or_run():
+    token = CancellationToken()
+    calls = []
+    for index in range(100):
+        remove = token.add_callback(lambda index=index: calls.append(index))
+        if index:
+            remove()
+    assert len(token._callbacks) == 1
+    token.cancel()
+    assert calls == [0]
+
+def test_deadline_is_told_apart_from_other_reasons():
+    token = CancellationToken(timeout=0)
+    with pytest.raises(OperationCancelled) as raised:
+        token.raise_if_cancelled()
+    assert raised.value.deadline_exceeded
+    assert not OperationCancelled("client disconnected").deadline_exceeded
+
+def test_whisper_stops_at_the_next_segment_and_reports_savings():
+    token = CancellationToken()
+    pulled = []
+
+    def segments():
+        for index in range(10):
+            pulled.append(index)
+            if index == 2:
+                token.cancel("client disconnected")
+            yield SimpleNamespace(text=f"segment {index}", start=index * 3.0, end=index * 3.0 + 3.0)
+
+    manager = WhisperManager.__new__(WhisperManager)
+    with pytest.raises(OperationCancelled):
+        manager._collect_segments(segments(), SimpleNamespace(duration=30.0), token)
+    assert pulled == [0, 1, 2]
+    saved = registry.snapshot(prefix="cancellation_saved_audio_seconds")["cancellation_saved_audio_seconds"]
+    assert saved["series"][0]["sum"] >= 21.0
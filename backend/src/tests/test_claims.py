@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from insurance.claims import ClaimIntake, filing_key
+
+@pytest.fixture
+def intake(tmp_path):
+    claims = ClaimIntake(str(tmp_path / "claims.db"), linger=0.05)
+    yield claims
+    claims.close()
+
+def test_burst_is_committed_in_groups(intake):
+    futures = [intake.submit_nowait(f"Hail damage to car {i}", policy_number="AB-1234") for i in range(200)]
+    claims = [future.result(timeout=5) for future in futures]
+
+    assert len({claim.claim_id for claim in claims}) == 200
+    assert intake.claims_committed == 200
+    assert intake.batches_committed < 20
+
+def test_retries_with_same_filing_key_return_the_original_claim(intake):
+    first = intake.submit_sync(
+        "Windshield cracked", policy_number="AB-1234", filing_key=filing_key("call-1", "AB-1234", "Windshield cracked")
+    )
+    retry = intake.submit_sync(
+        "  windshield   CRACKED ",
+        policy_number="AB-1234",
+        filing_key=filing_key("call-1", "AB-1234", "  windshield   CRACKED ")
+    )
+    assert retry.claim_id == first.claim_id
+    assert len(intake.by_policy("AB-1234")) == 1
+    assert (intake.claims_committed, intake.duplicates) == (1, 1)
+
+def test_same_wording_from_another_caller_is_a_new_claim(intake):
+    wording = "I want to file a claim for hail damage"
+    first = intake.submit_sync(wording, filing_key=filing_key("call-1", None, wording))
+    other = intake.submit_sync(wording, filing_key=filing_key("call-2", None, wording))
+    assert other.claim_id != first.claim_id
+    # Without a key nothing is deduplicated
+    claims = [intake.submit_sync(wording) for _ in range(2)]
+    assert claims[0].claim_id != claims[1].claim_id
+
+def test_dedupe_window_slides_from_the_stored_claim(intake, monkeypatch):
+    clock = [599.9]
+    monkeypatch.setattr("insurance.claims.time.time", lambda: clock[0])
+    key = filing_key("call-1", None, "Hail damage to roof")
+    first = intake.submit_sync("Hail damage to roof", filing_key=key)
+
+    # A fixed 600 s bucket would split these two filings
+    clock[0] = 600.1
+    assert intake.submit_sync("Hail damage to roof", filing_key=key).claim_id == first.claim_id
+    clock[0] = 599.9 + intake.dedupe_window - 0.1
+    assert intake.submit_sync("Hail damage to roof", filing_key=key).claim_id == first.claim_id
+
+    clock[0] = 599.9 + intake.dedupe_window + 0.1
+    later = intake.submit_sync("Hail damage to roof", filing_key=key)
+    assert later.claim_id != first.claim_id
+    clock[0] += 1
+    assert intake.submit_sync("Hail damage to roof", filing_key=key).claim_id == later.claim_id
+
+def test_cancelled_submitter_does_not_stop_the_writer(intake):
+    async def cancelled():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(intake.submit("Hail damage to roof"), 0.0001)
+
+    for _ in range(5):
+        asyncio.run(cancelled())
+    assert intake.submit_sync("Hail damage to car", timeout=5).status == "received"
+
+def test_status_lookup_by_claim_id_and_policy(intake):
+    async def scenario():
+        claim = await intake.submit("Burst pipe in kitchen", policy_number="HM-99887")
+        return claim, await intake.status(claim.claim_id.lower())
+
+    claim, looked_up = asyncio.run(scenario())
+    assert looked_up == claim
+    assert intake.by_policy("HM-99887") == [claim]
+    assert intake.get("CLM-0000000000") is None
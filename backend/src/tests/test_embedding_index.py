@@ -0,0 +1,79 @@
+import numpy as np
+from insurance.embedding_index import EmbeddingIndex, build_embedding_index
+
+class KeywordEncoder:
+    """Tiny deterministic encoder: one dimension per keyword"""
+    model_name = "keywords"
+    keywords = ["claim", "open", "car", "health", "payout"]
+
+    def encode(self, texts):
+        vectors = np.array(
+            [[float(word in text.lower()) for word in self.keywords] for text in texts],
+            dtype=np.float32
+        ) + 1e-3
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+DATA = {
+    "faqs": [
+        {"question": "How can I file a claim?", "answer": "Use the app."},
+        {"question": "When are you open?", "answer": "Weekdays."},
+    ],
+    "policies": [{"name": "Car Insurance", "details": "Covers your car."}],
+    "departments": [{"name": "Claims", "specialization": "Handles payouts"}],
+}
+
+def test_index_is_memory_mapped_and_searchable(tmp_path):
+    encoder = KeywordEncoder()
+    build_embedding_index(DATA, str(tmp_path), encoder)
+    index = EmbeddingIndex.load(str(tmp_path), encoder=encoder)
+
+    assert isinstance(index.vectors, np.memmap)
+    assert len(index) == 4
+    hits = index.search("my car", k=1)
+    assert hits[0].kind == "policy"
+
+def test_search_can_be_restricted_to_one_kind(tmp_path):
+    encoder = KeywordEncoder()
+    build_embedding_index(DATA, str(tmp_path), encoder)
+    index = EmbeddingIndex.load(str(tmp_path), encoder=encoder)
+
+    hits = index.search("payout for my claim", k=5, kind="faq")
+    assert {hit.kind for hit in hits} == {"faq"}
+    assert hits[0].item["question"] == "How can I file a claim?"
+
+def test_rebuild_swaps_versions_and_handle_follows_data(tmp_path):
+    import pytest
+    from insurance.embedding_index import EmbeddingIndexHandle, current_version_dir
+    from insurance.institutes import data_version
+
+    encoder = KeywordEncoder()
+    first = build_embedding_index(DATA, str(tmp_path), encoder)
+    handle = EmbeddingIndexHandle(str(tmp_path), encoder=encoder)
+    assert handle.for_version(data_version(DATA)) is not None
+
+    updated = dict(DATA, policies=[{"name": "Health Insurance", "details": "Covers health."}])
+    with pytest.raises(ValueError):
+        EmbeddingIndex.load(str(tmp_path), encoder=encoder, data_version=data_version(updated))
+    # The old index is not served for new data until one is built for it
+    assert handle.for_version(data_version(updated)) is None
+
+    second = build_embedding_index(updated, str(tmp_path), encoder)
+    assert current_version_dir(str(tmp_path)) == second != first
+    index = handle.for_version(data_version(updated))
+    assert index.search("health", k=1, kind="policy")[0].item["name"] == "Health Insurance"
+
+    third = build_embedding_index(updated, str(tmp_path), encoder)
+    # The previous version is kept for readers that resolved it, older ones are removed
+    assert sorted(path for path in tmp_path.iterdir() if path.is_dir()) == [second, third]
+
+
+def test_index_built_from_parsed_data_matches_the_registry_snapshot(tmp_path):
+    import json
+    from insurance.institutes import InstituteRegistry
+
+    # Formatting the registry does not care about must not change the version
+    (tmp_path / "institute_1.json").write_text(json.dumps(DATA, indent=4))
+    encoder = KeywordEncoder()
+    build_embedding_index(DATA, str(tmp_path / "index"), encoder)
+    index = EmbeddingIndex.load(str(tmp_path / "index"), encoder=encoder)
+    assert index.for_version(InstituteRegistry(data_dir=str(tmp_path)).get("1").version) is index
@@ -0,0 +1,78 @@
+import math
+import random
+from transcription.endpointing import AdaptiveEndpointer, frame_rms
+
+FRAME = 0.03
+
+
+def feed(endpointer, rms, seconds, rng=None):
+    """Feed `seconds` of frames at `rms` (jittered like real audio when rng is given); returns the events"""
+    events = []
+    for _ in range(round(seconds / FRAME)):
+        level = rms * rng.uniform(0.7, 1.3) if rng else rms
+        event = endpointer.update(level, FRAME)
+        if event is not None:
+            events.append(event)
+    return events
+
+
+def talk(endpointer, seconds):
+    """Syllables with the short gaps of continuous speech"""
+    events = []
+    for _ in range(round(seconds / 0.24)):
+        events += feed(endpointer, 0.1, 0.21) + feed(endpointer, 0.001, 0.03)
+    return events
+
+
+def test_frame_rms():
+    assert frame_rms([]) == 0.0
+    assert math.isclose(frame_rms([0.5, -0.5, 0.5, -0.5]), 0.5)
+
+
+def test_noise_floor_and_threshold_follow_the_line():
+    rng = random.Random(0)
+    endpointer = AdaptiveEndpointer()
+    # A noisy line: under a fixed 0.005 threshold this would count as speech forever
+    assert feed(endpointer, 0.02, 3.0, rng) == []
+    assert not endpointer.in_turn
+    assert -40 < endpointer.noise_floor_db < -30
+    assert endpointer.threshold_db > 20 * math.log10(0.02 * 1.3)
+
+    events = feed(endpointer, 0.2, 1.0, rng) + feed(endpointer, 0.02, 2.0, rng)
+    assert [e.kind for e in events] == ["speech_start", "pause", "end_of_turn"]
+    assert events[-1].reason == "silence"
+    assert 0 < events[-1].confidence <= 1
+
+
+def test_hangover_adapts_to_the_callers_pauses():
+    rng = random.Random(1)
+    quick = AdaptiveEndpointer()
+    slow = AdaptiveEndpointer()
+    for endpointer, pause in ((quick, 0.2), (slow, 0.6)):
+        feed(endpointer, 0.001, 1.0, rng)
+        for _ in range(8):
+            for _ in range(3):
+                feed(endpointer, 0.1, 0.6, rng)
+                feed(endpointer, 0.001, pause, rng)
+            feed(endpointer, 0.001, 2.0, rng)
+    assert quick.hangover < quick.base_hangover
+    # A slow speaker gets at least their usual pause plus a margin
+    assert slow.hangover > 0.6 * 1.2
+
+
+def test_pauses_inside_a_turn_do_not_end_it():
+    endpointer = AdaptiveEndpointer(base_hangover=0.5)
+    events = feed(endpointer, 0.001, 0.5)
+    events += feed(endpointer, 0.1, 0.6) + feed(endpointer, 0.001, 0.45) + feed(endpointer, 0.1, 0.6)
+    assert [e.kind for e in events] == ["speech_start", "pause"]
+    # The caller already paused 0.45 s in this turn, so 0.5 s of silence is not yet the end
+    assert feed(endpointer, 0.001, 0.5) == [] or endpointer.hangover > 0.5
+    assert feed(endpointer, 0.001, 1.0)[-1].kind == "end_of_turn"
+
+
+def test_max_turn_and_reset():
+    endpointer = AdaptiveEndpointer(max_turn=2.0)
+    events = feed(endpointer, 0.001, 0.3) + talk(endpointer, 2.5)
+    assert [(e.kind, e.reason) for e in events][:2] == [("speech_start", ""), ("end_of_turn", "max_length")]
+    endpointer.reset_turn()
+    assert not endpointer.in_turn and endpointer.speech_seconds == 0.0
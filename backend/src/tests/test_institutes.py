@@ -0,0 +1,84 @@
+import json
+import os
+import pytest
+from insurance.institutes import InstituteRegistry
+
+def write_institute(directory, institute_id, faqs):
+    path = directory / f"institute_{institute_id}.json"
+    path.write_text(json.dumps({"faqs": faqs, "departments": [], "policies": []}))
+    return path
+
+def test_datasets_are_loaded_lazily_and_shared(tmp_path):
+    write_institute(tmp_path, "a", [{"question": "When are you open?", "answer": "Weekdays."}])
+    registry = InstituteRegistry(data_dir=str(tmp_path))
+    assert registry.loaded() == []
+
+    first = registry.get("a")
+    assert registry.get("a") is first
+    assert first.faq_index.search("open")[0].document["answer"] == "Weekdays."
+
+def test_changed_file_is_swapped_in_without_touching_old_snapshot(tmp_path):
+    path = write_institute(tmp_path, "a", [{"question": "When are you open?", "answer": "Weekdays."}])
+    registry = InstituteRegistry(data_dir=str(tmp_path))
+    handle = registry.handle("a")
+    old = handle()
+
+    write_institute(tmp_path, "a", [{"question": "When are you open?", "answer": "Every day."}])
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert registry.check_for_changes() == ["a"]
+
+    assert handle().faq_index.search("open")[0].document["answer"] == "Every day."
+    assert old.faq_index.search("open")[0].document["answer"] == "Weekdays."
+
+def test_least_recently_used_institutes_are_evicted(tmp_path):
+    for institute_id in "abc":
+        write_institute(tmp_path, institute_id, [])
+    registry = InstituteRegistry(data_dir=str(tmp_path), max_institutes=2)
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")
+    registry.get("c")
+    assert sorted(entry["institute_id"] for entry in registry.loaded()) == ["a", "c"]
+
+def test_unknown_institute_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        InstituteRegistry(data_dir=str(tmp_path)).get("missing")
+
+def test_store_errors_keep_the_old_snapshot_and_the_watcher_alive(tmp_path):
+    import sqlite3
+    import time
+
+    class FailingStore:
+        def __init__(self):
+            self.fail = False
+
+        def sync(self, institute_id, version, policies):
+            if self.fail:
+                raise sqlite3.OperationalError("database is locked")
+            return 0
+
+        def retire(self, institute_id, keep):
+            return 0
+
+    store = FailingStore()
+    path = write_institute(tmp_path, "a", [{"question": "When are you open?", "answer": "Weekdays."}])
+    registry = InstituteRegistry(data_dir=str(tmp_path), poll_interval=0.01, policy_store=store)
+    handle = registry.handle("a")
+    old = handle()
+    registry.start_watching()
+    try:
+        store.fail = True
+        write_institute(tmp_path, "a", [{"question": "When are you open?", "answer": "Every day."}])
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert registry.check_for_changes() == []
+        assert handle() is old
+
+        store.fail = False
+        deadline = time.monotonic() + 5
+        while handle().faq_index.search("open")[0].document["answer"] != "Every day." and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert handle().faq_index.search("open")[0].document["answer"] == "Every day."
+    finally:
+        registry.stop_watching()
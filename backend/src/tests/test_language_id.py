@@ -0,0 +1,28 @@
+from insurance.language_id import LanguageIdentifier, normalize_hint
+
+def test_identifies_short_voice_turns():
+    identifier = LanguageIdentifier()
+    assert identifier.identify("I want to file a claim for my car") == "en"
+    assert identifier.identify("Was deckt meine Versicherung ab") == "de"
+    assert identifier.identify("qu'est-ce que ma police couvre") == "fr"
+    assert identifier.identify("cosa copre la mia polizza") == "it"
+    assert identifier.identify("qué cubre mi póliza") == "es"
+    assert identifier.identify("kan ik morgen een afspraak maken") == "nl"
+
+def test_chinese_scripts_are_distinguished():
+    identifier = LanguageIdentifier()
+    assert identifier.identify("我想报告一个理赔") == "zh-CN"
+    assert identifier.identify("我想報告一個理賠") == "zh-TW"
+
+def test_whisper_hint_decides_ambiguous_input():
+    identifier = LanguageIdentifier()
+    assert identifier.identify("ok", hint="de") == "de"
+    assert identifier.identify("12345", hint="zh") == "zh-CN"
+    assert normalize_hint("ja") is None
+
+def test_results_are_deterministic_and_cached():
+    first, second = LanguageIdentifier(), LanguageIdentifier()
+    texts = ["merci beaucoup", "grazie mille", "dank u wel", "thank you"]
+    assert first.identify_batch(texts) == second.identify_batch(texts)
+    first.identify("thank you")
+    assert first.cache_info().hits >= 1
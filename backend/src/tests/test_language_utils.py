@@ -0,0 +1,22 @@
+from insurance.language_utils import LanguageUtils
+
+def test_terms_are_translated_on_word_boundaries():
+    utils = LanguageUtils()
+    assert utils.translate_insurance_terms("The policyholder read the policy.", "en", "de") == "The policyholder read the Police."
+
+def test_case_is_preserved():
+    utils = LanguageUtils()
+    assert utils.translate_insurance_terms("Claim: your PREMIUM is due", "en", "fr") == "Sinistre: your PRIME is due"
+    assert utils.translate_insurance_terms("Die Police hat einen Selbstbehalt", "de", "en") == "Die policy hat einen deductible"
+
+def test_han_terms_match_without_spaces():
+    utils = LanguageUtils()
+    assert utils.translate_insurance_terms("您的保单和理赔", "zh-CN", "zh-TW") == "您的保單和理賠"
+
+def test_batch_matches_single_calls():
+    utils = LanguageUtils()
+    lines = ["Your claim was approved.", "No coverage for this risk.", "Unsupported", ""]
+    assert utils.translate_insurance_terms_batch(lines, "en", "it") == [
+        utils.translate_insurance_terms(line, "en", "it") for line in lines
+    ]
+    assert utils.translate_insurance_terms_batch(lines, "en", "xx") == lines
@@ -0,0 +1,19 @@
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1]
+
+def imported_modules(statement):
+    code = f"import sys; {statement}; print(' '.join(sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=SRC, check=True)
+    return set(result.stdout.split())
+
+def test_whisper_manager_import_does_not_load_torch():
+    modules = imported_modules("import transcription.whisper_manager")
+    assert "torch" not in modules
+    assert "faster_whisper" not in modules
+
+def test_api_import_does_not_load_models():
+    modules = imported_modules("import api; assert api.whisper_manager is None")
+    assert "torch" not in modules
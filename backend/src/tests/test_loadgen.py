@@ -0,0 +1,34 @@
+import random
+from benchmarks.loadgen import SAMPLE_RATE, StepResult, percentile, saturation_point, synthetic_utterance
+
+
+def step(callers, turns, errors=0, e2e=()):
+    result = StepResult(callers=callers, duration=10.0, turns=turns)
+    if errors:
+        result.errors["transcribe"] = errors
+    result.latencies["end_to_end_after_speech"].extend(e2e)
+    return result
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) is None
+
+
+def test_synthetic_utterance_has_requested_length_plus_trailing_silence():
+    pcm = synthetic_utterance(2.0, random.Random(1))
+    assert len(pcm) == int(2.8 * SAMPLE_RATE) * 2
+    assert pcm[-200:] == b"\x00" * 200
+
+
+def test_saturation_when_throughput_stops_growing():
+    results = [step(1, 10), step(2, 20), step(4, 21)]
+    assert saturation_point(results, max_error_rate=0.01, max_p95=5.0) == 4
+
+
+def test_saturation_on_errors_or_latency():
+    assert saturation_point([step(1, 10), step(2, 20, errors=5)], 0.01, 5.0) == 2
+    assert saturation_point([step(1, 10), step(2, 20, e2e=[6.0] * 10)], 0.01, 5.0) == 2
+    assert saturation_point([step(1, 10), step(2, 20, e2e=[1.0] * 10)], 0.01, 5.0) is None
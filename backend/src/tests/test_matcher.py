@@ -0,0 +1,30 @@
+from insurance.matcher import PatternMatcher, build_department_matcher, build_policy_matcher
+
+def test_finds_every_pattern_in_one_pass():
+    matcher = PatternMatcher([("he", 1, 1.0), ("she", 2, 1.0), ("hers", 3, 1.0), ("his", 4, 1.0)], word_boundaries=False)
+    found = sorted((m.start, m.pattern) for m in matcher.find_all("ushers"))
+    assert found == [(1, "she"), (2, "he"), (2, "hers")]
+
+def test_word_boundaries_and_case_are_respected():
+    matcher = PatternMatcher([("car", "car", 1.0)])
+    assert [m.payload for m in matcher.find_all("My CAR broke")] == ["car"]
+    assert matcher.find_all("a scary card") == []
+
+def test_policies_are_ranked_by_specificity():
+    policies = [
+        {"name": "Comprehensive Car Insurance", "details": "Covers your car."},
+        {"name": "Health Insurance Basic", "details": "Covers doctor visits."},
+    ]
+    matcher = build_policy_matcher(policies)
+    ranked = matcher.rank("Is health insurance basic better than car cover?")
+    assert [entry.payload["name"] for entry in ranked] == ["Health Insurance Basic", "Comprehensive Car Insurance"]
+
+def test_departments_match_on_staff_and_keywords():
+    departments = [
+        {"name": "Claims", "specialization": "Handles insurance claims and payouts", "personnel": ["Alice Johnson"]},
+        {"name": "Sales", "specialization": "Provides quotes and policy options", "personnel": ["David Lee"]},
+    ]
+    matcher = build_department_matcher(departments)
+    assert matcher.rank("can I speak to david lee")[0].payload["name"] == "Sales"
+    assert matcher.rank("where is my payout")[0].payload["name"] == "Claims"
+    assert matcher.rank("car insurance") == []
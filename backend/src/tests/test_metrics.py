@@ -0,0 +1,54 @@
+from utils.metrics import MetricsRegistry
+
+def test_histogram_buckets_and_quantiles():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("llm_test_seconds", "test", buckets=(0.1, 1.0, 10.0))
+    for value in [0.05, 0.5, 0.5, 5.0]:
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 4
+    assert snapshot["buckets"] == {"0.1": 1, "1.0": 3, "10.0": 4, "+Inf": 4}
+    assert 0.1 <= snapshot["p50"] <= 1.0
+
+def test_registry_separates_label_sets():
+    registry = MetricsRegistry()
+    registry.histogram("llm_tool_latency_seconds", labels={"tool": "faq_tool"}).observe(0.01)
+    registry.histogram("llm_tool_latency_seconds", labels={"tool": "policy_tool"}).observe(0.02)
+    registry.histogram("other_seconds").observe(1.0)
+
+    snapshot = registry.snapshot(prefix="llm_")
+    assert list(snapshot) == ["llm_tool_latency_seconds"]
+    tools = {series["labels"]["tool"] for series in snapshot["llm_tool_latency_seconds"]["series"]}
+    assert tools == {"faq_tool", "policy_tool"}
+
+def test_snapshot_includes_counters_and_gauges():
+    registry = MetricsRegistry()
+    registry.counter("cancellation_operations_total", "Stopped early", {"stage": "llm", "reason": "client"}).inc()
+    registry.counter("cancellation_operations_total", "Stopped early", {"stage": "llm", "reason": "client"}).inc()
+    registry.gauge("cancellation_inflight", function=lambda: 3)
+    registry.gauge("cancellation_broken", function=lambda: 1 / 0)
+
+    snapshot = registry.snapshot(prefix="cancellation_")
+    assert snapshot["cancellation_operations_total"] == {
+        "description": "Stopped early",
+        "type": "counter",
+        "series": [{"labels": {"stage": "llm", "reason": "client"}, "value": 2.0}],
+    }
+    assert snapshot["cancellation_inflight"]["series"][0]["value"] == 3
+    assert "cancellation_broken" not in snapshot
+
+def test_prometheus_exposition():
+    registry = MetricsRegistry()
+    registry.histogram("pipeline_stage_seconds", "Stage latency", buckets=(0.1, 1.0), labels={"stage": "vad"}).observe(0.05)
+    registry.counter("whisper_audio_seconds_total", "Audio decoded").inc(2.5)
+    depth = [3]
+    registry.gauge("claims_queue_depth", "Queued claims", function=lambda: depth[0])
+    depth[0] = 7
+
+    text = registry.render_prometheus()
+    assert "# TYPE whisper_audio_seconds_total counter\nwhisper_audio_seconds_total 2.5\n" in text
+    assert "claims_queue_depth 7.0\n" in text
+    assert 'pipeline_stage_seconds_bucket{stage="vad",le="0.1"} 1\n' in text
+    assert 'pipeline_stage_seconds_bucket{stage="vad",le="+Inf"} 1\n' in text
+    assert 'pipeline_stage_seconds_count{stage="vad"} 1\n' in text
@@ -0,0 +1,88 @@
+import multiprocessing
+from insurance.institutes import InstituteDataset, InstituteRegistry
+from insurance.policy_store import PolicyStore
+
+POLICIES = [
+    {"name": "Comprehensive Car Insurance", "details": "Covers damage to your vehicle, theft, and natural disasters."},
+    {"name": "Health Insurance Basic", "details": "Covers physician visits and basic hospitalization."},
+]
+
+def sync_and_retire(database, version):
+    store = PolicyStore(database)
+    catalogue = POLICIES + [{"name": f"Variant {i}", "details": f"Covers case {i}."} for i in range(50)]
+    for _ in range(10):
+        store.sync("1", version, catalogue)
+        store.retire("1", ["shared", version])
+    store.close()
+
+def test_sync_is_incremental_and_versions_are_isolated(tmp_path):
+    store = PolicyStore(str(tmp_path / "policies.db"))
+    assert store.sync("1", "v1", POLICIES) == 2
+    assert store.sync("1", "v1", POLICIES) == 0
+
+    edited = [dict(POLICIES[0], details="Now also covers hail."), POLICIES[1]]
+    assert store.sync("1", "v2", edited) == 1
+    assert store.get("1", "v2", "comprehensive car insurance")["details"] == "Now also covers hail."
+    # Readers of the old snapshot still see its catalogue
+    assert store.get("1", "v1", "comprehensive car insurance")["details"] == POLICIES[0]["details"]
+    assert store.sync("1", "v3", edited[:1]) == 0
+    assert (store.count("1", "v2"), store.count("1", "v3")) == (2, 1)
+
+    assert store.retire("1", ["v3"]) == 2
+    assert store.get("1", "v1", "comprehensive car insurance") is None
+    assert store.search("1", "v3", "hail")[0].name == "Comprehensive Car Insurance"
+
+def test_full_text_search_is_scoped_to_institute(tmp_path):
+    store = PolicyStore(str(tmp_path / "policies.db"))
+    store.sync("1", "v1", POLICIES)
+    store.sync("2", "v1", [{"name": "Travel Cover", "details": "Covers theft of luggage."}])
+
+    hits = store.search("1", "v1", "what about theft?")
+    assert [hit.name for hit in hits] == ["Comprehensive Car Insurance"]
+    assert store.search("1", "v1", '" OR AND (') == []
+
+def test_dataset_keeps_only_policy_names_when_backed_by_store(tmp_path):
+    store = PolicyStore(str(tmp_path / "policies.db"))
+    dataset = InstituteDataset.from_data({"faqs": [], "departments": [], "policies": POLICIES}, "1")
+    assert dataset.policies == POLICIES
+
+    backed = InstituteDataset("1", {"policies": POLICIES}, "v1", policy_store=store)
+    assert backed.policies == [{"name": p["name"]} for p in POLICIES]
+    assert backed.policy_matcher.rank("car insurance")[0].payload["name"] == "Comprehensive Car Insurance"
+
+def test_reload_keeps_the_previous_snapshot_readable(tmp_path):
+    import json
+    store = PolicyStore(str(tmp_path / "policies.db"))
+    path = tmp_path / "institute_1.json"
+    path.write_text(json.dumps({"policies": POLICIES}))
+    registry = InstituteRegistry(data_dir=str(tmp_path), policy_store=store)
+    old = registry.get("1")
+
+    path.write_text(json.dumps({"policies": [dict(POLICIES[0], details="Now also covers hail.")]}))
+    new = registry.reload("1")
+    assert store.get("1", old.version, "Health Insurance Basic") is not None
+    assert store.get("1", new.version, "Health Insurance Basic") is None
+
+    path.write_text(json.dumps({"policies": POLICIES[1:]}))
+    registry.reload("1")
+    assert store.count("1", old.version) == 0
+
+def test_processes_sharing_a_database_sync_the_same_catalogue(tmp_path):
+    database = str(tmp_path / "policies.db")
+    PolicyStore(database).sync("1", "shared", POLICIES)
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=sync_and_retire, args=(database, f"v{i}")) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+    assert [worker.exitcode for worker in workers] == [0, 0, 0, 0]
+
+    store = PolicyStore(database)
+    # Every version a process kept still has its whole catalogue, and shared rows were written once
+    assert store.count("1", "shared") == 2
+    with store.pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM policy_contents").fetchone()[0] == 52
+        assert conn.execute(
+            "SELECT COUNT(*) FROM policy_versions v WHERE NOT EXISTS (SELECT 1 FROM policy_contents p WHERE p.id = v.policy_id)"
+        ).fetchone()[0] == 0
@@ -0,0 +1,26 @@
+import pytest
+from transcription.profiles import PROFILES, decode_options, get_profile
+
+
+def test_realtime_is_greedy_without_fallback_or_timestamps():
+    options = get_profile("realtime").options()
+    assert options["beam_size"] == 1 and options["best_of"] == 1
+    assert options["temperature"] == 0.0
+    assert options["without_timestamps"] and not options["condition_on_previous_text"]
+    assert "name" not in options
+
+
+def test_profiles_get_cheaper_towards_realtime():
+    archive, balanced, realtime = PROFILES["archive"], PROFILES["balanced"], PROFILES["realtime"]
+    assert archive.beam_size > balanced.beam_size > realtime.beam_size
+    assert len(archive.temperature) > len(balanced.temperature)
+    assert not archive.without_timestamps
+
+
+def test_explicit_options_override_the_profile():
+    assert decode_options(None, {"beam_size": 3}) == {"beam_size": 3}
+    options = decode_options("realtime", {"beam_size": 3, "initial_prompt": "policy number"})
+    assert options["beam_size"] == 3 and options["initial_prompt"] == "policy number"
+    assert options["temperature"] == 0.0
+    with pytest.raises(ValueError, match="Unknown decode profile: fastest"):
+        decode_options("fastest", {})
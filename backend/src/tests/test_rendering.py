@@ -0,0 +1,60 @@
+import asyncio
+from insurance.rendering import ResponseRenderer
+
+class EchoLLM:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.delay)
+        return f"translation {len(self.prompts)}"
+
+class FailingLLM:
+    async def ainvoke(self, prompt):
+        raise RuntimeError("model unavailable")
+
+ANSWER = "Your claim has been filed successfully under claim ID CLM-0123456789."
+
+def test_languages_render_concurrently_and_source_is_kept():
+    llm = EchoLLM(delay=0.1)
+    renderer = ResponseRenderer(llm)
+    loop = asyncio.new_event_loop()
+    start = loop.time()
+    responses = loop.run_until_complete(renderer.render_all(ANSWER, ["en", "de", "fr", "it"]))
+    assert loop.time() - start < 0.25
+    assert responses["en"] == ANSWER
+    assert len(llm.prompts) == 3
+    assert "claim -> Schadensfall" in "".join(llm.prompts)
+    loop.close()
+
+def test_renderings_are_cached_per_answer_and_language():
+    llm = EchoLLM()
+    renderer = ResponseRenderer(llm)
+    first = asyncio.run(renderer.render_all(ANSWER, ["de"]))
+    second = asyncio.run(renderer.render_all(ANSWER, ["de", "de"]))
+    assert first == second
+    assert len(llm.prompts) == 1
+
+def test_failed_translation_falls_back_to_term_tables_without_caching():
+    renderer = ResponseRenderer(FailingLLM())
+    assert asyncio.run(renderer.render(ANSWER, "it")).startswith("Your sinistro")
+    # Once the model is back, the next request gets a full translation
+    renderer.llm = EchoLLM()
+    assert asyncio.run(renderer.render(ANSWER, "it")) == "translation 1"
+
+def test_cancelled_waiter_does_not_cancel_the_shared_translation():
+    llm = EchoLLM(delay=0.05)
+    renderer = ResponseRenderer(llm)
+
+    async def scenario():
+        first = asyncio.ensure_future(renderer.render(ANSWER, "de"))
+        second = asyncio.ensure_future(renderer.render(ANSWER, "de"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "translation 1"
+    assert asyncio.run(renderer.render(ANSWER, "de")) == "translation 1"
+    assert len(llm.prompts) == 1
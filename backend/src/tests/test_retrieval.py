@@ -0,0 +1,41 @@
+from insurance.retrieval import BM25Index, build_faq_index, tokenize
+from insurance.tools import create_faq_tool
+
+FAQS = [
+    {"question": "How can I file a claim?", "answer": "Use the app or call our claim line."},
+    {"question": "When are you open?", "answer": "Monday to Friday from 9:00 AM to 6:00 PM."},
+    {"question": "What payment methods do you accept?", "answer": "Credit cards and bank transfers."},
+]
+
+def test_tokenize_drops_stopwords_and_plurals():
+    assert tokenize("What are the payment methods?") == ["payment", "method"]
+
+def test_search_ranks_paraphrased_question_first():
+    index = build_faq_index(FAQS)
+    hits = index.search("how do I file a claim after an accident", k=2)
+    assert hits[0].document is FAQS[0]
+    assert hits[0].score > 0
+
+def test_search_returns_scores_in_descending_order():
+    index = build_faq_index(FAQS)
+    hits = index.search("claim payment open", k=3)
+    scores = [hit.score for hit in hits]
+    assert scores == sorted(scores, reverse=True)
+
+def test_search_without_matching_terms_is_empty():
+    assert build_faq_index(FAQS).search("hello there") == []
+
+def test_common_terms_rerank_existing_candidates():
+    documents = [{"text": f"insurance policy {i}"} for i in range(500)]
+    documents.append({"text": "insurance policy windshield"})
+    index = BM25Index(documents, fields={"text": 1.0}, common_df_ratio=0.01)
+    hits = index.search("windshield insurance policy", k=1)
+    assert hits[0].doc_id == 500
+
+def test_faq_tool_returns_the_top_matches_with_scores():
+    tool = create_faq_tool({"faqs": FAQS}, top_k=2, min_score=0.0)
+    lines = tool.func("can I pay a claim by card").splitlines()
+    assert len(lines) == 2
+    assert all("(relevance " in line for line in lines)
+    scores = [float(line.rsplit("relevance ", 1)[1].rstrip(")")) for line in lines]
+    assert scores == sorted(scores, reverse=True)
@@ -0,0 +1,55 @@
+import asyncio
+import time
+from langchain.tools import Tool
+from insurance.runtime import create_parallel_lookup_tool, parse_lookups, with_timeout
+
+def slow_tool(name, delay):
+    async def run(query):
+        await asyncio.sleep(delay)
+        return f"{name} answered {query}"
+    return Tool.from_function(name=name, func=lambda query: query, coroutine=run, description=name)
+
+def test_lookups_are_parsed():
+    assert parse_lookups("policy_tool: Car Insurance | department_tool: claims") == [
+        ("policy_tool", "Car Insurance"),
+        ("department_tool", "claims"),
+    ]
+    assert parse_lookups("no tool here") == []
+
+def test_independent_lookups_run_concurrently():
+    tool = create_parallel_lookup_tool([slow_tool("policy_tool", 0.2), slow_tool("department_tool", 0.2)])
+    start = time.perf_counter()
+    result = asyncio.run(tool.coroutine("policy_tool: Car Insurance | department_tool: claims"))
+    assert time.perf_counter() - start < 0.35
+    assert result.index("policy_tool answered Car Insurance") < result.index("department_tool answered claims")
+
+def test_side_effecting_tools_are_not_reachable():
+    tool = create_parallel_lookup_tool([slow_tool("claim_tool", 0)])
+    assert "Unknown tool claim_tool" in asyncio.run(tool.coroutine("claim_tool: file a claim"))
+
+def test_timeout_becomes_an_observation():
+    tool = with_timeout(slow_tool("policy_tool", 1.0), 0.05)
+    assert "did not respond within 0.05 seconds" in asyncio.run(tool.coroutine("Car Insurance"))
+
+def test_side_effecting_tool_finishes_after_its_timeout():
+    done = []
+
+    async def file_claim(query):
+        await asyncio.sleep(0.1)
+        done.append(query)
+        return "filed"
+
+    tool = with_timeout(
+        Tool.from_function(name="claim_tool", func=lambda query: query, coroutine=file_claim, description="claims"),
+        0.02,
+        shield=True
+    )
+
+    async def scenario():
+        reply = await tool.coroutine("file a claim")
+        await asyncio.sleep(0.2)
+        return reply
+
+    reply = asyncio.run(scenario())
+    assert "still processing" in reply and "Do not submit it again" in reply
+    assert done == ["file a claim"]
@@ -0,0 +1,92 @@
+import threading
+from datetime import datetime, timedelta
+import pytest
+from insurance.scheduling import BookingEngine, SlotUnavailableError, parse_when
+
+MONDAY = datetime(2026, 10, 19, 9, 0)
+
+def test_overlapping_bookings_are_rejected():
+    engine = BookingEngine(["Alice Johnson"])
+    engine.book("Alice Johnson", MONDAY.replace(hour=10))
+    with pytest.raises(SlotUnavailableError):
+        engine.book("Alice Johnson", MONDAY.replace(hour=10, minute=15))
+    engine.book("Alice Johnson", MONDAY.replace(hour=10, minute=30))
+
+def test_outside_opening_hours_is_rejected():
+    engine = BookingEngine(["Alice Johnson"])
+    with pytest.raises(SlotUnavailableError):
+        engine.book("Alice Johnson", MONDAY.replace(hour=17, minute=45))
+    with pytest.raises(SlotUnavailableError):
+        engine.book("Alice Johnson", MONDAY + timedelta(days=6, hours=1))
+
+def test_next_free_slot_skips_bookings_and_closed_days():
+    engine = BookingEngine(["Alice Johnson"])
+    engine.book("Alice Johnson", MONDAY)
+    engine.book("Alice Johnson", MONDAY + timedelta(minutes=30))
+    assert engine.next_free_slot("Alice Johnson", MONDAY) == MONDAY + timedelta(hours=1)
+
+    saturday_afternoon = datetime(2026, 10, 24, 13, 45)
+    assert engine.next_free_slot("Alice Johnson", saturday_afternoon) == datetime(2026, 10, 26, 9, 0)
+
+def test_reschedule_keeps_old_slot_when_new_one_is_taken():
+    engine = BookingEngine(["Alice Johnson"])
+    first = engine.book("Alice Johnson", MONDAY)
+    engine.book("Alice Johnson", MONDAY + timedelta(hours=2))
+    with pytest.raises(SlotUnavailableError):
+        engine.reschedule(first.booking_id, MONDAY + timedelta(hours=2, minutes=15))
+    assert engine.bookings[first.booking_id].start == MONDAY
+
+    moved = engine.reschedule(first.booking_id, MONDAY + timedelta(minutes=15))
+    assert moved.start == MONDAY + timedelta(minutes=15)
+
+def test_concurrent_bookings_never_double_book():
+    engine = BookingEngine(["Bob Smith"])
+    results = []
+
+    def attempt():
+        try:
+            results.append(engine.book("Bob Smith", MONDAY))
+        except SlotUnavailableError:
+            pass
+
+    threads = [threading.Thread(target=attempt) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 1
+
+def test_reschedule_racing_a_cancel_does_not_bring_the_booking_back():
+    engine = BookingEngine(["Bob Smith"])
+    booking = engine.book("Bob Smith", MONDAY)
+    calendar = engine.calendars["Bob Smith"]
+    errors = []
+
+    def reschedule():
+        try:
+            engine.reschedule(booking.booking_id, MONDAY + timedelta(hours=1))
+        except KeyError as e:
+            errors.append(e)
+
+    # Hold the calendar so the reschedule reads the booking, then waits while it is cancelled
+    with calendar.lock:
+        thread = threading.Thread(target=reschedule)
+        thread.start()
+        thread.join(timeout=0.1)
+        engine.cancel(booking.booking_id)
+    thread.join()
+
+    assert len(errors) == 1
+    assert booking.booking_id not in engine.bookings
+    assert len(calendar) == 0
+    with pytest.raises(KeyError):
+        calendar.remove(booking)
+
+def test_parse_when():
+    now = datetime(2026, 10, 19, 10, 7)
+    assert parse_when("book tomorrow at 2pm", now) == datetime(2026, 10, 20, 14, 0)
+    assert parse_when("friday 9:30 am please", now) == datetime(2026, 10, 23, 9, 30)
+    assert parse_when("on 2026-11-02 at 11:00", now) == datetime(2026, 11, 2, 11, 0)
+    assert parse_when("book an appointment", now) is None
+    with pytest.raises(ValueError, match="2026-02-30 is not a valid date"):
+        parse_when("book on 2026-02-30 at 10:00", now)
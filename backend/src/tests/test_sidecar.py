@@ -0,0 +1,51 @@
+import os
+import threading
+from transcription.sidecar import InferenceServer, SidecarWhisperClient
+
+class FakeWhisper:
+    model_size = "tiny"
+    device = "cpu"
+
+    def transcribe_pcm(self, pcm, sample_rate=16000, language=None, task="transcribe", profile=None):
+        return {"text": bytes(pcm).decode("ascii"), "language": language, "sample_rate": sample_rate}
+
+    def transcribe_audio(self, path, language=None, task="transcribe", profile=None):
+        return f"file {os.path.basename(path)}" + (f" ({profile})" if profile else "")
+
+def start_server(tmp_path):
+    socket_path = str(tmp_path / "whisper.sock")
+    server = InferenceServer(socket_path, FakeWhisper())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, socket_path
+
+def test_pcm_travels_through_shared_memory(tmp_path):
+    server, socket_path = start_server(tmp_path)
+    client = SidecarWhisperClient(socket_path)
+    try:
+        assert client.model_size == "tiny"
+        result = client.transcribe_pcm(b"hello", sample_rate=8000, language="de")
+        assert result == {"text": "hello", "language": "de", "sample_rate": 8000}
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+def test_files_and_errors(tmp_path):
+    server, socket_path = start_server(tmp_path)
+    audio = tmp_path / "call.wav"
+    audio.write_bytes(b"RIFF")
+    client = SidecarWhisperClient(socket_path, pool_size=1)
+    try:
+        assert client.transcribe(str(audio)) == "file call.wav"
+        try:
+            client._request({"op": "unknown"})
+            assert False, "expected an error"
+        except Exception as e:
+            assert "Unknown operation" in str(e)
+        # The connection stays usable after a failed request
+        assert client.transcribe(str(audio)) == "file call.wav"
+        assert client.transcribe(str(audio), profile="realtime") == "file call.wav (realtime)"
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from llm.speculation import SIDE_EFFECT, SpeculativeTurn, changed_materially
+from utils.cancellation import CancellationToken, OperationCancelled
+
+
+class FakeAgent:
+    """Answers after `delay` seconds, honouring the token like run_agent does"""
+
+    def __init__(self, delay=0.05, side_effect_for=()):
+        self.delay = delay
+        self.side_effect_for = side_effect_for
+        self.started = []
+        self.cancelled = []
+
+    async def speculate(self, text, token):
+        self.started.append(text)
+        if text in self.side_effect_for:
+            token.cancel(SIDE_EFFECT)
+            raise OperationCancelled(token.reason)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(text)
+            raise
+        token.raise_if_cancelled()
+        return f"answer to {text}"
+
+
+def test_material_change_ignores_case_punctuation_and_fillers():
+    assert not changed_materially("What does my policy cover?", "um, what does my Policy cover")
+    # Appending a word to a short question changes what is asked
+    assert changed_materially("Is my car covered", "Is my car not covered")
+    assert changed_materially("What does my policy", "What does my policy cover for storm damage")
+    # One word in a long sentence is Whisper noise, not a different question
+    long = "I would like to know whether my household insurance covers the water damage in the kitchen"
+    assert not changed_materially(long, long.replace("the water", "a water"))
+    assert changed_materially("", "hello")
+
+
+def test_starts_once_partials_agree_or_the_speaker_pauses():
+    async def scenario():
+        agent = FakeAgent()
+        turn = SpeculativeTurn(agent.speculate, stable_partials=2)
+        assert not turn.update("What does my")
+        assert not turn.update("What does my policy")
+        assert turn.update("what does my policy.")
+        paused = SpeculativeTurn(agent.speculate)
+        assert paused.update("Where do I send the invoice", stable=True)
+        results = await asyncio.gather(turn.resolve("What does my policy?"), paused.resolve("Where do I send the invoice"))
+        return agent, results
+
+    agent, results = asyncio.run(scenario())
+    assert agent.started == ["what does my policy.", "Where do I send the invoice"]
+    assert results == ["answer to what does my policy.", "answer to Where do I send the invoice"]
+
+
+def test_material_change_cancels_and_restarts():
+    async def scenario():
+        agent = FakeAgent(delay=0.2)
+        turn = SpeculativeTurn(agent.speculate)
+        turn.update("Can I book", stable=True)
+        await asyncio.sleep(0.01)
+        # Speech resumed: the stale run is dropped at once, the new text runs once it settles
+        assert not turn.update("Can I book an appointment for")
+        assert turn.update("Can I book an appointment for Monday", stable=True)
+        answer = await turn.resolve("Can I book an appointment for Monday?")
+        return agent, turn, answer
+
+    agent, turn, answer = asyncio.run(scenario())
+    assert agent.cancelled == ["Can I book"]
+    assert turn.restarts == 1
+    assert answer == "answer to Can I book an appointment for Monday"
+
+
+def test_final_transcript_mismatch_or_side_effect_falls_back_to_a_real_run():
+    async def scenario():
+        agent = FakeAgent(delay=0.2, side_effect_for={"File a claim for my car"})
+        changed = SpeculativeTurn(agent.speculate)
+        changed.update("What is my deductible", stable=True)
+        blocked = SpeculativeTurn(agent.speculate)
+        blocked.update("File a claim for my car", stable=True)
+        await asyncio.sleep(0)
+        return agent, await changed.resolve("What is my deductible for glass damage"), await blocked.resolve("File a claim for my car")
+
+    agent, changed, blocked = asyncio.run(scenario())
+    assert changed is None and agent.cancelled == ["What is my deductible"]
+    assert blocked is None
+
+
+def test_finished_speculation_answers_without_waiting():
+    async def scenario():
+        agent = FakeAgent(delay=0.05)
+        turn = SpeculativeTurn(agent.speculate)
+        turn.update("Which department handles travel claims", stable=True)
+        # End-of-speech detection takes longer than the agent
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        answer = await turn.resolve("Which department handles travel claims?")
+        return answer, time.perf_counter() - started
+
+    answer, waited = asyncio.run(scenario())
+    assert answer == "answer to Which department handles travel claims"
+    assert waited < 0.02
+
+
+def test_session_cancellation_stops_speculation():
+    async def scenario():
+        session = CancellationToken()
+        agent = FakeAgent(delay=0.2)
+        turn = SpeculativeTurn(agent.speculate, parent_token=session)
+        turn.update("Do I need a police report", stable=True)
+        await asyncio.sleep(0.01)
+        session.cancel("client disconnected")
+        return turn.token.reason, await turn.resolve("Do I need a police report")
+
+    reason, answer = asyncio.run(scenario())
+    assert reason == "client disconnected"
+    assert answer is None
+
+
+def test_finished_speculations_unlink_from_the_session_token():
+    async def scenario():
+        session = CancellationToken()
+        agent = FakeAgent(delay=0.01)
+        for index in range(20):
+            turn = SpeculativeTurn(agent.speculate, parent_token=session)
+            turn.update(f"question {index}", stable=True)
+            await turn.resolve(f"question {index}")
+        await asyncio.sleep(0)
+        return session
+
+    assert asyncio.run(scenario())._callbacks == []
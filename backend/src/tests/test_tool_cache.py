@@ -0,0 +1,44 @@
+from langchain.tools import Tool
+from insurance.institutes import InstituteDataset
+from insurance.tool_cache import ToolResultCache, normalize_tool_input, with_result_cache
+
+DATA = {"faqs": [], "departments": [], "policies": [{"name": "Car Insurance", "details": "Covers your car."}]}
+
+def counting_tool(name, calls):
+    def run(query):
+        calls.append(query)
+        return f"result for {query}"
+    return Tool.from_function(name=name, func=run, description=name)
+
+def test_inputs_are_normalized():
+    assert normalize_tool_input('  "Car   Insurance?" ') == "car insurance"
+    assert normalize_tool_input("CAR insurance.") == "car insurance"
+
+def test_lru_evicts_least_recently_used():
+    cache = ToolResultCache(maxsize=2)
+    cache.put("a", "v1", 1)
+    cache.put("b", "v1", 2)
+    cache.get("a", "v1")
+    cache.put("c", "v1", 3)
+    assert cache.get("b", "v1") != 2
+    assert cache.get("a", "v1") == 1
+    assert cache.stats()["size"] == 2
+
+def test_read_only_tools_are_cached_until_the_data_changes():
+    dataset = InstituteDataset.from_data(DATA, institute_id="1")
+    current = lambda: dataset
+    calls = []
+    policy_tool, claim_tool = with_result_cache(
+        [counting_tool("policy_tool", calls), counting_tool("claim_tool", calls)], current, ToolResultCache()
+    )
+    policy_tool.func("Car Insurance")
+    policy_tool.func("car insurance?")
+    assert len(calls) == 1
+
+    claim_tool.func("file a claim")
+    claim_tool.func("file a claim")
+    assert len(calls) == 3
+
+    dataset = InstituteDataset("1", DATA, version="reloaded", size_bytes=0)
+    policy_tool.func("Car Insurance")
+    assert len(calls) == 4
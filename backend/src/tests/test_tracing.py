@@ -0,0 +1,97 @@
+import asyncio
+import json
+import os
+import random
+from utils.tracing import Tracer, current_request_id, span, start_span, traced
+
+
+def test_unsampled_requests_get_an_id_but_no_spans(tmp_path):
+    tracer = Tracer(sample_rate=0.0, trace_dir=str(tmp_path))
+    with tracer.start_trace("POST /chat", request_id="abc") as trace:
+        assert trace is None
+        assert current_request_id() == "abc"
+        with span("agent.run") as current:
+            assert current is None
+    assert current_request_id() is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_sample_rate_controls_the_fraction_of_traces(tmp_path):
+    tracer = Tracer(sample_rate=0.25, trace_dir=str(tmp_path), rng=random.Random(7))
+    sampled = sum(tracer.begin("turn") is not None for _ in range(2000))
+    assert 400 < sampled < 600
+
+
+def test_spans_nest_across_threads_and_tasks_and_export_chrome_trace(tmp_path):
+    tracer = Tracer(sample_rate=1.0, trace_dir=str(tmp_path))
+
+    def decode():
+        with span("whisper.transcribe_audio", model_size="base"):
+            pass
+
+    @traced("tool.policy_tool")
+    async def lookup():
+        await asyncio.sleep(0)
+
+    async def request():
+        with tracer.start_trace("POST /transcribe", request_id="req1") as trace:
+            await asyncio.to_thread(decode)
+            with span("agent.run"):
+                await asyncio.gather(lookup(), lookup())
+                llm = start_span("llm.generate")
+                llm.finish()
+            return trace
+
+    trace = asyncio.run(request())
+    spans = {s.name: s for s in trace.spans}
+    root = trace.root
+    assert spans["whisper.transcribe_audio"].parent_id == root.span_id
+    assert spans["llm.generate"].parent_id == spans["agent.run"].span_id
+    assert [s.parent_id for s in trace.spans if s.name == "tool.policy_tool"] == [spans["agent.run"].span_id] * 2
+    # The decode ran on a worker thread, the concurrent lookups in their own tasks
+    assert len({s.lane for s in trace.spans}) >= 3
+
+    [path] = os.listdir(tmp_path)
+    assert "req1" in path
+    with open(tmp_path / path) as f:
+        document = json.load(f)
+    events = [e for e in document["traceEvents"] if e["ph"] == "X"]
+    assert len(events) == len(trace.spans)
+    assert all(e["args"]["request_id"] == "req1" and e["dur"] >= 0 for e in events)
+    assert document["otherData"]["trace_id"] == trace.trace_id
+
+
+def test_errors_are_recorded_and_otlp_export(tmp_path):
+    tracer = Tracer(sample_rate=1.0, trace_dir=str(tmp_path), export_format="otlp")
+    try:
+        with tracer.start_trace("voice_turn"):
+            with span("tool.claim_tool"):
+                raise TimeoutError("claims backend")
+    except TimeoutError:
+        pass
+    [path] = os.listdir(tmp_path)
+    with open(tmp_path / path) as f:
+        spans = json.load(f)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    by_name = {s["name"]: s for s in spans}
+    assert by_name["tool.claim_tool"]["status"] == {"code": 2, "message": "TimeoutError: claims backend"}
+    assert by_name["tool.claim_tool"]["parentSpanId"] == by_name["voice_turn"]["spanId"]
+    assert int(by_name["voice_turn"]["endTimeUnixNano"]) >= int(by_name["tool.claim_tool"]["endTimeUnixNano"])
+
+
+def test_nested_entry_points_share_one_trace(tmp_path):
+    tracer = Tracer(sample_rate=1.0, trace_dir=str(tmp_path))
+    with tracer.start_trace("POST /agent") as outer:
+        with tracer.start_trace("voice_turn") as inner:
+            assert inner is outer
+    assert len(os.listdir(tmp_path)) == 1
+    assert [s.name for s in outer.spans] == ["POST /agent", "voice_turn"]
+
+
+def test_span_cap_counts_dropped_spans(tmp_path):
+    tracer = Tracer(sample_rate=1.0, trace_dir=str(tmp_path), max_spans=3)
+    with tracer.start_trace("turn") as trace:
+        for _ in range(5):
+            with span("llm.generate"):
+                pass
+    assert len(trace.spans) == 3
+    assert trace.dropped_spans == 3
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import numpy as np
+from websocket.server import SessionConfig, VoiceSession
+
+class FakeWebSocket:
+    def __init__(self, messages):
+        self.incoming = list(messages)
+        self.sent = []
+
+    async def receive(self):
+        await asyncio.sleep(0)
+        return self.incoming.pop(0)
+
+    async def send_json(self, event):
+        self.sent.append(event)
+
+class FakeWhisper:
+    def __init__(self):
+        self.profiles = []
+
+    def transcribe_pcm(self, pcm, sample_rate=16000, language=None, cancel_token=None, profile=None):
+        self.profiles.append(profile)
+        return {"text": f"{len(pcm) // 2} samples", "language": "en"}
+
+class FakeExecuter:
+    async def run_agent(self, text, callbacks=None, cancel_token=None):
+        for handler in callbacks:
+            await handler.on_llm_new_token("Hi")
+        return f"answer to {text}"
+
+class FakeAgent:
+    executer = FakeExecuter()
+
+def speech(seconds, amplitude=8000):
+    return {"type": "websocket.receive", "bytes": np.full(int(16000 * seconds), amplitude, dtype="<i2").tobytes()}
+
+def control(**message):
+    return {"type": "websocket.receive", "text": json.dumps(message)}
+
+def test_speech_then_silence_yields_final_transcript_and_answer():
+    websocket = FakeWebSocket([
+        control(type="start", sample_rate=16000),
+        speech(0.5),
+        speech(0.8, amplitude=0),
+        control(type="stop"),
+    ])
+    session = VoiceSession(websocket, FakeWhisper(), FakeAgent, SessionConfig())
+    asyncio.run(session.run())
+    kinds = [event["type"] for event in websocket.sent]
+    assert kinds[0] == "ready"
+    assert {"type": "final", "text": "20800 samples", "language": "en"} in websocket.sent
+    assert kinds.index("token") < kinds.index("answer")
+    assert websocket.sent[-1] == {"type": "answer", "text": "answer to 20800 samples"}
+
+def test_end_utterance_forces_a_final_without_agent():
+    websocket = FakeWebSocket([
+        control(type="start", agent=False),
+        speech(0.2),
+        control(type="end_utterance"),
+        control(type="stop"),
+    ])
+    asyncio.run(VoiceSession(websocket, FakeWhisper(), FakeAgent).run())
+    assert [event["type"] for event in websocket.sent] == ["ready", "final"]
+
+def test_start_selects_the_decode_profile():
+    websocket = FakeWebSocket([
+        control(type="start", agent=False, profile="realtime"),
+        speech(0.2),
+        control(type="end_utterance"),
+        control(type="start", profile="fastest"),
+        control(type="stop"),
+    ])
+    whisper = FakeWhisper()
+    asyncio.run(VoiceSession(websocket, whisper, FakeAgent).run())
+    assert whisper.profiles == ["realtime"]
+    assert any(event["type"] == "error" and "fastest" in event["message"] for event in websocket.sent)
+
+class FailingWhisper:
+    def transcribe_pcm(self, pcm, sample_rate=16000, language=None, cancel_token=None, profile=None):
+        raise RuntimeError("decoder crashed")
+
+def test_failing_transcription_ends_the_session_with_an_error():
+    # Far more audio than the queue holds: the receiver must not be left blocked on it
+    websocket = FakeWebSocket(
+        [control(type="start", agent=False)] + [speech(0.1) for _ in range(200)] + [control(type="stop")]
+    )
+    session = VoiceSession(websocket, FailingWhisper(), FakeAgent, SessionConfig(partial_interval=0.1))
+    asyncio.run(asyncio.wait_for(session.run(), timeout=5))
+    assert websocket.sent[-1] == {"type": "error", "message": "decoder crashed"}
+    assert session.close_code == 1011
+
+def test_invalid_sample_rate_and_odd_frames_are_rejected():
+    websocket = FakeWebSocket([
+        control(type="start", agent=False, sample_rate=0),
+        {"type": "websocket.receive", "bytes": b"\x00\x01\x02"},
+        control(type="stop"),
+    ])
+    session = VoiceSession(websocket, FakeWhisper(), FakeAgent)
+    asyncio.run(session.run())
+    assert session.config.sample_rate == 16000
+    assert [event["type"] for event in websocket.sent] == ["ready", "error", "error"]
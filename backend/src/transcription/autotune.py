@@ -0,0 +1,268 @@
+"""
+Per-host tuning of Whisper's compute type and thread layout
+
+The fastest setup depends on the CPU: int8 kernels pay off on cores with
+VNNI or AVX-512 and can lose to float32 on older ones, and whether one model
+with many threads beats several workers with a few threads each depends on
+the core count and cache sizes. On first start on a host, calibration
+transcribes a short fixed clip with every candidate compute type and thread
+layout, and checks each against the float32 transcript. Among the setups
+within `max_wer` of it, the fastest one wins. The winner is cached per host
+and model, so later starts read it back instead of measuring again.
+
+    python -m transcription.autotune --model-size base [--clip test_audio/test.wav] [--force]
+
+The host key is the CPU model, the number of usable CPUs, the architecture
+and the CTranslate2 version. Containers on the same hardware therefore share
+a profile, and upgrades measure again.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from .batch import cpu_count
+from .evaluation import word_error_rate
+
+COMPUTE_TYPES = ("int8", "int8_float32", "float32")
+# The reference every candidate's transcript is compared with
+BASELINE_COMPUTE_TYPE = "float32"
+DEFAULT_CLIP = "test_audio/test.wav"
+DEFAULT_PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "concierge", "whisper_profiles")
+
+
+@dataclass
+class Trial:
+    compute_type: str
+    cpu_threads: int
+    num_workers: int
+    # Mean seconds per transcription of the clip while every worker is busy
+    latency: float
+    # Seconds of audio transcribed per second, all workers together
+    throughput: float
+    # Word error rate against the float32 transcript
+    wer: float = 0.0
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        return {"compute_type": self.compute_type, "cpu_threads": self.cpu_threads, "num_workers": self.num_workers}
+
+
+def host_fingerprint() -> str:
+    """Key of the hardware and runtime the measurements hold for"""
+    cpu_model = platform.processor()
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    cpu_model = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    try:
+        from importlib.metadata import version
+        runtime = version("ctranslate2")
+    except Exception:
+        runtime = "unknown"
+    key = f"{cpu_model}|{cpu_count()}|{platform.machine()}|{runtime}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def thread_layouts(cpus: int) -> List[Tuple[int, int]]:
+    """(cpu_threads, num_workers) splits of the CPUs: one wide worker down to four narrow ones"""
+    layouts = []
+    for workers in (1, 2, 4):
+        threads = cpus // workers
+        if threads >= 1 and (threads, workers) not in layouts:
+            layouts.append((threads, workers))
+    return layouts
+
+
+def profile_path(profile_dir: str, model_size: str) -> str:
+    return os.path.join(profile_dir, f"{model_size}-{host_fingerprint()}.json")
+
+
+def _run_trial(
+    model_size: str,
+    compute_type: str,
+    cpu_threads: int,
+    num_workers: int,
+    pcm: bytes,
+    repeats: int
+) -> Tuple[float, float, str]:
+    """Load one setup and time it on the clip; returns latency, throughput and the transcript"""
+    from .whisper_manager import WhisperManager
+    manager = WhisperManager(
+        model_size=model_size, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads, num_workers=num_workers
+    )
+    audio_seconds = len(pcm) / 2 / 16000
+
+    def timed(_) -> float:
+        started = time.perf_counter()
+        manager.transcribe_pcm(pcm)
+        return time.perf_counter() - started
+
+    # The first run pays for memory allocation and kernel selection
+    text = manager.transcribe_pcm(pcm)["text"]
+    durations = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        for _ in range(repeats):
+            durations.extend(pool.map(timed, range(num_workers)))
+    wall = time.perf_counter() - started
+    return sum(durations) / len(durations), audio_seconds * len(durations) / wall, text
+
+
+def choose(trials: Sequence[Trial], max_wer: float, objective: str = "latency") -> Optional[Trial]:
+    """The fastest trial within the accuracy budget, by latency or by throughput"""
+    accurate = [trial for trial in trials if trial.wer <= max_wer]
+    if not accurate:
+        return None
+    if objective == "throughput":
+        return max(accurate, key=lambda trial: trial.throughput)
+    return min(accurate, key=lambda trial: trial.latency)
+
+
+def calibrate(
+    model_size: str,
+    pcm: bytes,
+    compute_types: Sequence[str] = COMPUTE_TYPES,
+    layouts: Optional[Sequence[Tuple[int, int]]] = None,
+    max_wer: float = 0.05,
+    objective: str = "latency",
+    repeats: int = 2,
+    run_trial: Optional[Callable[..., Tuple[float, float, str]]] = None,
+    log: Callable[[str], None] = print
+) -> Dict[str, Any]:
+    """
+    Measure every compute type and thread layout on a clip and pick the fastest accurate one
+
+    Args:
+        model_size: Whisper model to tune
+        pcm: The clip as 16 kHz 16-bit mono PCM
+        compute_types: Candidate compute types; float32 is always measured, as the reference
+        layouts: Candidate (cpu_threads, num_workers) splits; all splits of this host's CPUs by default
+        max_wer: Largest word error rate against the float32 transcript that still counts as accurate
+        objective: "latency" for interactive serving, "throughput" for batch work
+        repeats: Timed rounds per setup, each keeping every worker busy once
+        run_trial: Loads and times one setup; returns latency, throughput and transcript (default: real models)
+        log: Receives one line per measured setup
+
+    Returns:
+        Profile with the chosen settings and every trial
+    """
+    layouts = list(layouts or thread_layouts(cpu_count()))
+    run_trial = run_trial or _run_trial
+    # float32 with all threads in one worker goes first: its transcript is the reference
+    order = [BASELINE_COMPUTE_TYPE] + [c for c in compute_types if c != BASELINE_COMPUTE_TYPE]
+    trials: List[Trial] = []
+    reference = None
+    for compute_type in order:
+        for cpu_threads, num_workers in layouts:
+            latency, throughput, text = run_trial(model_size, compute_type, cpu_threads, num_workers, pcm, repeats)
+            if reference is None:
+                reference = text
+            trial = Trial(compute_type, cpu_threads, num_workers, latency, throughput, word_error_rate(reference, text))
+            trials.append(trial)
+            log(
+                f"{compute_type:<13} {cpu_threads:>3} threads x {num_workers} workers: "
+                f"{latency * 1000:>7.0f} ms  {throughput:>6.1f}x realtime  WER {trial.wer:.3f}"
+            )
+    best = choose(trials, max_wer, objective)
+    return {
+        "model_size": model_size,
+        "host": host_fingerprint(),
+        "objective": objective,
+        "max_wer": max_wer,
+        "reference": reference,
+        "settings": best.settings if best is not None else {},
+        "trials": [asdict(trial) for trial in trials],
+        "created": time.time()
+    }
+
+
+def read_clip(path: str) -> bytes:
+    """A clip in any format ffmpeg reads, as 16 kHz 16-bit mono PCM"""
+    import numpy as np
+    from faster_whisper import decode_audio
+    audio = decode_audio(path, sampling_rate=16000)
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def _cuda_available() -> bool:
+    import torch
+    return torch.cuda.is_available()
+
+
+def tuned_settings(
+    model_size: str,
+    device: str = "auto",
+    clip: str = DEFAULT_CLIP,
+    profile_dir: str = DEFAULT_PROFILE_DIR,
+    max_wer: float = 0.05,
+    objective: str = "latency",
+    force: bool = False
+) -> Dict[str, Any]:
+    """
+    WhisperManager settings for this host: the cached profile, or a new calibration
+
+    Returns an empty dict, i.e. the defaults, on GPUs (the candidates are CPU
+    compute types) and when the clip is missing. Processes starting together
+    take a lock on the profile, so one calibrates and the others read its result.
+    A cached profile keeps every trial, so another max_wer or objective is
+    chosen from it without measuring again.
+    """
+    if device == "cuda" or (device == "auto" and _cuda_available()):
+        return {}
+    path = profile_path(profile_dir, model_size)
+    os.makedirs(profile_dir, exist_ok=True)
+    import fcntl
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(path) and not force:
+            with open(path, encoding="utf-8") as f:
+                profile = json.load(f)
+            best = choose([Trial(**trial) for trial in profile["trials"]], max_wer, objective)
+            return best.settings if best is not None else {}
+        if not os.path.exists(clip):
+            print(f"Whisper auto-tuning skipped: calibration clip not found at {clip}")
+            return {}
+        print(f"Calibrating Whisper '{model_size}' for this host on {clip}...")
+        profile = calibrate(model_size, read_clip(clip), max_wer=max_wer, objective=objective)
+        profile["clip"] = clip
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(profile, f, indent=2)
+        os.replace(temporary, path)
+        print(f"Whisper profile for this host: {profile['settings'] or 'defaults (no accurate setup)'}")
+        return profile["settings"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Whisper compute types and thread layouts on this host")
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--clip", default=DEFAULT_CLIP, help="Short speech clip used for timing and the accuracy check")
+    parser.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR)
+    parser.add_argument("--max-wer", type=float, default=0.05)
+    parser.add_argument("--objective", choices=["latency", "throughput"], default="latency")
+    parser.add_argument("--force", action="store_true", help="Measure again even if a profile is cached")
+    args = parser.parse_args()
+
+    settings = tuned_settings(
+        args.model_size,
+        device="cpu",
+        clip=args.clip,
+        profile_dir=args.profile_dir,
+        force=args.force,
+        max_wer=args.max_wer,
+        objective=args.objective
+    )
+    print(json.dumps(settings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Batch transcription of recorded call archives
+
+    python -m transcription.batch /archive/2024-05-01 --output calls.jsonl
+    python -m transcription.batch files.txt --output calls.jsonl --threads-per-worker 2
+
+The input is a directory (searched recursively for audio files) or a
+manifest: a text file with one path per line, or JSONL lines with a "path"
+field. Relative manifest paths are relative to the manifest.
+
+Files are spread over a process pool sized to the CPUs. Each worker loads its
+own model and decodes with a few threads, which keeps more cores busy than one
+model with many threads. Segments are appended to the output as each file
+finishes, one JSON line per segment.
+
+Progress goes to a checkpoint manifest next to the output. A file is marked
+done only after its segments are on disk. A rerun with the same output skips
+files that are already done and retries failed ones, so an interrupted
+nightly run picks up where it stopped. A worker process that dies takes the
+pool's in-flight files with it: they are marked failed and the run goes on
+with a new pool.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from .profiles import PROFILES
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".flac", ".ogg", ".opus", ".m4a", ".webm"}
+# New process pools started after worker crashes before the run gives up
+MAX_POOL_RESTARTS = 3
+
+# The worker process's model and decode profile, set once by _init_worker
+_worker_manager = None
+_worker_profile = None
+
+
+@dataclass
+class BatchReport:
+    files: int = 0
+    skipped: int = 0
+    failed: int = 0
+    audio_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    @property
+    def audio_hours_per_hour(self) -> float:
+        """Hours of audio transcribed per wall-clock hour"""
+        return self.audio_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+
+def cpu_count() -> int:
+    """CPUs this process may run on (the container's share, not the host's)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def list_inputs(source: str) -> List[str]:
+    """Absolute paths of the audio files in a directory or listed in a manifest"""
+    if os.path.isdir(source):
+        paths = []
+        for root, _, names in os.walk(source):
+            paths.extend(
+                os.path.join(root, name) for name in names
+                if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS
+            )
+        return sorted(os.path.abspath(path) for path in paths)
+
+    base = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path = json.loads(line)["path"] if line.startswith("{") else line
+            paths.append(os.path.abspath(os.path.join(base, path)))
+    return paths
+
+
+def load_checkpoint(checkpoint_path: str, output_path: str) -> Set[str]:
+    """
+    Files already transcribed by earlier runs
+
+    Whenever a checkpoint exists, the output is cut back to the end of the
+    last file it marks as done (to empty if none is), which drops segments of
+    files that were being written when the run stopped; those files are
+    transcribed again.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(checkpoint_path):
+        return done
+    offset = 0
+    with open(checkpoint_path, "r+b") as f:
+        content = f.read()
+        # Drop a line cut short by the interruption, so new entries start on a line of their own
+        complete = content.rfind(b"\n") + 1
+        f.truncate(complete)
+    for line in content[:complete].splitlines():
+        entry = json.loads(line)
+        if entry["status"] == "done":
+            done.add(entry["path"])
+            offset = max(offset, entry["output_offset"])
+    if os.path.exists(output_path) and os.path.getsize(output_path) > offset:
+        with open(output_path, "r+b") as f:
+            f.truncate(offset)
+    return done
+
+
+def _init_worker(model_size: str, threads: int, profile: str) -> None:
+    # CTranslate2 takes its CPU thread count from OMP_NUM_THREADS when the model loads
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    from transcription.whisper_manager import WhisperManager
+    global _worker_manager, _worker_profile
+    _worker_manager = WhisperManager(model_size=model_size, device="cpu")
+    _worker_profile = profile
+
+
+def _transcribe_file(path: str, language: Optional[str]) -> Dict[str, Any]:
+    return _worker_manager.transcribe_segments(path, language=language, profile=_worker_profile)
+
+
+def run_batch(
+    paths: Iterable[str],
+    output_path: str,
+    checkpoint_path: str,
+    workers: int,
+    transcribe: Callable[[str, Optional[str]], Dict[str, Any]] = _transcribe_file,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+    language: Optional[str] = None,
+    log: Callable[[str], None] = print
+) -> BatchReport:
+    """
+    Transcribe files on a process pool, appending segments and checkpointing as files finish
+
+    Args:
+        paths: Audio files to transcribe
+        output_path: JSONL file the segments are appended to
+        checkpoint_path: JSONL progress manifest used to resume
+        workers: Worker processes
+        transcribe: Runs in a worker; returns segments, language and duration of one file
+        initializer: Runs once per worker, e.g. to load the model
+        initargs: Arguments of the initializer
+        language: Language code passed to every transcription (optional)
+        log: Receives one progress line per finished file
+
+    Returns:
+        Counts and throughput of this run
+    """
+    done = load_checkpoint(checkpoint_path, output_path)
+    paths = list(paths)
+    pending = [path for path in paths if path not in done]
+    report = BatchReport(skipped=len(paths) - len(pending))
+    if report.skipped:
+        log(f"Resuming: {report.skipped} of {len(paths)} files already done")
+
+    started = time.perf_counter()
+    # Create the checkpoint up front, so a rerun after an interruption before the first
+    # finished file still knows to drop that run's partial output
+    with open(output_path, "ab") as output, open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+        queued = deque(pending)
+        running: Dict[Future, str] = {}
+        restarts = 0
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+
+        def record(entry: Dict[str, Any]) -> None:
+            checkpoint.write(json.dumps(entry) + "\n")
+            checkpoint.flush()
+
+        def fail(path: str, error: str) -> None:
+            report.failed += 1
+            record({"path": path, "status": "failed", "error": error})
+            log(f"[{report.files + report.failed}/{len(pending)}] FAILED {path}: {error}")
+
+        def submit() -> bool:
+            """Keep a couple of files per worker in flight, not the whole archive; False once the pool is broken"""
+            while len(running) < workers * 2 and queued:
+                path = queued.popleft()
+                try:
+                    running[pool.submit(transcribe, path, language)] = path
+                except BrokenProcessPool:
+                    queued.appendleft(path)
+                    return False
+            return True
+
+        try:
+            healthy = submit()
+            while running or queued:
+                if healthy:
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                else:
+                    finished = set()
+                for future in finished:
+                    path = running.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        healthy = False
+                        fail(path, "worker process died")
+                        continue
+                    except Exception as e:
+                        fail(path, str(e))
+                        continue
+                    for segment in result["segments"]:
+                        line = {"file": path, "language": result["language"], **segment}
+                        output.write(json.dumps(line, ensure_ascii=False).encode("utf-8") + b"\n")
+                    output.flush()
+                    os.fsync(output.fileno())
+                    report.files += 1
+                    report.audio_seconds += result["duration"]
+                    record({
+                        "path": path,
+                        "status": "done",
+                        "audio_seconds": result["duration"],
+                        "segments": len(result["segments"]),
+                        "output_offset": output.tell()
+                    })
+                    log(
+                        f"[{report.files + report.failed}/{len(pending)}] {path}: "
+                        f"{result['duration']:.1f}s audio, {len(result['segments'])} segments"
+                    )
+                if not healthy:
+                    # A dead worker takes the whole pool and every file in flight with it; those files
+                    # are marked failed (a rerun retries them) and the rest continue on a new pool
+                    for path in running.values():
+                        fail(path, "worker process died")
+                    running.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    restarts += 1
+                    if restarts > MAX_POOL_RESTARTS:
+                        raise RuntimeError(
+                            f"Worker processes died {restarts} times; stopping. Finished files are checkpointed"
+                        )
+                    log(f"Worker process died; starting a new pool ({restarts}/{MAX_POOL_RESTARTS})")
+                    pool = ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+                healthy = submit()
+        except KeyboardInterrupt:
+            log("Interrupted; finished files are checkpointed, rerun the same command to resume")
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            report.wall_seconds = time.perf_counter() - started
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe a directory or manifest of recorded calls")
+    parser.add_argument("source", help="Directory of audio files, or a manifest listing them")
+    parser.add_argument("--output", required=True, help="JSONL file the segments are appended to")
+    parser.add_argument("--checkpoint", help="Progress manifest (default: <output>.checkpoint.jsonl)")
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--profile", choices=list(PROFILES), default="archive", help="Decode profile")
+    parser.add_argument("--threads-per-worker", type=int, default=2, help="CPU threads of each worker's model")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPUs / threads per worker)")
+    args = parser.parse_args()
+
+    workers = args.workers or max(1, cpu_count() // args.threads_per_worker)
+    checkpoint = args.checkpoint or f"{args.output}.checkpoint.jsonl"
+    paths = list_inputs(args.source)
+    print(
+        f"{len(paths)} files, {workers} workers x {args.threads_per_worker} threads, "
+        f"model '{args.model_size}', profile '{args.profile}'"
+    )
+    try:
+        report = run_batch(
+            paths,
+            args.output,
+            checkpoint,
+            workers,
+            initializer=_init_worker,
+            initargs=(args.model_size, args.threads_per_worker, args.profile),
+            language=args.language
+        )
+    except KeyboardInterrupt:
+        sys.exit(130)
+    print(
+        f"Transcribed {report.files} files ({report.skipped} already done, {report.failed} failed): "
+        f"{report.audio_seconds / 3600:.2f} audio hours in {report.wall_seconds / 3600:.2f} wall hours, "
+        f"{report.audio_hours_per_hour:.1f} audio-hours per hour"
+    )
+    if report.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Adaptive end-of-turn detection
+
+Fixed thresholds fail in both directions: a line noisier than the silence
+threshold never ends a turn, and a fixed hangover either cuts off callers who
+pause mid-sentence or makes everyone wait. AdaptiveEndpointer tracks, per
+stream:
+
+- the noise floor, as the minimum frame level over a sliding window
+  (minimum statistics), so it follows the line within seconds, even during
+  speech
+- the speech level, as an average over frames classified as speech
+- the silence threshold, placed between the two
+- the hangover (the trailing silence that ends a turn), from the pauses this
+  caller makes inside turns and from the signal-to-noise ratio
+
+It is fed frame levels and emits speech_start, pause and end_of_turn events.
+End-of-turn events carry a confidence.
+"""
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional, Sequence
+
+SILENT_DB = -100.0
+# Shorter gaps are between syllables or words, not pauses
+MIN_PAUSE = 0.15
+
+
+def level_db(rms: float) -> float:
+    """RMS on the -1..1 scale in dBFS"""
+    return 20 * math.log10(rms) if rms > 1e-5 else SILENT_DB
+
+
+def frame_rms(samples: Sequence[float]) -> float:
+    """RMS of float samples on the -1..1 scale (numpy arrays or plain sequences)"""
+    if len(samples) == 0:
+        return 0.0
+    try:
+        import numpy as np
+        return float(np.sqrt(np.mean(np.square(np.asarray(samples, dtype=np.float64)))))
+    except ImportError:
+        return math.sqrt(sum(x * x for x in samples) / len(samples))
+
+
+def _ema(current: float, target: float, seconds: float, tau: float) -> float:
+    return current + (target - current) * (1 - math.exp(-seconds / tau))
+
+
+@dataclass
+class EndpointEvent:
+    # "speech_start", "pause" or "end_of_turn"
+    kind: str
+    # Stream time in seconds at which the event was detected
+    at: float
+    speech_seconds: float
+    silence_seconds: float
+    # How sure the endpointer is that the turn is over (end_of_turn only)
+    confidence: float = 0.0
+    # "silence" or "max_length" for end_of_turn
+    reason: str = ""
+
+
+class AdaptiveEndpointer:
+    """Per-stream endpointer; create one per microphone, call or WebSocket session"""
+
+    def __init__(
+        self,
+        base_hangover: float = 0.9,
+        min_hangover: float = 0.35,
+        max_hangover: float = 1.2,
+        min_speech: float = 0.3,
+        max_turn: float = 30.0,
+        pause: float = 0.2,
+        prior_pauses: int = 3,
+        onset: float = 0.06,
+        floor_window: float = 2.0,
+        threshold_ratio: float = 0.35,
+        min_margin_db: float = 6.0,
+        max_margin_db: float = 18.0,
+        hysteresis_db: float = 3.0,
+        initial_floor_db: float = -60.0,
+        initial_snr_db: float = 25.0
+    ):
+        """
+        Configure the endpointer
+
+        Args:
+            base_hangover: Trailing silence that ends a turn before this caller's pauses are known
+            min_hangover: Lower bound of the adapted hangover
+            max_hangover: Upper bound of the adapted hangover
+            min_speech: Speech needed before a turn can end on silence
+            max_turn: Turn length at which the turn is ended regardless of silence
+            pause: Trailing silence that emits a pause event, once per pause
+            prior_pauses: Weight of base_hangover, in pauses, against the pauses learned from the caller
+            onset: Time above the threshold before a turn starts, so clicks do not start turns
+            floor_window: Seconds of history the noise floor is the minimum of
+            threshold_ratio: Position of the threshold between the noise floor (0) and speech level (1)
+            min_margin_db: Threshold is at least this far above the noise floor
+            max_margin_db: Threshold is at most this far above the noise floor
+            hysteresis_db: Threshold is lowered by this much while speech continues
+            initial_floor_db: Noise floor assumed until one has been measured
+            initial_snr_db: Speech level above the floor assumed until speech has been heard
+        """
+        self.base_hangover = base_hangover
+        self.min_hangover = min_hangover
+        self.max_hangover = max_hangover
+        self.min_speech = min_speech
+        self.max_turn = max_turn
+        self.pause = pause
+        self.prior_pauses = prior_pauses
+        self.onset = onset
+        self.threshold_ratio = threshold_ratio
+        self.min_margin_db = min_margin_db
+        self.max_margin_db = max_margin_db
+        self.hysteresis_db = hysteresis_db
+
+        # Minimum statistics: the minimum of each block of floor_window / BLOCKS seconds
+        self._block_seconds = floor_window / 10
+        self._blocks: Deque[float] = deque(maxlen=10)
+        self._block_min = math.inf
+        self._block_elapsed = 0.0
+        self._block_frames = 0
+        self.noise_floor_db = initial_floor_db
+        self.speech_level_db = initial_floor_db + initial_snr_db
+        self._heard_speech = False
+        # Typical pause inside a turn for this caller and its spread; None until one has been observed
+        self.pause_seconds: Optional[float] = None
+        self.pause_spread = 0.0
+        self.pauses_heard = 0
+
+        self.time = 0.0
+        self.in_turn = False
+        self.speech_seconds = 0.0
+        self.silence_seconds = 0.0
+        self._onset_seconds = 0.0
+        self._speaking = False
+        self._pause_emitted = False
+        self._longest_pause = 0.0
+
+    @property
+    def snr_db(self) -> float:
+        return self.speech_level_db - self.noise_floor_db
+
+    @property
+    def threshold_db(self) -> float:
+        margin = self.threshold_ratio * self.snr_db
+        return self.noise_floor_db + min(self.max_margin_db, max(self.min_margin_db, margin))
+
+    @property
+    def hangover(self) -> float:
+        """Trailing silence that currently ends a turn"""
+        hangover = self.base_hangover
+        if self.pause_seconds is not None:
+            # Long enough to outlast nearly all of this caller's pauses; a few pauses
+            # say little about the spread, so lean on the base hangover until more are heard
+            learned = self.pause_seconds + 2.5 * self.pause_spread + 0.15
+            weight = self.pauses_heard / (self.pauses_heard + self.prior_pauses)
+            hangover = weight * learned + (1 - weight) * self.base_hangover
+        # Within a turn, wait out at least the longest pause the caller has already made
+        hangover = max(hangover, self._longest_pause * 1.2)
+        # Low SNR makes the speech/silence decision less reliable: wait up to 40% longer
+        hangover *= 1 + 0.4 * min(1.0, max(0.0, (15 - self.snr_db) / 10))
+        return min(self.max_hangover, max(self.min_hangover, hangover))
+
+    def _track_floor(self, level: float, seconds: float) -> None:
+        self._block_min = min(self._block_min, level)
+        self._block_elapsed += seconds
+        self._block_frames += 1
+        first = False
+        if self._block_elapsed >= self._block_seconds:
+            # The first measurement replaces the assumed floor, unless a frame or two was all there was to go by
+            first = not self._blocks and self._block_frames >= 3
+            self._blocks.append(self._block_min)
+            self._block_min = math.inf
+            self._block_elapsed = 0.0
+            self._block_frames = 0
+        minimum = min(min(self._blocks, default=math.inf), self._block_min)
+        if minimum == math.inf:
+            return
+        # The minimum of noisy frames sits below the noise mean; minimum statistics corrects by a few dB
+        target = minimum + 3.0
+        if first or target < self.noise_floor_db:
+            self.noise_floor_db = target
+        else:
+            self.noise_floor_db = _ema(self.noise_floor_db, target, seconds, 0.3)
+
+    def update(self, rms: float, seconds: float, voiced: Optional[bool] = None) -> Optional[EndpointEvent]:
+        """
+        Feed one frame
+
+        Args:
+            rms: Frame RMS on the -1..1 scale (see `frame_rms`)
+            seconds: Frame duration
+            voiced: Optional decision of a voice activity detector; speech needs both energy and voicing
+
+        Returns:
+            The event this frame triggered, if any
+        """
+        self.time += seconds
+        level = level_db(rms)
+        self._track_floor(level, seconds)
+        threshold = self.threshold_db - (self.hysteresis_db if self._speaking else 0.0)
+        # Until the line has been measured for a moment, its noise would pass for speech
+        speech = level > threshold and voiced is not False and len(self._blocks) > 0
+
+        if speech:
+            self._speaking = True
+            self._onset_seconds += seconds
+            if not self._heard_speech:
+                self.speech_level_db = level
+                self._heard_speech = True
+            else:
+                self.speech_level_db = _ema(self.speech_level_db, level, seconds, 1.5)
+            if not self.in_turn:
+                if self._onset_seconds < self.onset:
+                    return None
+                self.in_turn = True
+                self.speech_seconds = self._onset_seconds
+                self.silence_seconds = 0.0
+                self._longest_pause = 0.0
+                self._pause_emitted = False
+                return EndpointEvent("speech_start", self.time, self.speech_seconds, 0.0)
+            if self.silence_seconds >= MIN_PAUSE:
+                # Speech resumed: that silence was a pause inside the turn, learn from it
+                self._learn_pause(self.silence_seconds)
+            self.speech_seconds += seconds + self.silence_seconds
+            self.silence_seconds = 0.0
+            self._pause_emitted = False
+        else:
+            self._speaking = False
+            self._onset_seconds = 0.0
+            if not self.in_turn:
+                return None
+            self.silence_seconds += seconds
+
+        if self.speech_seconds + self.silence_seconds >= self.max_turn:
+            return self._end("max_length", 0.0)
+        if speech:
+            return None
+        hangover = self.hangover
+        if self.silence_seconds >= hangover and self.speech_seconds >= self.min_speech:
+            return self._end("silence", self._confidence(hangover))
+        if self.silence_seconds >= self.pause and not self._pause_emitted:
+            self._pause_emitted = True
+            return EndpointEvent("pause", self.time, self.speech_seconds, self.silence_seconds)
+        return None
+
+    def _learn_pause(self, pause: float) -> None:
+        self._longest_pause = max(self._longest_pause, pause)
+        self.pauses_heard += 1
+        if self.pause_seconds is None:
+            self.pause_seconds = pause
+            self.pause_spread = pause / 3
+            return
+        self.pause_spread = 0.85 * self.pause_spread + 0.15 * abs(pause - self.pause_seconds)
+        self.pause_seconds = 0.85 * self.pause_seconds + 0.15 * pause
+
+    def _confidence(self, hangover: float) -> float:
+        # Silence well past anything the caller paused for, on a clean line, is a confident end
+        reference = max(self._longest_pause, self.pause_seconds or 0.0, 0.1)
+        by_silence = min(1.0, self.silence_seconds / (reference * 2))
+        by_snr = min(1.0, max(0.0, (self.snr_db - self.min_margin_db) / 20))
+        return round(by_silence * (0.6 + 0.4 * by_snr), 3)
+
+    def _end(self, reason: str, confidence: float) -> EndpointEvent:
+        event = EndpointEvent("end_of_turn", self.time, self.speech_seconds, self.silence_seconds, confidence, reason)
+        self.in_turn = False
+        self.speech_seconds = 0.0
+        self.silence_seconds = 0.0
+        self._onset_seconds = 0.0
+        self._pause_emitted = False
+        self._longest_pause = 0.0
+        return event
+
+    def reset_turn(self) -> None:
+        """Forget the current turn (e.g. after the client forced an end); line statistics are kept"""
+        self.in_turn = False
+        self.speech_seconds = 0.0
+        self.silence_seconds = 0.0
+        self._onset_seconds = 0.0
+        self._pause_emitted = False
+        self._longest_pause = 0.0
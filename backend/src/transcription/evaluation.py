@@ -0,0 +1,32 @@
+"""
+Transcript accuracy measures
+"""
+import re
+from typing import List
+
+WORDS = re.compile(r"\w+")
+
+
+def normalize_words(text: str) -> List[str]:
+    """Lowercase words without punctuation, so only recognition errors count"""
+    return WORDS.findall(text.lower())
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    Word error rate of a hypothesis against a reference transcript
+
+    Substitutions, deletions and insertions divided by the reference length;
+    above 1 when the hypothesis inserts more words than the reference has.
+    """
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return float(len(hyp) > 0)
+    # Levenshtein distance over words, one row at a time
+    previous = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        current = [i]
+        for j, other in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other)))
+        previous = current
+    return previous[-1] / len(ref)
@@ -0,0 +1,66 @@
+"""
+Named decode settings trading accuracy for latency
+
+faster-whisper's defaults (beam search over 5 hypotheses, a temperature
+fallback ladder, conditioning on the previous window's text and timestamp
+tokens) suit long recordings. A conversational turn is a few seconds long:
+the fallback ladder can decode the same audio six times, and timestamps and
+conditioning buy nothing within a single 30 s window.
+
+- realtime: greedy, one temperature, no timestamps. For partial transcripts
+  and latency-critical turns.
+- balanced: a narrow beam, a short fallback ladder, no timestamps. For final
+  transcripts of turns.
+- archive: faster-whisper's defaults plus voice-activity filtering. For
+  recorded calls where segment timestamps and accuracy matter more than time.
+
+Measured with `python -m benchmarks.bench_decode_profiles`.
+"""
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple, Union
+
+
+@dataclass(frozen=True)
+class DecodeProfile:
+    name: str
+    beam_size: int
+    best_of: int
+    # A single temperature means no fallback; a tuple retries hotter when a window's decode looks broken
+    temperature: Union[float, Tuple[float, ...]]
+    condition_on_previous_text: bool
+    without_timestamps: bool
+    vad_filter: bool = False
+
+    def options(self) -> Dict[str, Any]:
+        """Keyword arguments for WhisperModel.transcribe"""
+        options = asdict(self)
+        del options["name"]
+        return options
+
+
+REALTIME = DecodeProfile(
+    "realtime", beam_size=1, best_of=1, temperature=0.0, condition_on_previous_text=False, without_timestamps=True
+)
+BALANCED = DecodeProfile(
+    "balanced", beam_size=2, best_of=2, temperature=(0.0, 0.4, 0.8), condition_on_previous_text=False,
+    without_timestamps=True
+)
+ARCHIVE = DecodeProfile(
+    "archive", beam_size=5, best_of=5, temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0), condition_on_previous_text=True,
+    without_timestamps=False, vad_filter=True
+)
+PROFILES: Dict[str, DecodeProfile] = {profile.name: profile for profile in (REALTIME, BALANCED, ARCHIVE)}
+
+
+def get_profile(name: str) -> DecodeProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown decode profile: {name} (choose from {', '.join(PROFILES)})")
+
+
+def decode_options(profile: Optional[str], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """The profile's options with explicit keyword arguments taking precedence; no profile keeps the model defaults"""
+    if profile is None:
+        return dict(overrides)
+    return {**get_profile(profile).options(), **overrides}
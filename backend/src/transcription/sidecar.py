@@ -0,0 +1,236 @@
+"""
+Inference sidecar: one process owns the Whisper model for every API worker
+
+    python -m transcription.sidecar --socket /tmp/concierge_whisper.sock --model-size base
+
+API workers started with CONCIERGE_TRANSCRIPTION_BACKEND=sidecar talk to it
+through SidecarWhisperClient instead of loading their own model. Audio samples
+are written into a POSIX shared-memory segment and only the segment name
+crosses the socket. Requests and responses are single JSON lines on a Unix
+domain socket.
+
+Request:  {"op": "transcribe_pcm", "shm": name, "pid": client_pid, "nbytes": n, "sample_rate": 16000, "language": null, "task": "transcribe", "profile": null}
+          {"op": "transcribe_file", "path": "/abs/path.wav", "language": null, "task": "transcribe", "profile": null}
+          {"op": "ping"}
+Response: {"ok": true, "result": ...} or {"ok": false, "error": "..."}
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import tempfile
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Optional
+from utils.cancellation import CancellationToken
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "concierge_whisper.sock")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: "InferenceServer"
+
+    def handle(self) -> None:
+        # One connection carries many requests; the client keeps it open
+        for line in self.rfile:
+            try:
+                response = {"ok": True, "result": self.server.dispatch(json.loads(line))}
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix-socket server that runs transcriptions on a single shared model"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, whisper_manager, max_concurrency: int = 2):
+        """
+        Bind the socket
+
+        Args:
+            socket_path: Filesystem path of the Unix socket
+            whisper_manager: Loaded WhisperManager shared by all connections
+            max_concurrency: Transcriptions decoded at the same time; the rest wait
+        """
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.whisper_manager = whisper_manager
+        self.slots = threading.Semaphore(max_concurrency)
+        super().__init__(socket_path, _RequestHandler)
+
+    def dispatch(self, request: Dict[str, Any]) -> Any:
+        op = request.get("op")
+        if op == "ping":
+            return {"model_size": self.whisper_manager.model_size, "device": self.whisper_manager.device}
+        if op == "transcribe_pcm":
+            shm = shared_memory.SharedMemory(name=request["shm"])
+            if request.get("pid") != os.getpid():
+                # The client owns the segment; without this our tracker would unlink it when we exit
+                resource_tracker.unregister(shm._name, "shared_memory")
+            try:
+                with shm.buf[:request["nbytes"]] as pcm, self.slots:
+                    return self.whisper_manager.transcribe_pcm(
+                        pcm,
+                        sample_rate=request.get("sample_rate", 16000),
+                        language=request.get("language"),
+                        task=request.get("task", "transcribe"),
+                        profile=request.get("profile")
+                    )
+            finally:
+                shm.close()
+        if op == "transcribe_file":
+            with self.slots:
+                return self.whisper_manager.transcribe_audio(
+                    request["path"],
+                    language=request.get("language"),
+                    task=request.get("task", "transcribe"),
+                    profile=request.get("profile")
+                )
+        raise ValueError(f"Unknown operation: {op}")
+
+
+class SidecarWhisperClient:
+    """
+    Drop-in for WhisperManager in API workers, backed by the inference sidecar
+
+    Keeps a small pool of persistent socket connections; each request holds one
+    connection for its round trip, so calls are safe from any thread.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, pool_size: int = 4, timeout: float = 120.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._pool: "queue.Queue[Optional[socket.socket]]" = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(None)
+        info = self._request({"op": "ping"})
+        self.model_size = info["model_size"]
+        self.device = info["device"]
+
+    def _connect(self) -> socket.socket:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(self.timeout)
+        conn.connect(self.socket_path)
+        return conn
+
+    def _request(self, request: Dict[str, Any]) -> Any:
+        conn = self._pool.get()
+        try:
+            if conn is None:
+                conn = self._connect()
+            conn.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            buffer = b""
+            while not buffer.endswith(b"\n"):
+                chunk = conn.recv(65536)
+                if not chunk:
+                    raise ConnectionError("Inference sidecar closed the connection")
+                buffer += chunk
+        except Exception:
+            if conn is not None:
+                conn.close()
+            # Hand back an empty slot; the next request reconnects
+            self._pool.put(None)
+            raise
+        self._pool.put(conn)
+        response = json.loads(buffer)
+        if not response["ok"]:
+            raise Exception(f"Inference sidecar error: {response['error']}")
+        return response["result"]
+
+    def transcribe_pcm(
+        self,
+        pcm: bytes,
+        sample_rate: int = 16000,
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        cancel_token: Optional[CancellationToken] = None,
+        profile: Optional[str] = None
+    ) -> Dict[str, Any]:
+        # A decode already running in the sidecar is not interrupted; cancellation skips the round trip
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        shm = shared_memory.SharedMemory(create=True, size=max(len(pcm), 1))
+        try:
+            shm.buf[:len(pcm)] = pcm
+            return self._request({
+                "op": "transcribe_pcm",
+                "shm": shm.name,
+                "pid": os.getpid(),
+                "nbytes": len(pcm),
+                "sample_rate": sample_rate,
+                "language": language,
+                "task": task,
+                "profile": profile
+            })
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def transcribe_audio(
+        self,
+        audio_path: str,
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        cancel_token: Optional[CancellationToken] = None,
+        profile: Optional[str] = None
+    ) -> str:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        # Same host: the sidecar reads the file itself, no audio crosses the socket
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        return self._request({
+            "op": "transcribe_file",
+            "path": os.path.abspath(audio_path),
+            "language": language,
+            "task": task,
+            "profile": profile
+        })
+
+    def transcribe(
+        self, audio_path: str, cancel_token: Optional[CancellationToken] = None, profile: Optional[str] = None
+    ) -> str:
+        return self.transcribe_audio(audio_path, cancel_token=cancel_token, profile=profile)
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            conn = self._pool.get_nowait()
+            if conn is not None:
+                conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Whisper inference sidecar")
+    parser.add_argument("--socket", default=os.environ.get("CONCIERGE_SIDECAR_SOCKET", DEFAULT_SOCKET))
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--device", default="auto")
+    parser.add_argument("--max-concurrency", type=int, default=2)
+    parser.add_argument("--compute-type", default=None)
+    parser.add_argument("--cpu-threads", type=int, default=0)
+    parser.add_argument("--autotune", action="store_true", help="Use the fastest accurate setup measured on this host")
+    args = parser.parse_args()
+
+    from .whisper_manager import WhisperManager
+    settings = {"compute_type": args.compute_type, "cpu_threads": args.cpu_threads, "num_workers": args.max_concurrency}
+    if args.autotune:
+        from .autotune import tuned_settings
+        settings.update(tuned_settings(args.model_size, args.device))
+    manager = WhisperManager(model_size=args.model_size, device=args.device, **settings)
+    server = InferenceServer(args.socket, manager, args.max_concurrency)
+    print(f"Inference sidecar serving {args.model_size} on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,55 @@
-from faster_whisper import WhisperModel
-from typing import Optional, Dict, Any
-import torch
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterable, List
+import numpy as np
 import os
+import time
 from pathlib import Path
+from utils.cancellation import CancellationToken, OperationCancelled, record_savings
+from utils.metrics import pipeline_stage, registry
+from utils.tracing import span
+from .profiles import decode_options
+
+if TYPE_CHECKING:
+    from faster_whisper import WhisperModel
 
 class WhisperManager:
-    def __init__(self, model_size: str = "base", device: str = "auto"):
+    def __init__(
+        self,
+        model_size: str = "base",
+        device: str = "auto",
+        compute_type: Optional[str] = None,
+        cpu_threads: int = 0,
+        num_workers: int = 1
+    ):
         """
         Initialize the WhisperX manager
         
         Args:
             model_size: Size of the model to use (tiny, base, small, medium, large)
             device: Device to run the model on (auto, cpu, cuda)
+            compute_type: Weight and activation precision (int8, int8_float32, float32, float16, ...);
+                float16 on CUDA and float32 otherwise when not given
+            cpu_threads: Threads of each worker on CPU; 0 leaves it to OMP_NUM_THREADS or CTranslate2's default
+            num_workers: Transcriptions the model can run in parallel from different threads
         """
         self.model_size = model_size
         self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
         self.model = self._load_model()
         
-    def _load_model(self) -> WhisperModel:
+    def _load_model(self) -> "WhisperModel":
         """Load the Whisper model"""
+        # Imported here: torch and faster_whisper take seconds to import and are only needed once a model loads
+        import torch
+        from faster_whisper import WhisperModel
         try:
             return WhisperModel(
                 self.model_size,
                 device=self.device,
-                compute_type="float16" if torch.cuda.is_available() else "float32"
+                compute_type=self.compute_type or ("float16" if torch.cuda.is_available() else "float32"),
+                cpu_threads=self.cpu_threads,
+                num_workers=self.num_workers
             )
         except Exception as e:
             raise Exception(f"Failed to load Whisper model: {str(e)}")
@@ -33,6 +59,8 @@ class WhisperManager:
         audio_path: str,
         language: Optional[str] = None,
         task: str = "transcribe",
+        cancel_token: Optional[CancellationToken] = None,
+        profile: Optional[str] = None,
         **kwargs: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
@@ -42,31 +70,157 @@ class WhisperManager:
             audio_path: Path to the audio file
             language: Language code (optional)
             task: Task type (transcribe or translate)
-            **kwargs: Additional arguments for the model
+            cancel_token: Stops decoding at the next segment boundary once cancelled
+            profile: Decode profile (realtime, balanced, archive); None keeps the model defaults
+            **kwargs: Additional arguments for the model, overriding the profile
             
         Returns:
             Dictionary containing transcription results
         """
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
-            
-            # Transcribe the audio
-        segments, info = self.model.transcribe(
-            audio_path,
-            language=language,
-            task=task,
-            **kwargs
-        )
-        # Collect all segments
-        transcriptions = []
-        for segment in segments:
-            transcriptions.append(segment.text)
+
+        from faster_whisper import decode_audio
+        options = decode_options(profile, kwargs)
+        with span("whisper.transcribe_audio", model_size=self.model_size, task=task, profile=profile) as current:
+            with pipeline_stage("audio_decode").time(), span("whisper.audio_decode"):
+                audio = decode_audio(audio_path)
+                
+                # Transcribe the audio
+            with pipeline_stage("whisper_prepare").time(), span("whisper.prepare"):
+                segments, info = self.model.transcribe(
+                    audio,
+                    language=language,
+                    task=task,
+                    **options
+                )
+            # Collect all segments
+            transcriptions = self._collect_segments(segments, info, cancel_token)
+            if current is not None:
+                current.set_attribute("audio_seconds", info.duration)
+                current.set_attribute("language", info.language)
         
         return " ".join(transcriptions)
+
+    def _collect_segments(self, segments: Iterable, info, cancel_token: Optional[CancellationToken]) -> List[str]:
+        return [segment.text for segment in self._decode_segments(segments, info, cancel_token)]
+
+    def _decode_segments(self, segments: Iterable, info, cancel_token: Optional[CancellationToken]) -> List[Any]:
+        """Pull segments from the lazy decoder, stopping before the next one once cancelled"""
+        with span("whisper.decode") as current:
+            decoded = self._pull_segments(segments, info, cancel_token)
+            if current is not None:
+                current.set_attribute("segments", len(decoded))
+            return decoded
+
+    def _pull_segments(self, segments: Iterable, info, cancel_token: Optional[CancellationToken]) -> List[Any]:
+        decoded = []
+        decoded_until = 0.0
+        iterator = iter(segments)
+        started = time.perf_counter()
+        try:
+            while True:
+                if cancel_token is not None and cancel_token.cancelled:
+                    record_savings("transcription", cancel_token, audio_seconds=max(0.0, info.duration - decoded_until))
+                    raise OperationCancelled(cancel_token.reason)
+                segment = next(iterator, None)
+                if segment is None:
+                    decoded_until = info.duration
+                    return decoded
+                decoded.append(segment)
+                decoded_until = segment.end
+        finally:
+            pipeline_stage("whisper_decode").observe(time.perf_counter() - started)
+            registry.counter(
+                "whisper_audio_seconds_total", "Seconds of audio decoded by Whisper"
+            ).inc(decoded_until)
             
     
-    def transcribe(self, audio_path:str):
-        return self.transcribe_audio(audio_path)
+    def transcribe_pcm(
+        self,
+        pcm: bytes,
+        sample_rate: int = 16000,
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        cancel_token: Optional[CancellationToken] = None,
+        profile: Optional[str] = None,
+        **kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Transcribe raw 16-bit little-endian mono PCM without a file round-trip
+
+        Args:
+            pcm: Audio samples as bytes
+            sample_rate: Sample rate of the samples; resampled to Whisper's 16 kHz
+            language: Language code (optional)
+            task: Task type (transcribe or translate)
+            cancel_token: Stops decoding at the next segment boundary once cancelled
+            profile: Decode profile (realtime, balanced, archive); None keeps the model defaults
+            **kwargs: Additional arguments for the model, overriding the profile
+
+        Returns:
+            Dictionary with the text and the detected language
+        """
+        options = decode_options(profile, kwargs)
+        with span("whisper.transcribe_pcm", model_size=self.model_size, task=task, profile=profile) as current:
+            with pipeline_stage("audio_decode").time():
+                audio = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+                if sample_rate != 16000 and len(audio):
+                    positions = np.arange(0, len(audio), sample_rate / 16000)
+                    audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+            with pipeline_stage("whisper_prepare").time(), span("whisper.prepare"):
+                segments, info = self.model.transcribe(audio, language=language, task=task, **options)
+            text = " ".join(text.strip() for text in self._collect_segments(segments, info, cancel_token))
+            if current is not None:
+                current.set_attribute("audio_seconds", info.duration)
+                current.set_attribute("language", info.language)
+        return {"text": text, "language": info.language, "language_probability": info.language_probability}
+
+    def transcribe_segments(
+        self,
+        audio_path: str,
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        cancel_token: Optional[CancellationToken] = None,
+        profile: Optional[str] = None,
+        **kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Transcribe an audio file keeping segment timestamps
+
+        Args:
+            audio_path: Path to the audio file
+            language: Language code (optional)
+            task: Task type (transcribe or translate)
+            cancel_token: Stops decoding at the next segment boundary once cancelled
+            profile: Decode profile (realtime, balanced, archive); None keeps the model defaults
+            **kwargs: Additional arguments for the model, overriding the profile
+
+        Returns:
+            Dictionary with the segments (start, end, text), the detected language and the audio duration
+        """
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+        from faster_whisper import decode_audio
+        options = decode_options(profile, kwargs)
+        with span("whisper.transcribe_segments", model_size=self.model_size, task=task, profile=profile):
+            with pipeline_stage("audio_decode").time(), span("whisper.audio_decode"):
+                audio = decode_audio(audio_path)
+            with pipeline_stage("whisper_prepare").time(), span("whisper.prepare"):
+                segments, info = self.model.transcribe(audio, language=language, task=task, **options)
+            decoded = self._decode_segments(segments, info, cancel_token)
+        return {
+            "segments": [
+                {"start": round(segment.start, 2), "end": round(segment.end, 2), "text": segment.text.strip()}
+                for segment in decoded
+            ],
+            "language": info.language,
+            "duration": info.duration
+        }
+
+    def transcribe(self, audio_path:str, cancel_token: Optional[CancellationToken] = None, profile: Optional[str] = None):
+        return self.transcribe_audio(audio_path, cancel_token=cancel_token, profile=profile)
 
     async def transcribe_audio_chunk(
         self,
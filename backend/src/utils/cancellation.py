@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, List, Optional
+from .metrics import COUNT_BUCKETS, LATENCY_BUCKETS, registry
+
+
+# Reason of tokens cancelled by their own deadline, as opposed to a caller going away
+DEADLINE_EXCEEDED = "deadline exceeded"
+
+
+class OperationCancelled(Exception):
+    """Raised at the next checkpoint once a token is cancelled or its deadline has passed"""
+
+    def __init__(self, reason: Optional[str] = None):
+        super().__init__(reason)
+        self.reason = reason
+
+    @property
+    def deadline_exceeded(self) -> bool:
+        return self.reason == DEADLINE_EXCEEDED
+
+
+class CancellationToken:
+    """
+    Cancellation signal and optional deadline shared by all stages of one request.
+
+    Long-running work (Whisper segment iteration, LLM token streaming, tool
+    calls) calls `raise_if_cancelled()` at its natural boundaries. The token is
+    thread-safe, so work running in `asyncio.to_thread` sees cancellations
+    made on the event loop.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.reason: Optional[str] = None
+        self.cancelled_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], Any]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        if self.reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(DEADLINE_EXCEEDED)
+        return self.reason is not None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline, or None without one"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+            self.cancelled_at = time.monotonic()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback: Callable[[], Any]) -> Callable[[], None]:
+        """
+        Run `callback` on cancellation (immediately if already cancelled)
+
+        Returns:
+            Function that unregisters the callback; call it once the guarded work is over,
+            so long-lived tokens do not accumulate callbacks
+        """
+        with self._lock:
+            if self.reason is None:
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def _remove_callback(self, callback: Callable[[], Any]) -> None:
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise OperationCancelled(self.reason)
+
+    async def watch_disconnect(self, request, interval: float = 0.1) -> None:
+        """Cancel when the HTTP client goes away; run as a background task for the request's lifetime"""
+        while not self.cancelled:
+            if await request.is_disconnected():
+                self.cancel("client disconnected")
+                return
+            await asyncio.sleep(interval)
+
+
+def record_savings(stage: str, token: CancellationToken, **saved: float) -> None:
+    """
+    Report work skipped because of a cancellation
+
+    Args:
+        stage: Pipeline stage that stopped early (transcription, agent, ...)
+        token: The cancelled token; its cancel time gives the reaction latency
+        **saved: Amounts of skipped work, e.g. audio_seconds=12.5 or iterations=2
+    """
+    if token.cancelled_at is not None:
+        registry.histogram(
+            "cancellation_stop_latency_seconds",
+            "Time from cancellation to the work actually stopping",
+            LATENCY_BUCKETS,
+            {"stage": stage}
+        ).observe(time.monotonic() - token.cancelled_at)
+    registry.counter(
+        "cancellation_operations_total",
+        "Operations stopped early by a cancellation",
+        {"stage": stage, "reason": token.reason or "unknown"}
+    ).inc()
+    for unit, amount in saved.items():
+        registry.histogram(
+            f"cancellation_saved_{unit}",
+            f"{unit.replace('_', ' ').capitalize()} not processed because the request was cancelled",
+            LATENCY_BUCKETS if unit.endswith("seconds") else COUNT_BUCKETS,
+            {"stage": stage}
+        ).observe(amount)
@@ -0,0 +1,298 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Default bucket layouts (upper bounds). The last implicit bucket is +Inf.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 250)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((labels or {}).items()))
+
+
+class Histogram:
+    """Fixed-bucket histogram that is cheap enough to update on the hot path"""
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float], labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.labels = dict(labels or {})
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the with-block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside the matching bucket"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+        if total == 0:
+            return None
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count > 0:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return float(lower)
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return float(self.buckets[-1])
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+            total = self._count
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(list(self.buckets) + ["+Inf"], counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "labels": self.labels,
+            "count": total,
+            "sum": total_sum,
+            "mean": total_sum / total if total else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class Counter:
+    """Monotonically increasing total"""
+
+    def __init__(self, name: str, description: str, labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.description = description
+        self.labels = dict(labels or {})
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """
+    Current value that can go up and down.
+
+    A gauge backed by a function (queue depth, loaded models) is only evaluated
+    when metrics are scraped, so it costs nothing on the hot path.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Optional[Dict[str, str]] = None,
+        function: Optional[Callable[[], float]] = None
+    ):
+        self.name = name
+        self.description = description
+        self.labels = dict(labels or {})
+        self.function = function
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> float:
+        if self.function is not None:
+            return float(self.function())
+        return self._value
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = sorted(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Process-wide collection of named metrics"""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._counters: Dict[Tuple[str, LabelKey], Counter] = {}
+        self._gauges: Dict[Tuple[str, LabelKey], Gauge] = {}
+        self._descriptions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def histogram(
+        self,
+        name: str,
+        description: str = "",
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        labels: Optional[Dict[str, str]] = None
+    ) -> Histogram:
+        """Return the histogram for name/labels, creating it on first use"""
+        key = (name, _label_key(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = Histogram(name, description, buckets, labels)
+                    self._histograms[key] = histogram
+                    self._descriptions.setdefault(name, description)
+        return histogram
+
+    def counter(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
+        key = (name, _label_key(labels))
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.get(key)
+                if counter is None:
+                    counter = self._counters[key] = Counter(name, description, labels)
+                    self._descriptions.setdefault(name, description)
+        return counter
+
+    def gauge(
+        self,
+        name: str,
+        description: str = "",
+        labels: Optional[Dict[str, str]] = None,
+        function: Optional[Callable[[], float]] = None
+    ) -> Gauge:
+        """Return the gauge for name/labels; passing a function (re)binds it to that callback"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            gauge = self._gauges.get(key)
+            if gauge is None:
+                gauge = self._gauges[key] = Gauge(name, description, labels, function)
+                self._descriptions.setdefault(name, description)
+            elif function is not None:
+                gauge.function = function
+        return gauge
+
+    def histograms(self, prefix: str = "") -> List[Histogram]:
+        return [h for (name, _), h in sorted(self._histograms.items()) if name.startswith(prefix)]
+
+    def snapshot(self, prefix: str = "") -> Dict[str, Dict]:
+        """JSON-friendly view of every metric whose name starts with prefix"""
+        result: Dict[str, Dict] = {}
+
+        def series(name: str, kind: str) -> List[Dict]:
+            return result.setdefault(name, {
+                "description": self._descriptions.get(name, ""),
+                "type": kind,
+                "series": []
+            })["series"]
+
+        for histogram in self.histograms(prefix):
+            series(histogram.name, "histogram").append(histogram.snapshot())
+        for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+            for (name, _), metric in sorted(metrics.items()):
+                if not name.startswith(prefix):
+                    continue
+                try:
+                    value = metric.value
+                except Exception:
+                    # Same as a scrape: a failing gauge callback only drops its own series
+                    continue
+                series(name, kind).append({"labels": metric.labels, "value": value})
+        return result
+
+    def render_prometheus(self) -> str:
+        """Every metric in the Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+
+        def header(name: str, kind: str) -> None:
+            lines.append(f"# HELP {name} {self._descriptions.get(name, '')}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+            current = None
+            for (name, _), metric in sorted(metrics.items()):
+                if name != current:
+                    header(name, kind)
+                    current = name
+                try:
+                    value = metric.value
+                except Exception:
+                    # A failing gauge callback must not break the whole scrape
+                    continue
+                lines.append(f"{name}{_format_labels(metric.labels)} {_format_value(value)}")
+
+        current = None
+        for (name, _), histogram in sorted(self._histograms.items()):
+            if name != current:
+                header(name, "histogram")
+                current = name
+            with histogram._lock:
+                counts = list(histogram._counts)
+                total_sum = histogram._sum
+                total = histogram._count
+            cumulative = 0
+            for bound, count in zip(list(histogram.buckets) + [math.inf], counts):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                lines.append(f"{name}_bucket{_format_labels(histogram.labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(histogram.labels)} {_format_value(total_sum)}")
+            lines.append(f"{name}_count{_format_labels(histogram.labels)} {total}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared default registry used by the API and the instrumented components
+registry = MetricsRegistry()
+
+
+def pipeline_stage(stage: str) -> Histogram:
+    """Latency histogram of one voice pipeline stage (upload_read, audio_decode, vad, ...)"""
+    return registry.histogram(
+        "pipeline_stage_seconds", "Latency of each voice pipeline stage", LATENCY_BUCKETS, {"stage": stage}
+    )
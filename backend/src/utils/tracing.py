@@ -0,0 +1,344 @@
+"""
+In-process request tracing
+
+A trace is one request or voice turn. Its spans record where the time went:
+Whisper decoding, each LLM call, each tool. The active trace and span live in
+context variables, so spans nest across `await` points, into tasks and into
+`asyncio.to_thread` without being passed around. Traces are sampled when they
+start. Unsampled requests only get a request ID, so the instrumentation costs
+next to nothing when tracing is off.
+
+Sampled traces are written to one JSON file each, in Chrome trace event
+format (open in https://ui.perfetto.dev or chrome://tracing) or as OTLP/JSON.
+"""
+import asyncio
+import functools
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+DEFAULT_TRACE_DIR = os.path.join(tempfile.gettempdir(), "concierge_traces")
+EXPORT_FORMATS = ("chrome", "otlp")
+SERVICE_NAME = "concierge-backend"
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def _lane() -> str:
+    """Timeline row for a new span: the asyncio task on the event loop, otherwise the thread"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return f"task {task.get_name()}"
+    return f"thread {threading.current_thread().name}"
+
+
+class Span:
+    """One timed operation inside a trace"""
+
+    def __init__(self, trace: "Trace", name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.lane = _lane()
+        self.attributes = dict(attributes)
+        self.start_ns = trace.now_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if self.end_ns is not None:
+            return
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.end_ns = self.trace.now_ns()
+
+
+class Trace:
+    """Spans of one sampled request, all sharing a trace ID and request ID"""
+
+    def __init__(self, name: str, request_id: str, max_spans: int = 10000, **attributes: Any):
+        self.trace_id = uuid.uuid4().hex
+        self.request_id = request_id
+        self.max_spans = max_spans
+        self.dropped_spans = 0
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        # Wall clock anchors the trace; the monotonic counter times the spans
+        self._wall_ns = time.time_ns()
+        self._perf_ns = time.perf_counter_ns()
+        self.root = self.start_span(name, None, attributes)
+
+    def now_ns(self) -> int:
+        return self._wall_ns + time.perf_counter_ns() - self._perf_ns
+
+    def start_span(self, name: str, parent: Optional[Span], attributes: Dict[str, Any]) -> Optional[Span]:
+        with self._lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped_spans += 1
+                return None
+            span = Span(self, name, parent, attributes)
+            self.spans.append(span)
+            return span
+
+    @property
+    def duration(self) -> float:
+        end = self.root.end_ns if self.root.end_ns is not None else self.now_ns()
+        return (end - self.root.start_ns) / 1e9
+
+    def to_chrome(self) -> Dict[str, Any]:
+        """Chrome trace event format: complete ("X") events, one timeline row per task or thread"""
+        pid = os.getpid()
+        lanes: Dict[str, int] = {}
+        events: List[Dict[str, Any]] = []
+        for span in list(self.spans):
+            tid = lanes.setdefault(span.lane, len(lanes) + 1)
+            end_ns = span.end_ns if span.end_ns is not None else self.now_ns()
+            args = {"request_id": self.request_id, "span_id": span.span_id, "parent_id": span.parent_id, **span.attributes}
+            if span.error is not None:
+                args["error"] = span.error
+            events.append({
+                "name": span.name,
+                "cat": span.name.split(".")[0],
+                "ph": "X",
+                "ts": span.start_ns / 1000,
+                "dur": (end_ns - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": tid,
+                "args": args
+            })
+        for lane, tid in lanes.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": lane}})
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "trace_id": self.trace_id,
+                "request_id": self.request_id,
+                "dropped_spans": self.dropped_spans
+            }
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON (ExportTraceServiceRequest) with a single resource and scope"""
+        def attribute(key: str, value: Any) -> Dict[str, Any]:
+            if isinstance(value, bool):
+                typed = {"boolValue": value}
+            elif isinstance(value, int):
+                typed = {"intValue": str(value)}
+            elif isinstance(value, float):
+                typed = {"doubleValue": value}
+            else:
+                typed = {"stringValue": str(value)}
+            return {"key": key, "value": typed}
+
+        spans = []
+        for span in list(self.spans):
+            end_ns = span.end_ns if span.end_ns is not None else self.now_ns()
+            attributes = {"request_id": self.request_id, "lane": span.lane, **span.attributes}
+            otlp_span = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(end_ns),
+                "attributes": [attribute(key, value) for key, value in attributes.items() if value is not None],
+                # STATUS_CODE_ERROR = 2, STATUS_CODE_OK = 1
+                "status": {"code": 2, "message": span.error} if span.error is not None else {"code": 1}
+            }
+            if span.parent_id is not None:
+                otlp_span["parentSpanId"] = span.parent_id
+            spans.append(otlp_span)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": "utils.tracing"}, "spans": spans}]
+            }]
+        }
+
+
+class Tracer:
+    """Samples traces and writes finished ones to `trace_dir`"""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        trace_dir: str = DEFAULT_TRACE_DIR,
+        export_format: str = "chrome",
+        max_spans: int = 10000,
+        rng: Optional[random.Random] = None
+    ):
+        """
+        Configure the tracer
+
+        Args:
+            sample_rate: Fraction of traces to record, from 0 (off) to 1 (everything)
+            trace_dir: Directory the trace files are written to
+            export_format: "chrome" for Chrome trace events, "otlp" for OTLP/JSON
+            max_spans: Spans kept per trace; later ones are counted as dropped
+            rng: Random source for sampling decisions
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown trace format: {export_format}")
+        self.sample_rate = sample_rate
+        self.trace_dir = trace_dir
+        self.export_format = export_format
+        self.max_spans = max_spans
+        self.rng = rng or random.Random()
+
+    def begin(self, name: str, request_id: Optional[str] = None, **attributes: Any) -> Optional[Trace]:
+        """Start a trace if this one is sampled; None otherwise"""
+        if self.sample_rate <= 0 or self.rng.random() >= self.sample_rate:
+            return None
+        return Trace(name, request_id or new_request_id(), self.max_spans, **attributes)
+
+    @contextmanager
+    def activate(self, trace: Optional[Trace], request_id: Optional[str] = None) -> Iterator[Optional[Trace]]:
+        """Make `trace` the current trace inside the block; spans started there attach to its root"""
+        request_id = trace.request_id if trace is not None else request_id
+        tokens = [_request_id.set(request_id), _current_trace.set(trace), _current_span.set(trace.root if trace else None)]
+        try:
+            yield trace
+        finally:
+            _current_span.reset(tokens[2])
+            _current_trace.reset(tokens[1])
+            _request_id.reset(tokens[0])
+
+    def finish(self, trace: Optional[Trace], error: Optional[BaseException] = None) -> Optional[str]:
+        """Close the root span and write the trace; returns the file path"""
+        if trace is None:
+            return None
+        trace.root.finish(error)
+        return self.export(trace)
+
+    def export(self, trace: Trace) -> str:
+        os.makedirs(self.trace_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.localtime(trace.root.start_ns / 1e9))
+        path = os.path.join(self.trace_dir, f"trace_{stamp}_{trace.request_id}.{self.export_format}.json")
+        document = trace.to_chrome() if self.export_format == "chrome" else trace.to_otlp()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, default=str)
+        return path
+
+    @contextmanager
+    def start_trace(self, name: str, request_id: Optional[str] = None, **attributes: Any) -> Iterator[Optional[Trace]]:
+        """
+        Trace the block as one request
+
+        Inside an already active trace this only opens a span, so nested entry
+        points (middleware around an endpoint that starts its own trace) share one file.
+        """
+        if _current_trace.get() is not None or _request_id.get() is not None:
+            with span(name, **attributes):
+                yield _current_trace.get()
+            return
+        request_id = request_id or new_request_id()
+        trace = self.begin(name, request_id, **attributes)
+        with self.activate(trace, request_id):
+            try:
+                yield trace
+            except BaseException as e:
+                self.finish(trace, e)
+                raise
+        self.finish(trace)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def start_span(name: str, parent: Optional[Span] = None, **attributes: Any) -> Optional[Span]:
+    """
+    Open a span that the caller finishes explicitly, for start/end callbacks
+    that cannot wrap the work in a with-block. None when nothing is traced.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    return trace.start_span(name, parent or _current_span.get(), attributes)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time the block as a child of the current span; a no-op outside a sampled trace"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    current = trace.start_span(name, _current_span.get(), attributes)
+    if current is None:
+        yield None
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator form of `span` for plain and async functions"""
+    def decorate(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def run_async(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return run_async
+
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return run
+    return decorate
+
+
+_default_tracer: Optional[Tracer] = None
+_default_tracer_lock = threading.Lock()
+
+
+def configure_tracing(sample_rate: float, trace_dir: str = DEFAULT_TRACE_DIR, export_format: str = "chrome") -> Tracer:
+    """Replace the process-wide tracer"""
+    global _default_tracer
+    with _default_tracer_lock:
+        _default_tracer = Tracer(sample_rate, trace_dir, export_format)
+        return _default_tracer
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer; sampling is off until `configure_tracing` is called"""
+    global _default_tracer
+    with _default_tracer_lock:
+        if _default_tracer is None:
+            _default_tracer = Tracer()
+        return _default_tracer
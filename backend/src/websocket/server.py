@@ -1 +1,430 @@
-# WebSocket server implementation will be added in the feature branch 
\ No newline at end of file
+"""
+Full-duplex voice sessions over a WebSocket
+
+Protocol (one connection = one session):
+
+Client -> server
+    binary frames      16-bit little-endian mono PCM at the negotiated sample rate
+    {"type": "start", "sample_rate": 16000, "language": null, "agent": true, "speculative": false, "profile": "balanced"}
+    {"type": "end_utterance"}   finalize the current utterance now
+    {"type": "stop"}            finish pending work and close
+
+Server -> client
+    {"type": "ready", "session_id": ...}
+    {"type": "partial", "text": ...}                  superseded by later partials
+    {"type": "final", "text": ..., "language": ...}
+    {"type": "token", "text": ...}                    agent LLM tokens as they stream
+    {"type": "tool_start", "tool": ..., "input": ...}
+    {"type": "tool_end", "tool": ..., "output": ...}
+    {"type": "answer", "text": ...}
+    {"type": "error", "message": ...}             a rejected message; if a transcription
+                                                  or agent worker fails, the last event before
+                                                  the server closes with code 1011
+
+Flow control: incoming audio goes through a bounded queue. When transcription
+falls behind, the receiver stops reading, and TCP pushes back on the client.
+Outgoing partial transcripts are dropped rather than queued when the client
+reads slowly, because a newer partial replaces them anyway. Every other
+event is delivered in order.
+
+Speculative sessions start the agent when the caller pauses, before the
+end of the utterance is certain. The answer is sent only once the final
+transcript confirms it. Tokens of speculative runs are not streamed,
+because the run may still be thrown away.
+"""
+import asyncio
+import json
+import time
+import uuid
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+import numpy as np
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from langchain.callbacks.base import AsyncCallbackHandler
+from llm.speculation import SpeculativeTurn
+from transcription.endpointing import AdaptiveEndpointer
+from transcription.profiles import get_profile
+from utils.cancellation import CancellationToken, OperationCancelled
+from utils.metrics import pipeline_stage, registry
+from utils.tracing import get_tracer
+
+BYTES_PER_SAMPLE = 2
+# Seconds a failed session waits to deliver its error event before closing
+SEND_ERROR_TIMEOUT = 2.0
+END_UTTERANCE = object()
+STOP = object()
+
+# Open sessions, read by scrape-time gauges only
+_active_sessions: "weakref.WeakSet[VoiceSession]" = weakref.WeakSet()
+
+registry.gauge("voice_sessions_active", "Open WebSocket voice sessions", function=lambda: len(_active_sessions))
+registry.gauge(
+    "voice_audio_queue_depth", "Audio frames waiting for transcription, all sessions",
+    function=lambda: sum(session.audio.qsize() for session in list(_active_sessions))
+)
+registry.gauge(
+    "voice_event_queue_depth", "Events waiting to be sent to clients, all sessions",
+    function=lambda: sum(session.events.qsize() for session in list(_active_sessions))
+)
+
+
+@dataclass
+class SessionConfig:
+    sample_rate: int = 16000
+    language: Optional[str] = None
+    agent: bool = True
+    # Seconds of new audio between partial transcripts
+    partial_interval: float = 1.0
+    # Decode profiles (transcription.profiles) of final and partial transcripts
+    decode_profile: str = "balanced"
+    partial_profile: str = "realtime"
+    # Trailing silence that ends an utterance until the caller's pauses are learned; the
+    # silence threshold follows the line's noise floor
+    silence_duration: float = 0.7
+    # Bounds of the learned trailing silence
+    min_silence_duration: float = 0.35
+    max_silence_duration: float = 1.2
+    min_utterance: float = 0.3
+    max_utterance: float = 30.0
+    audio_queue_size: int = 64
+    event_queue_size: int = 256
+    # Start the agent on a stable partial transcript; the answer is used if the final transcript matches
+    speculative: bool = False
+    # Trailing silence after which the transcript so far counts as stable
+    speculation_pause: float = 0.25
+
+
+@dataclass
+class SessionState:
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    buffer: bytearray = field(default_factory=bytearray)
+    heard_speech: bool = False
+    samples_since_partial: int = 0
+    turns: int = 0
+
+
+class SessionEventHandler(AsyncCallbackHandler):
+    """Forwards agent tokens and tool calls to the session's event stream"""
+
+    def __init__(self, emit: Callable):
+        self.emit = emit
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        await self.emit({"type": "token", "text": token})
+
+    async def on_tool_start(self, serialized: Dict[str, Any], input_str: str, **kwargs: Any) -> None:
+        await self.emit({"type": "tool_start", "tool": serialized.get("name"), "input": input_str})
+
+    async def on_tool_end(self, output: str, name: Optional[str] = None, **kwargs: Any) -> None:
+        await self.emit({"type": "tool_end", "tool": name, "output": str(output)})
+
+
+class VoiceSession:
+    def __init__(
+        self,
+        websocket: WebSocket,
+        whisper_manager,
+        agent_factory: Optional[Callable[[], Any]] = None,
+        config: Optional[SessionConfig] = None
+    ):
+        self.websocket = websocket
+        self.whisper_manager = whisper_manager
+        self.agent_factory = agent_factory
+        self.config = config or SessionConfig()
+        self.state = SessionState()
+        self.endpointer = AdaptiveEndpointer(
+            base_hangover=self.config.silence_duration,
+            min_hangover=min(self.config.min_silence_duration, self.config.silence_duration),
+            max_hangover=max(self.config.max_silence_duration, self.config.silence_duration),
+            min_speech=self.config.min_utterance,
+            max_turn=self.config.max_utterance,
+            pause=self.config.speculation_pause
+        )
+        self.agent = None
+        self._agent_task: Optional[asyncio.Future] = None
+        self.speculation: Optional[SpeculativeTurn] = None
+        # Cancelled when the connection ends, so in-flight decoding and agent runs stop early
+        self.cancel_token = CancellationToken()
+        self.audio: asyncio.Queue = asyncio.Queue(maxsize=self.config.audio_queue_size)
+        self.turns: asyncio.Queue = asyncio.Queue()
+        self.events: asyncio.Queue = asyncio.Queue(maxsize=self.config.event_queue_size)
+        # WebSocket close code once the session ends: 1011 (internal error) when a worker failed
+        self.close_code = 1000
+
+    async def emit(self, event: Dict[str, Any]) -> None:
+        if event["type"] == "partial":
+            try:
+                self.events.put_nowait(event)
+            except asyncio.QueueFull:
+                pass
+            return
+        await self.events.put(event)
+
+    async def run(self) -> None:
+        _active_sessions.add(self)
+        await self.emit({"type": "ready", "session_id": self.state.session_id})
+        sender = asyncio.create_task(self._send_loop())
+        receiver = asyncio.create_task(self._receive_loop())
+        workers = [asyncio.create_task(self._transcribe_loop()), asyncio.create_task(self._agent_loop())]
+        try:
+            # A failing worker ends the session at once; otherwise the receiver would block on a full queue
+            done, _ = await asyncio.wait([receiver, *workers], return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+            await self.events.put(None)
+            await sender
+        except WebSocketDisconnect:
+            self.cancel_token.cancel("client disconnected")
+        except Exception as e:
+            print(f"Voice session {self.state.session_id} failed: {str(e)}")
+            self.close_code = 1011
+            self.cancel_token.cancel("session failed")
+            try:
+                # Best effort: the client may have stopped reading
+                await asyncio.wait_for(self._flush_error(sender, str(e)), timeout=SEND_ERROR_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            self.cancel_token.cancel("session closed")
+            if self.speculation is not None:
+                self.speculation.cancel("session closed")
+            for task in [receiver, *workers, sender]:
+                task.cancel()
+            _active_sessions.discard(self)
+
+    async def _flush_error(self, sender: asyncio.Task, message: str) -> None:
+        """Send the error after the events already queued, then stop the sender"""
+        await self.emit({"type": "error", "message": message})
+        await self.events.put(None)
+        await sender
+
+    async def _receive_loop(self) -> None:
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes") is not None:
+                if len(message["bytes"]) % BYTES_PER_SAMPLE:
+                    await self.emit({"type": "error", "message": "Audio frames must hold whole 16-bit samples"})
+                    continue
+                # Blocks once the queue is full, which stops reading from the socket
+                await self.audio.put(message["bytes"])
+                continue
+            try:
+                control = json.loads(message.get("text") or "{}")
+            except json.JSONDecodeError:
+                await self.emit({"type": "error", "message": "Control messages must be JSON"})
+                continue
+            kind = control.get("type")
+            if kind == "start":
+                try:
+                    sample_rate = int(control.get("sample_rate", self.config.sample_rate))
+                except (TypeError, ValueError):
+                    sample_rate = 0
+                if sample_rate <= 0:
+                    await self.emit({"type": "error", "message": "sample_rate must be a positive integer"})
+                else:
+                    self.config.sample_rate = sample_rate
+                self.config.language = control.get("language", self.config.language)
+                self.config.agent = bool(control.get("agent", self.config.agent))
+                self.config.speculative = bool(control.get("speculative", self.config.speculative))
+                try:
+                    self.config.decode_profile = get_profile(control.get("profile", self.config.decode_profile)).name
+                except ValueError as e:
+                    await self.emit({"type": "error", "message": str(e)})
+            elif kind == "end_utterance":
+                await self.audio.put(END_UTTERANCE)
+            elif kind == "stop":
+                await self.audio.put(STOP)
+                return
+            else:
+                await self.emit({"type": "error", "message": f"Unknown control message: {kind}"})
+
+    async def _transcribe_loop(self) -> None:
+        config, state = self.config, self.state
+        while True:
+            frame = await self.audio.get()
+            if frame is STOP or frame is END_UTTERANCE:
+                await self._finalize()
+                if frame is STOP:
+                    await self.turns.put(None)
+                    return
+                continue
+
+            state.buffer.extend(frame)
+            samples = len(frame) // BYTES_PER_SAMPLE
+            state.samples_since_partial += samples
+            vad_started = time.perf_counter()
+            pcm = np.frombuffer(frame[:samples * BYTES_PER_SAMPLE], dtype="<i2")
+            rms = float(np.sqrt(np.mean((pcm / 32768.0) ** 2))) if samples else 0.0
+            event = self.endpointer.update(rms, samples / config.sample_rate)
+            kind = event.kind if event is not None else None
+            if kind == "speech_start":
+                state.heard_speech = True
+            pipeline_stage("vad").observe(time.perf_counter() - vad_started)
+
+            if kind == "end_of_turn":
+                registry.counter(
+                    "voice_endpoints_total", "Utterances ended by the endpointer, by reason", {"reason": event.reason}
+                ).inc()
+                await self._finalize()
+            elif kind == "pause" and self.speculating:
+                # The speaker paused: no new words can change this transcript, so the agent may start on it
+                state.samples_since_partial = 0
+                result = await self._transcribe(bytes(state.buffer), config.partial_profile)
+                if result["text"]:
+                    await self.emit({"type": "partial", "text": result["text"]})
+                    self._speculation().update(result["text"], stable=True)
+            elif state.heard_speech and state.samples_since_partial >= config.partial_interval * config.sample_rate:
+                state.samples_since_partial = 0
+                result = await self._transcribe(bytes(state.buffer), config.partial_profile)
+                if result["text"]:
+                    await self.emit({"type": "partial", "text": result["text"]})
+                    if self.speculating:
+                        self._speculation().update(result["text"])
+
+    @property
+    def speculating(self) -> bool:
+        return self.config.speculative and self.config.agent and self.agent_factory is not None
+
+    def _speculation(self) -> SpeculativeTurn:
+        if self.speculation is None:
+            self.speculation = SpeculativeTurn(self._speculate, parent_token=self.cancel_token)
+        return self.speculation
+
+    async def _speculate(self, text: str, cancel_token: CancellationToken) -> str:
+        agent = await self._get_agent()
+        return await agent.speculate(text, cancel_token)
+
+    async def _get_agent(self):
+        # Shared by the speculative runs and the agent loop, so the agent is built once
+        if self._agent_task is None:
+            self._agent_task = asyncio.ensure_future(asyncio.to_thread(self.agent_factory))
+        self.agent = await asyncio.shield(self._agent_task)
+        return self.agent
+
+    async def _transcribe(self, pcm: bytes, profile: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(
+            self.whisper_manager.transcribe_pcm,
+            pcm,
+            self.config.sample_rate,
+            self.config.language,
+            cancel_token=self.cancel_token,
+            profile=profile
+        )
+
+    async def _finalize(self) -> None:
+        # A turn starts when the end of speech is detected (or the client ends the utterance)
+        turn_started = time.perf_counter()
+        state = self.state
+        pcm, heard_speech = bytes(state.buffer), state.heard_speech
+        speculation, self.speculation = self.speculation, None
+        state.buffer.clear()
+        state.heard_speech = False
+        state.samples_since_partial = 0
+        # Ends the endpointer's turn too when the client ended the utterance; what it learned about the line stays
+        self.endpointer.reset_turn()
+        if not heard_speech or not pcm:
+            if speculation is not None:
+                speculation.cancel()
+            return
+        # One trace per sampled turn, from the final transcription through the agent's answer
+        tracer = get_tracer()
+        trace = tracer.begin(
+            "voice_turn",
+            session_id=state.session_id,
+            audio_seconds=len(pcm) / BYTES_PER_SAMPLE / self.config.sample_rate
+        )
+        try:
+            with tracer.activate(trace):
+                result = await self._transcribe(pcm, self.config.decode_profile)
+        except BaseException as e:
+            tracer.finish(trace, e)
+            raise
+        text = result["text"].strip()
+        if not text:
+            if speculation is not None:
+                speculation.cancel()
+            tracer.finish(trace)
+            return
+        await self.emit({"type": "final", "text": text, "language": result.get("language")})
+        if self.config.agent and self.agent_factory is not None:
+            await self.turns.put((text, turn_started, trace, speculation))
+        else:
+            pipeline_stage("turn").observe(time.perf_counter() - turn_started)
+            tracer.finish(trace)
+
+    async def _agent_loop(self) -> None:
+        # Turns are answered one at a time, in order, on the session's own agent (and memory)
+        handler = SessionEventHandler(self.emit)
+        while True:
+            turn = await self.turns.get()
+            if turn is None:
+                return
+            text, turn_started, trace, speculation = turn
+            tracer = get_tracer()
+            try:
+                with tracer.activate(trace):
+                    agent = await self._get_agent()
+                    answer = await speculation.resolve(text) if speculation is not None else None
+                    if answer is None:
+                        answer = await agent.executer.run_agent(text, callbacks=[handler], cancel_token=self.cancel_token)
+                    else:
+                        # The speculative run answered this transcript; only now does it enter the memory
+                        agent.commit(text, answer)
+                self.state.turns += 1
+                await self.emit({"type": "answer", "text": answer})
+                pipeline_stage("turn").observe(time.perf_counter() - turn_started)
+            except OperationCancelled as e:
+                tracer.finish(trace, e)
+                return
+            except Exception as e:
+                tracer.finish(trace, e)
+                await self.emit({"type": "error", "message": str(e)})
+            else:
+                tracer.finish(trace)
+
+    async def _send_loop(self) -> None:
+        while True:
+            event = await self.events.get()
+            if event is None:
+                return
+            await self.websocket.send_json(event)
+
+
+def _default_agent_factory():
+    from insurance.insurance_agent import InsuranceAgent
+    return InsuranceAgent()
+
+
+def create_voice_router(
+    whisper_provider: Callable[[], Any],
+    agent_factory: Optional[Callable[[], Any]] = _default_agent_factory,
+    config_factory: Callable[[], SessionConfig] = SessionConfig
+) -> APIRouter:
+    """
+    Router exposing the voice session endpoint
+
+    Args:
+        whisper_provider: Returns the WhisperManager to transcribe with
+        agent_factory: Builds one agent per connection; None disables agent turns
+        config_factory: Builds the per-connection session configuration
+    """
+    router = APIRouter()
+
+    @router.websocket("/ws/voice")
+    async def voice_session(websocket: WebSocket):
+        await websocket.accept()
+        # The provider may load the model on first use; keep that off the event loop
+        whisper_manager = await asyncio.to_thread(whisper_provider)
+        session = VoiceSession(websocket, whisper_manager, agent_factory, config_factory())
+        await session.run()
+        try:
+            await websocket.close(code=session.close_code)
+        except RuntimeError:
+            # Already closed by the client
+            pass
+
+    return router